@@ -0,0 +1,209 @@
+"""
+RPA Orchestration System - Admission Control
+--------------------------------------------
+Backpressure for POST /jobs based on how long the farm needs to work off
+its queue.
+
+The estimated drain time is the queued work (unfinished jobs per provider
+times that provider's recent average run time) divided by the number of
+jobs the farm runs at once. Submissions are rejected with 429 and a
+Retry-After of the excess while it is above ADMISSION_MAX_DRAIN_SECONDS,
+so the queue never holds more than the farm can finish within that time.
+Low-priority jobs can optionally be shed earlier.
+
+Queue depth and durations are read from the database at most every
+ADMISSION_REFRESH_INTERVAL seconds; jobs admitted in between are added to
+the estimate locally so a burst cannot overrun the limit.
+"""
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from sqlalchemy.exc import SQLAlchemyError
+
+import db
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class AdmissionDecision:
+    """Outcome of an admission check."""
+    admitted: bool
+    drain_seconds: float
+    limit_seconds: float
+    retry_after: int = 0
+    reason: Optional[str] = None
+
+
+class AdmissionController:
+    """
+    Admits or rejects new jobs by estimated queue drain time.
+
+    Args:
+        max_drain_seconds: Drain time above which jobs are rejected; 0 disables admission control
+        worker_slots: Jobs the farm runs concurrently; 0 derives it from worker capacity, capped at MAX_WORKERS
+        refresh_interval: Seconds between database reads of queue depth and durations
+        shed_low_priority: Reject jobs with priority <= low_priority_max at shed_fraction of the limit
+        low_priority_max: Highest priority treated as low priority
+        shed_fraction: Fraction of max_drain_seconds at which low-priority jobs are shed
+    """
+
+    def __init__(
+        self,
+        max_drain_seconds: float,
+        worker_slots: int = 0,
+        refresh_interval: float = 5,
+        shed_low_priority: bool = False,
+        low_priority_max: int = 0,
+        shed_fraction: float = 0.75
+    ):
+        self.max_drain_seconds = max_drain_seconds
+        self._worker_slots = worker_slots
+        self.refresh_interval = refresh_interval
+        self.shed_low_priority = shed_low_priority
+        self.low_priority_max = low_priority_max
+        self.shed_fraction = shed_fraction
+
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._refreshed_monotonic: Optional[float] = None
+        self._depth: Dict[str, Dict[str, int]] = {}
+        self._durations: Dict[str, Dict[str, float]] = {}
+        self._queued_work = 0.0
+        self._admitted_work = 0.0
+        self._admitted = 0
+        self._rejected = 0
+        self._shed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_drain_seconds > 0
+
+    @property
+    def worker_slots(self) -> int:
+        """Jobs the farm runs concurrently."""
+        if self._worker_slots > 0:
+            return self._worker_slots
+        # Each worker runs WORKER_JOB_SLOTS jobs at once (see job_executor), but the
+        # dispatcher keeps at most MAX_WORKERS jobs in flight across all of them
+        worker_capacity = (Config.WORKER_JOB_SLOTS or Config.MAX_WORKERS) * len(Config.WORKER_ENDPOINTS)
+        return min(Config.MAX_WORKERS, worker_capacity)
+
+    def job_seconds(self, provider: str) -> float:
+        """Expected run time of one job for a provider."""
+        duration = self._durations.get(provider)
+        if duration:
+            return duration["avg_seconds"]
+        return Config.ADMISSION_DEFAULT_JOB_SECONDS
+
+    def refresh(self) -> bool:
+        """
+        Re-read queue depth and recent durations from the database.
+
+        Returns:
+            bool: True on success; the previous estimate is kept otherwise
+        """
+        try:
+            depth = db.get_queue_depth_by_provider()
+            durations = db.get_recent_job_durations(Config.ADMISSION_DURATION_SAMPLE)
+        except SQLAlchemyError as e:
+            logger.error(f"Error reading queue depth for admission control: {str(e)}")
+            return False
+
+        with self._lock:
+            self._depth = depth
+            self._durations = durations
+            # Running jobs are counted as half done on average
+            self._queued_work = sum(
+                (counts["queued"] + counts["running"] / 2) * self.job_seconds(provider)
+                for provider, counts in depth.items()
+            )
+            self._admitted_work = 0.0
+            self._refreshed_monotonic = time.monotonic()
+        return True
+
+    def _refresh_if_stale(self):
+        refreshed = self._refreshed_monotonic
+        if refreshed is not None and time.monotonic() - refreshed < self.refresh_interval:
+            return
+        # One request refreshes; concurrent ones use the previous estimate
+        # unless there is none yet
+        if self._refresh_lock.acquire(blocking=refreshed is None):
+            try:
+                self.refresh()
+            finally:
+                self._refresh_lock.release()
+
+    def drain_seconds(self) -> float:
+        """Estimated seconds until the farm has worked off the current queue."""
+        slots = self.worker_slots
+        if slots <= 0:
+            return 0.0
+        return (self._queued_work + self._admitted_work) / slots
+
+    def admit(self, provider: str, priority: int = 0) -> AdmissionDecision:
+        """
+        Decide whether to accept a new job, counting it towards the queue if accepted.
+
+        Args:
+            provider: Provider of the job
+            priority: Job priority
+
+        Returns:
+            AdmissionDecision; retry_after is the seconds until the queue is
+            expected to be back under the job's limit
+        """
+        if not self.enabled or self.worker_slots <= 0:
+            return AdmissionDecision(True, 0.0, self.max_drain_seconds)
+
+        self._refresh_if_stale()
+
+        limit = self.max_drain_seconds
+        reason = "Job queue is over capacity"
+        if self.shed_low_priority and priority <= self.low_priority_max:
+            limit = self.max_drain_seconds * self.shed_fraction
+            reason = "Job queue is over capacity for low-priority jobs"
+
+        with self._lock:
+            drain = self.drain_seconds()
+            if drain >= limit:
+                if limit < self.max_drain_seconds:
+                    self._shed += 1
+                else:
+                    self._rejected += 1
+                retry_after = max(1, math.ceil(drain - limit))
+                return AdmissionDecision(False, drain, limit, retry_after, reason)
+
+            self._admitted += 1
+            self._admitted_work += self.job_seconds(provider)
+            return AdmissionDecision(True, drain, limit)
+
+    def stats(self) -> Dict[str, Any]:
+        """Current estimate and admission counters, for /metrics."""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "drain_seconds": round(self.drain_seconds(), 1),
+                "max_drain_seconds": self.max_drain_seconds,
+                "worker_slots": self.worker_slots,
+                "queue_depth": self._depth,
+                "job_seconds": {provider: round(d["avg_seconds"], 1) for provider, d in self._durations.items()},
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "shed": self._shed,
+            }
+
+
+controller = AdmissionController(
+    max_drain_seconds=Config.ADMISSION_MAX_DRAIN_SECONDS,
+    worker_slots=Config.ADMISSION_WORKER_SLOTS,
+    refresh_interval=Config.ADMISSION_REFRESH_INTERVAL,
+    shed_low_priority=Config.ADMISSION_SHED_LOW_PRIORITY,
+    low_priority_max=Config.ADMISSION_LOW_PRIORITY_MAX,
+    shed_fraction=Config.ADMISSION_SHED_FRACTION,
+)
@@ -2,14 +2,26 @@
 RPA Orchestration System - Authentication Utilities
 --------------------------------------------------
 Authentication and authorization utilities for the RPA orchestration system.
+
+Verified token claims, user records and API keys are cached for a few
+seconds per process, so authenticating a request does not decode a JWT
+or query the database every time. Service callers can use API keys
+(X-API-Key header), which are stored and checked as HMAC-SHA256 digests
+instead of going through bcrypt.
 """
 import datetime
+import hashlib
+import hmac
 import logging
-from typing import Optional, Dict, Any, Union
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple, Union
 
 import bcrypt
 import jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel
 
@@ -20,6 +32,71 @@ logger = logging.getLogger(__name__)
 
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
+
+API_KEY_PREFIX = "rpa_"
+API_KEY_LOOKUP_LENGTH = 12  # leading characters stored in clear for lookup
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after a per-entry TTL.
+    
+    Args:
+        max_entries: Entries kept before the least recently used are dropped
+    """
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key, default=None):
+        """Get a live entry, or default if missing or expired."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, key, value, ttl: float):
+        """Store an entry for ttl seconds."""
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def pop(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+token_cache = TTLCache(Config.AUTH_CACHE_MAX_ENTRIES)  # token -> verified claims
+user_cache = TTLCache(Config.AUTH_CACHE_MAX_ENTRIES)  # username -> UserInDB
+login_cache = TTLCache(Config.AUTH_CACHE_MAX_ENTRIES)  # username -> (password digest, hashed_password)
+api_key_cache = TTLCache(Config.AUTH_CACHE_MAX_ENTRIES)  # key digest -> verified key record
+# Unknown keys are kept apart, so clients sending made-up keys cannot push verified keys out
+unknown_api_key_cache = TTLCache(Config.AUTH_UNKNOWN_KEY_CACHE_MAX_ENTRIES)  # key digest -> True
+
+# Passwords verified at /token are remembered as HMACs under a key that never leaves this process
+_LOGIN_CACHE_KEY = secrets.token_bytes(32)
 
 # Models
 class User(BaseModel):
@@ -101,6 +178,28 @@ def get_user(username: str) -> Optional[UserInDB]:
         return UserInDB(**user_dict)
     return None
 
+def get_cached_user(username: str) -> Optional[UserInDB]:
+    """
+    Get a user, reading the database at most once per AUTH_CACHE_TTL seconds.
+    
+    Args:
+        username: Username to look up
+        
+    Returns:
+        UserInDB: User object if found, None otherwise
+    """
+    user = user_cache.get(username)
+    if user is None:
+        user = get_user(username)
+        if user is not None:
+            user_cache.put(username, user, Config.AUTH_CACHE_TTL)
+    return user
+
+def invalidate_user(username: str):
+    """Drop cached state for a user, e.g. after a password change or disabling the account."""
+    user_cache.pop(username)
+    login_cache.pop(username)
+
 def authenticate_user(username: str, password: str) -> Union[UserInDB, bool]:
     """
     Authenticate a user.
@@ -115,23 +214,140 @@ def authenticate_user(username: str, password: str) -> Union[UserInDB, bool]:
     user = get_user(username)
     if not user:
         return False
+    
+    # Skip bcrypt when this password was verified recently against the same stored hash
+    digest = hmac.new(_LOGIN_CACHE_KEY, password.encode('utf-8'), hashlib.sha256).digest()
+    cached = login_cache.get(username)
+    if cached and cached[1] == user.hashed_password and hmac.compare_digest(cached[0], digest):
+        return user
+    
     if not verify_password(password, user.hashed_password):
         return False
+    login_cache.put(username, (digest, user.hashed_password), Config.AUTH_LOGIN_CACHE_TTL)
     return user
 
+def hash_api_key(api_key: str) -> str:
+    """Get the HMAC-SHA256 digest an API key is stored as."""
+    return hmac.new(Config.API_KEY_SECRET.encode('utf-8'), api_key.encode('utf-8'), hashlib.sha256).hexdigest()
+
+def generate_api_key(name: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Issue a new API key.
+    
+    Args:
+        name: Service the key is for
+        
+    Returns:
+        Tuple of (key, stored record); the key is only available here
+        
+    Raises:
+        RuntimeError: If the key could not be stored
+    """
+    api_key = API_KEY_PREFIX + secrets.token_urlsafe(32)
+    record = db.create_api_key(name, api_key[:API_KEY_LOOKUP_LENGTH], hash_api_key(api_key))
+    if record is None:
+        raise RuntimeError("Failed to store API key")
+    record.pop("key_hash", None)
+    return api_key, record
+
+def verify_api_key(api_key: str) -> Optional[Dict[str, Any]]:
+    """
+    Validate an API key.
+    
+    The digest is compared in constant time; results (including unknown
+    keys) are cached for AUTH_CACHE_TTL seconds, so a revoked key may keep
+    working that long on other processes.
+    
+    Args:
+        api_key: Key from the X-API-Key header
+        
+    Returns:
+        Dict with the key's id and name if valid and enabled, None otherwise
+    """
+    digest = hash_api_key(api_key)
+    cached = _cached_api_key(digest)
+    if cached is not None:
+        return cached or None
+    
+    match = None
+    for candidate in db.get_api_keys_by_prefix(api_key[:API_KEY_LOOKUP_LENGTH]):
+        if hmac.compare_digest(candidate["key_hash"], digest) and not candidate["disabled"]:
+            match = {"id": candidate["id"], "name": candidate["name"]}
+    
+    if match:
+        api_key_cache.put(digest, match, Config.AUTH_CACHE_TTL)
+    else:
+        unknown_api_key_cache.put(digest, True, Config.AUTH_CACHE_TTL)
+    return match
+
+def _cached_api_key(digest: str) -> Optional[Union[Dict[str, Any], bool]]:
+    if unknown_api_key_cache.get(digest):
+        return False
+    return api_key_cache.get(digest)
+
+def cached_api_key(api_key: str) -> Optional[Union[Dict[str, Any], bool]]:
+    """
+    Look up an API key in the verification caches only, without the database.
+    
+    Returns:
+        The key record if verified, False if known to be invalid, None if not cached
+    """
+    return _cached_api_key(hash_api_key(api_key))
+
+def revoke_api_key(api_key_id: int) -> bool:
+    """Disable an API key. Other processes notice within AUTH_CACHE_TTL seconds."""
+    revoked = db.set_api_key_disabled(api_key_id, True)
+    api_key_cache.clear()
+    return revoked
+
 def check_permission(permission: str):
     """
-    Minimal permission checker that always allows access.
+    Minimal permission checker.
     Returns a dependency function for FastAPI.
     
+    Credentials that are presented (X-API-Key header or bearer token) must
+    be valid and identify the caller; requests without credentials are
+    allowed unless AUTH_REQUIRED is set.
+    
     Args:
         permission: Permission string (e.g., "job:create")
         
     Returns:
         Dependency function that returns permission info
     """
-    def permission_dependency():
-        # For now, always allow access with minimal info
+    def permission_dependency(
+        token: Optional[str] = Depends(optional_oauth2_scheme),
+        x_api_key: Optional[str] = Header(None)
+    ):
+        if x_api_key:
+            api_key = verify_api_key(x_api_key)
+            if api_key is None:
+                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid API key")
+            return {
+                "permission": permission,
+                "allowed": True,
+                "source": "api_key",
+                "api_key_id": api_key["id"],
+                "api_key_name": api_key["name"]
+            }
+        
+        if token:
+            user = get_current_active_user(get_current_user(token))
+            return {
+                "permission": permission,
+                "allowed": True,
+                "source": "token",
+                "username": user.username
+            }
+        
+        if Config.AUTH_REQUIRED:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Not authenticated",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        
+        # No credentials: allow access with minimal info
         return {
             "permission": permission,
             "allowed": True,
@@ -159,7 +375,40 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[datetime.t
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, Config.JWT_SECRET, algorithm=Config.JWT_ALGORITHM)
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserInDB:
+def decode_token(token: str) -> Dict[str, Any]:
+    """
+    Verify a JWT and return its claims, caching them until the token expires
+    or for AUTH_CACHE_TTL seconds, whichever is sooner.
+    
+    Raises:
+        jwt.PyJWTError: If the token is invalid or expired
+    """
+    payload = token_cache.get(token)
+    if payload is not None:
+        # Expiry still applies to cached claims
+        if payload.get("exp", float("inf")) > time.time():
+            return payload
+        token_cache.pop(token)
+        raise jwt.ExpiredSignatureError("Signature has expired")
+    
+    payload = jwt.decode(token, Config.JWT_SECRET, algorithms=[Config.JWT_ALGORITHM])
+    ttl = Config.AUTH_CACHE_TTL
+    if "exp" in payload:
+        ttl = min(ttl, payload["exp"] - time.time())
+    token_cache.put(token, payload, ttl)
+    return payload
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    """Authentication cache statistics, for /metrics."""
+    return {
+        "tokens": token_cache.stats(),
+        "users": user_cache.stats(),
+        "logins": login_cache.stats(),
+        "api_keys": api_key_cache.stats(),
+        "unknown_api_keys": unknown_api_key_cache.stats(),
+    }
+
+def get_current_user(token: str = Depends(oauth2_scheme)) -> UserInDB:
     """
     Get the current user from JWT token.
     
@@ -178,19 +427,19 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserInDB:
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, Config.JWT_SECRET, algorithms=[Config.JWT_ALGORITHM])
+        payload = decode_token(token)
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
         token_data = TokenData(username=username)
     except jwt.PyJWTError:
         raise credentials_exception
-    user = get_user(token_data.username)
+    user = get_cached_user(token_data.username)
     if user is None:
         raise credentials_exception
     return user
 
-async def get_current_active_user(current_user: UserInDB = Depends(get_current_user)) -> UserInDB:
+def get_current_active_user(current_user: UserInDB = Depends(get_current_user)) -> UserInDB:
     """
     Ensure the user is active.
     
@@ -207,7 +456,7 @@ async def get_current_active_user(current_user: UserInDB = Depends(get_current_u
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm) -> Dict[str, str]:
+def login_for_access_token(form_data: OAuth2PasswordRequestForm) -> Dict[str, str]:
     """
     Process a login request and generate access token.
     
@@ -14,6 +14,7 @@ import base64
 import re
 from datetime import datetime, date
 from pathlib import Path
+from urllib.parse import urljoin
 from typing import Optional, List, Dict, Any, Union
 from enum import Enum
 from abc import ABC, abstractmethod
@@ -36,6 +37,8 @@ from pydantic import BaseModel, Field
 
 # Import existing config
 from config import Config
+from driver_pool import driver_pool
+from session_pool import page_check, session_pool
 
 # Import Evotel validation module for post-cancellation validation
 try:
@@ -442,40 +445,65 @@ class CancellationResult(BaseModel):
 
 # ==================== SERVICES ====================
 
+# Drivers are pooled when "evotel" is in DRIVER_POOL_PROVIDERS
+DRIVER_POOL_KEY = "evotel.cancellation"
+
+
+def launch_chrome() -> webdriver.Chrome:
+    """Start Chrome with the options this automation needs; also used by the driver pool"""
+    options = ChromeOptions()
+
+    # USE CONFIG INSTEAD OF os.getenv()
+    if Config.HEADLESS:
+        options.add_argument('--headless=new')
+        logger.info("Running Chrome in HEADLESS mode")
+    else:
+        logger.info("Running Chrome in VISIBLE mode")
+
+    # Standard Chrome options - USE CONFIG
+    if Config.NO_SANDBOX:
+        options.add_argument('--no-sandbox')
+    if Config.DISABLE_DEV_SHM_USAGE:
+        options.add_argument('--disable-dev-shm-usage')
+
+    options.add_argument('--disable-gpu')
+    options.add_argument('--window-size=1920,1080')
+    options.add_argument('--disable-web-security')
+    options.add_argument('--allow-running-insecure-content')
+    options.add_argument('--incognito')
+
+    # Use Config for driver path
+    service = Service(executable_path=Config.CHROMEDRIVER_PATH)
+    return webdriver.Chrome(service=service, options=options)
+
+
+driver_pool.register_factory(DRIVER_POOL_KEY, launch_chrome)
+# Logged-in sessions are kept when the provider is in SESSION_POOL_PROVIDERS
+session_pool.register_check(DRIVER_POOL_KEY, page_check(
+    urljoin(Config.EVOTEL_URL, "/Manage/Index"),
+    logged_in=(By.CSS_SELECTOR, "#SearchString"),
+    logged_out=(By.CSS_SELECTOR, "#Email"),
+))
+
+
 class BrowserService:
     """Service for managing browser instances"""
     
     def __init__(self, config: Config):
         self.config = config
         self.driver: Optional[webdriver.Chrome] = None
+        # Set when the driver is logged in to the portal, so cleanup keeps the session
+        self.session_reused = False
+        self.logged_in = False
         self.logger = logging.getLogger(self.__class__.__name__)
     
     def create_driver(self, job_id: str) -> webdriver.Chrome:
         """Create Chrome driver - USING CONFIG ONLY"""
-        options = ChromeOptions()
-
-        # USE CONFIG INSTEAD OF os.getenv()
-        if Config.HEADLESS:
-            options.add_argument('--headless=new')
-            logger.info("Running Chrome in HEADLESS mode")
-        else:
-            logger.info("Running Chrome in VISIBLE mode")
-
-        # Standard Chrome options - USE CONFIG
-        if Config.NO_SANDBOX:
-            options.add_argument('--no-sandbox')
-        if Config.DISABLE_DEV_SHM_USAGE:
-            options.add_argument('--disable-dev-shm-usage')
-
-        options.add_argument('--disable-gpu')
-        options.add_argument('--window-size=1920,1080')
-        options.add_argument('--disable-web-security')
-        options.add_argument('--allow-running-insecure-content')
-        options.add_argument('--incognito')
-
-        # Use Config for driver path
-        service = Service(executable_path=Config.CHROMEDRIVER_PATH)
-        self.driver = webdriver.Chrome(service=service, options=options)
+        # A session still logged in from an earlier job, if one is kept
+        self.driver = session_pool.checkout(DRIVER_POOL_KEY, Config.EVOTEL_EMAIL)
+        self.session_reused = self.logged_in = self.driver is not None
+        if self.driver is None:
+            self.driver = driver_pool.acquire(DRIVER_POOL_KEY)
 
         if Config.START_MAXIMIZED and not Config.HEADLESS:
             self.driver.maximize_window()
@@ -490,7 +518,7 @@ class BrowserService:
         """Clean up browser resources"""
         if self.driver:
             try:
-                self.driver.quit()
+                session_pool.release(DRIVER_POOL_KEY, Config.EVOTEL_EMAIL, self.driver, self.logged_in)
                 self.logger.info("Browser cleaned up successfully")
             except Exception as e:
                 self.logger.error(f"Error during driver cleanup: {str(e)}")
@@ -1172,8 +1200,12 @@ class EvotelCancellationAutomation:
             
             # STEP 1: Login
             self.logger.info("STEP 1: Performing login to Evotel portal")
-            login_page = EvotelLoginPage(self.driver)
-            login_page.login()
+            if self.browser_service.session_reused:
+                self.logger.info("Reusing logged-in Evotel session")
+            else:
+                login_page = EvotelLoginPage(self.driver)
+                login_page.login()
+                self.browser_service.logged_in = True
             self.screenshot_service.take_screenshot(self.driver, "cancellation_after_login")
             
             # STEP 2: Search for service
@@ -15,6 +15,7 @@ import base64
 import re
 from datetime import datetime
 from pathlib import Path
+from urllib.parse import urljoin
 from typing import Optional, List, Dict, Any
 from enum import Enum
 
@@ -36,6 +37,9 @@ from pydantic import BaseModel, Field
 
 # Import configuration
 from config import Config
+from driver_pool import driver_pool
+from session_pool import page_check, session_pool
+from process_governor import process_governor
 
 # Configure logging
 logging.basicConfig(
@@ -477,52 +481,77 @@ class RobustInputHandler:
 
 # ==================== BROWSER SERVICE ====================
 
+# Drivers are pooled when "evotel" is in DRIVER_POOL_PROVIDERS
+DRIVER_POOL_KEY = "evotel.validation"
+
+
+def launch_chrome() -> webdriver.Chrome:
+    """Start Chrome with the options this automation needs; also used by the driver pool"""
+    options = ChromeOptions()
+
+    # Use the same options that worked in debug
+    headless_env = os.getenv("HEADLESS", "true").lower()
+    should_be_headless = headless_env != "false"
+
+    if should_be_headless:
+        options.add_argument('--headless=new')
+        logger.info("Running Chrome in HEADLESS mode")
+    else:
+        logger.info("Running Chrome in VISIBLE mode")
+
+    # PROVEN STABLE OPTIONS (from debug script)
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--window-size=1920,1080')
+    options.add_argument('--start-maximized')
+
+    # CRASH PREVENTION
+    options.add_argument('--disable-crash-reporter')
+    options.add_argument('--disable-logging')
+    options.add_argument('--log-level=3')
+
+    # STABILITY IMPROVEMENTS
+    options.add_argument('--disable-background-timer-throttling')
+    options.add_argument('--disable-backgrounding-occluded-windows')
+    options.add_argument('--disable-renderer-backgrounding')
+    options.add_argument('--disable-features=TranslateUI')
+    options.add_argument('--disable-extensions')
+
+    service = Service(executable_path=Config.CHROMEDRIVER_PATH)
+    return webdriver.Chrome(service=service, options=options)
+
+
+driver_pool.register_factory(DRIVER_POOL_KEY, launch_chrome)
+# Logged-in sessions are kept when the provider is in SESSION_POOL_PROVIDERS
+session_pool.register_check(DRIVER_POOL_KEY, page_check(
+    urljoin(Config.EVOTEL_URL, "/Manage/Index"),
+    logged_in=(By.CSS_SELECTOR, "#SearchString"),
+    logged_out=(By.CSS_SELECTOR, "#Email"),
+))
+
+
 class BrowserService:
     """Browser service with local chromedriver"""
     
     def __init__(self):
         self.driver: Optional[webdriver.Chrome] = None
+        # Set when the driver is logged in to the portal, so cleanup keeps the session
+        self.session_reused = False
+        self.logged_in = False
     
     def create_driver(self, job_id: str) -> webdriver.Chrome:
         """Create Chrome driver with debug-proven stable options"""
-        options = ChromeOptions()
-    
-        # Use the same options that worked in debug
-        headless_env = os.getenv("HEADLESS", "true").lower()
-        should_be_headless = headless_env != "false"
-    
-        if should_be_headless:
-            options.add_argument('--headless=new')
-            logger.info("Running Chrome in HEADLESS mode")
-        else:
-            logger.info("Running Chrome in VISIBLE mode")
-    
-        # PROVEN STABLE OPTIONS (from debug script)
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--window-size=1920,1080')
-        options.add_argument('--start-maximized')
-    
-        # CRASH PREVENTION
-        options.add_argument('--disable-crash-reporter')
-        options.add_argument('--disable-logging')
-        options.add_argument('--log-level=3')
-    
-        # STABILITY IMPROVEMENTS
-        options.add_argument('--disable-background-timer-throttling')
-        options.add_argument('--disable-backgrounding-occluded-windows')
-        options.add_argument('--disable-renderer-backgrounding')
-        options.add_argument('--disable-features=TranslateUI')
-        options.add_argument('--disable-extensions')
-    
-        service = Service(executable_path=Config.CHROMEDRIVER_PATH)
-        self.driver = webdriver.Chrome(service=service, options=options)
+        # A session still logged in from an earlier job, if one is kept
+        self.driver = session_pool.checkout(DRIVER_POOL_KEY, Config.EVOTEL_EMAIL)
+        self.session_reused = self.logged_in = self.driver is not None
+        if self.driver is None:
+            self.driver = driver_pool.acquire(DRIVER_POOL_KEY)
     
         # CONSERVATIVE TIMEOUTS (matching debug script)
         self.driver.set_page_load_timeout(30)
         self.driver.implicitly_wait(5)
     
-        if not should_be_headless:
+        if os.getenv("HEADLESS", "true").lower() == "false":
             self.driver.maximize_window()
         
         logger.info("Browser setup complete with debug-proven options")
@@ -533,27 +562,14 @@ class BrowserService:
         if self.driver:
             try:
                 # First try graceful shutdown
-                self.driver.quit()
+                session_pool.release(DRIVER_POOL_KEY, Config.EVOTEL_EMAIL, self.driver, self.logged_in)
                 logger.info("Browser cleaned up successfully")
             except Exception as e:
                 logger.warning(f"Graceful browser cleanup failed: {str(e)}")
                 
-                # Force cleanup if graceful fails
+                # Force cleanup if graceful fails: this driver's processes only, not other jobs' browsers
                 try:
-                    import psutil
-                    import os
-                    
-                    # Kill any remaining Chrome processes
-                    for proc in psutil.process_iter(['pid', 'name']):
-                        if 'chrome' in proc.info['name'].lower():
-                            try:
-                                proc.kill()
-                                logger.info(f"Force killed Chrome process: {proc.info['pid']}")
-                            except:
-                                pass
-                                
-                except ImportError:
-                    logger.warning("psutil not available for force cleanup")
+                    process_governor.kill_driver(self.driver)
                 except Exception as cleanup_error:
                     logger.error(f"Force cleanup failed: {str(cleanup_error)}")
                     
@@ -1500,12 +1516,16 @@ class EvotelValidationAutomation:
             self._setup_services(request.job_id)
             self.take_screenshot("initial_state")
             
-            # Login
-            login_handler = EvotelLogin()
-            login_success = login_handler.login(self.driver)
-            
-            if not login_success:
-                raise Exception("Login failed")
+            # Login, unless a kept session is still logged in
+            if self.browser_service.session_reused:
+                self.logger.info("Reusing logged-in Evotel session")
+            else:
+                login_handler = EvotelLogin()
+                login_success = login_handler.login(self.driver)
+                
+                if not login_success:
+                    raise Exception("Login failed")
+                self.browser_service.logged_in = True
             
             self.take_screenshot("after_login")
             
@@ -39,10 +39,64 @@ from tenacity import (
 )
 
 from config import Config
+from driver_pool import driver_pool
+from session_pool import page_check, session_pool
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Drivers are pooled when "mfn" is in DRIVER_POOL_PROVIDERS; cancellation uses the same browser
+DRIVER_POOL_KEY = "mfn"
+
+
+def launch_chrome():
+    """Start Chrome with the Cloudflare bypass options; also used by the driver pool"""
+    chrome_options = Options()
+    
+    # Basic Chrome options from Config
+    if Config.START_MAXIMIZED:
+        chrome_options.add_argument("--start-maximized")
+    if Config.NO_SANDBOX:
+        chrome_options.add_argument("--no-sandbox")
+    if Config.DISABLE_DEV_SHM_USAGE:
+        chrome_options.add_argument("--disable-dev-shm-usage")
+    
+    # CLOUDFLARE BYPASS - CRITICAL ADDITIONS
+    chrome_options.add_argument("--user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+    
+    # Additional stealth options
+    chrome_options.add_argument("--disable-extensions")
+    chrome_options.add_argument("--disable-plugins")
+    chrome_options.add_argument("--window-size=1920,1080")
+    
+    # Handle headless mode
+    if Config.HEADLESS:
+        logger.info("Running in headless mode")
+        chrome_options.add_argument("--headless=new")
+    else:
+        logger.info("Running in visible mode")
+    
+    # Use Config for driver path
+    driver_path = Config.CHROMEDRIVER_PATH
+    logger.info(f"Using ChromeDriver path: {driver_path}")
+    
+    from selenium.webdriver.chrome.service import Service
+    service = Service(executable_path=driver_path)
+    return webdriver.Chrome(service=service, options=chrome_options)
+
+
+driver_pool.register_factory(DRIVER_POOL_KEY, launch_chrome)
+# Logged-in sessions are kept when "mfn" is in SESSION_POOL_PROVIDERS
+session_pool.register_check(DRIVER_POOL_KEY, page_check(
+    Config.METROFIBER_URL,
+    logged_in=(By.XPATH, "//a[@href='customers.php']"),
+    logged_out=(By.ID, "username"),
+))
+
+
 class MetroFiberAutomation:
     """Class to handle MetroFiber portal automation"""
     
@@ -50,6 +104,9 @@ class MetroFiberAutomation:
         """Initialize the automation with job tracking"""
         self.job_id = job_id
         self.driver = None
+        # Set when the driver is logged in to the portal, so cleanup keeps the session
+        self.session_reused = False
+        self.logged_in = False
         self.service_location = None  # Track where we found the service
         
         # Use job-specific screenshot directory from centralized config
@@ -138,44 +195,14 @@ class MetroFiberAutomation:
         """Initialize Chrome driver with Cloudflare bypass optimizations"""
         try:
             if self.driver:
-                self.driver.quit()
+                session_pool.release(DRIVER_POOL_KEY, self.email, self.driver, self.logged_in)
                 
             import platform
-            chrome_options = Options()
-            
-            # Basic Chrome options from Config
-            if Config.START_MAXIMIZED:
-                chrome_options.add_argument("--start-maximized")
-            if Config.NO_SANDBOX:
-                chrome_options.add_argument("--no-sandbox")
-            if Config.DISABLE_DEV_SHM_USAGE:
-                chrome_options.add_argument("--disable-dev-shm-usage")
-            
-            # CLOUDFLARE BYPASS - CRITICAL ADDITIONS
-            chrome_options.add_argument("--user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-            chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-            chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            chrome_options.add_experimental_option('useAutomationExtension', False)
-            
-            # Additional stealth options
-            chrome_options.add_argument("--disable-extensions")
-            chrome_options.add_argument("--disable-plugins")
-            chrome_options.add_argument("--window-size=1920,1080")
-            
-            # Handle headless mode
-            if Config.HEADLESS:
-                logger.info("Running in headless mode")
-                chrome_options.add_argument("--headless=new")
-            else:
-                logger.info("Running in visible mode")
-            
-            # Use Config for driver path
-            driver_path = Config.CHROMEDRIVER_PATH
-            logger.info(f"Using ChromeDriver path: {driver_path}")
-            
-            from selenium.webdriver.chrome.service import Service
-            service = Service(executable_path=driver_path)
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
+            # A session still logged in from an earlier job, if one is kept
+            self.driver = session_pool.checkout(DRIVER_POOL_KEY, self.email)
+            self.session_reused = self.logged_in = self.driver is not None
+            if self.driver is None:
+                self.driver = driver_pool.acquire(DRIVER_POOL_KEY)
             
             # CRITICAL: Remove webdriver property that Cloudflare detects
             self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
@@ -192,10 +219,7 @@ class MetroFiberAutomation:
             logger.error(f"Job {self.job_id}: Failed to initialize WebDriver: {str(e)}")
             logger.error(f"Driver path attempted: {Config.CHROMEDRIVER_PATH}")
             if self.driver:
-                try:
-                    self.driver.quit()
-                except:
-                    pass
+                session_pool.discard(DRIVER_POOL_KEY, self.driver)
                 self.driver = None
             return False
     @retry(
@@ -206,6 +230,10 @@ class MetroFiberAutomation:
     )
     def login(self):
         """Login to MetroFiber portal with retry capability"""
+        if self.session_reused:
+            logger.info(f"Job {self.job_id}: Reusing logged-in MetroFiber session")
+            return True
+        
         self.driver.get(self.portal_url)
         logger.info(f"Job {self.job_id}: Navigated to MetroFiber portal")
         
@@ -231,6 +259,7 @@ class MetroFiberAutomation:
         # Verify successful login by checking for an element that exists post-login
         wait.until(EC.presence_of_element_located((By.XPATH, "//a[@href='customers.php']")))
         logger.info(f"Job {self.job_id}: Successfully logged in to MetroFiber portal")
+        self.logged_in = True
         
         # Take screenshot after login
         self.take_screenshot("post_login")
@@ -1029,7 +1058,7 @@ class MetroFiberAutomation:
         # Close WebDriver if it exists
         if self.driver:
             try:
-                self.driver.quit()
+                session_pool.release(DRIVER_POOL_KEY, self.email, self.driver, self.logged_in)
                 logger.info(f"Job {self.job_id}: Browser closed")
             except Exception as e:
                 logger.error(f"Job {self.job_id}: Error closing browser: {str(e)}")
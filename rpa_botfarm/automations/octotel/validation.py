@@ -35,6 +35,8 @@ from pydantic import BaseModel, Field
 
 # Import configuration
 from config import Config
+from driver_pool import driver_pool
+from session_pool import page_check, session_pool
 
 # Configure logging
 logging.basicConfig(
@@ -188,38 +190,63 @@ class RobustInputHandler:
 
 # ==================== BROWSER SERVICE ====================
 
+# Drivers are pooled when "octotel" is in DRIVER_POOL_PROVIDERS
+DRIVER_POOL_KEY = "octotel.validation"
+
+
+def launch_chrome() -> webdriver.Chrome:
+    """Start Chrome with the options this automation needs; also used by the driver pool"""
+    options = ChromeOptions()
+    
+    # USE CONFIG INSTEAD OF os.getenv()
+    if Config.HEADLESS:
+        options.add_argument('--headless=new')
+        logger.info("Running Chrome in HEADLESS mode")
+    else:
+        logger.info("Running Chrome in VISIBLE mode")
+    
+    # Standard Chrome options - USE CONFIG
+    if Config.NO_SANDBOX:
+        options.add_argument('--no-sandbox')
+    if Config.DISABLE_DEV_SHM_USAGE:
+        options.add_argument('--disable-dev-shm-usage')
+    
+    options.add_argument('--disable-gpu')
+    options.add_argument('--window-size=1920,1080')
+    options.add_argument('--disable-web-security')
+    options.add_argument('--allow-running-insecure-content')
+    options.add_argument('--incognito')
+    
+    # Use Config for driver path
+    service = Service(executable_path=Config.CHROMEDRIVER_PATH)
+    return webdriver.Chrome(service=service, options=options)
+
+
+driver_pool.register_factory(DRIVER_POOL_KEY, launch_chrome)
+# Logged-in sessions are kept when the provider is in SESSION_POOL_PROVIDERS
+session_pool.register_check(DRIVER_POOL_KEY, page_check(
+    Config.OCTOTEL_URL,
+    logged_in=(By.XPATH, "//a[contains(text(), 'Services')]"),
+    logged_out=(By.XPATH, "//a[contains(text(), 'Login')] | //input[@type='password']"),
+))
+
+
 class BrowserService:
     """Browser service with local chromedriver"""
     
     def __init__(self):
         self.driver: Optional[webdriver.Chrome] = None
+        # Set when the driver is logged in to the portal, so cleanup keeps the session
+        self.session_reused = False
+        self.logged_in = False
     
     def create_driver(self, job_id: str) -> webdriver.Chrome:
         """Create Chrome driver - USING CONFIG ONLY"""
-        options = ChromeOptions()
-        
-        # USE CONFIG INSTEAD OF os.getenv()
-        if Config.HEADLESS:
-            options.add_argument('--headless=new')
-            logger.info("Running Chrome in HEADLESS mode")
-        else:
-            logger.info("Running Chrome in VISIBLE mode")
-        
-        # Standard Chrome options - USE CONFIG
-        if Config.NO_SANDBOX:
-            options.add_argument('--no-sandbox')
-        if Config.DISABLE_DEV_SHM_USAGE:
-            options.add_argument('--disable-dev-shm-usage')
-        
-        options.add_argument('--disable-gpu')
-        options.add_argument('--window-size=1920,1080')
-        options.add_argument('--disable-web-security')
-        options.add_argument('--allow-running-insecure-content')
-        options.add_argument('--incognito')
-        
-        # Use Config for driver path
-        service = Service(executable_path=Config.CHROMEDRIVER_PATH)
-        self.driver = webdriver.Chrome(service=service, options=options)
+        # A session still logged in from an earlier job, if one is kept
+        self.driver = session_pool.checkout(DRIVER_POOL_KEY, Config.OCTOTEL_USERNAME)
+        self.session_reused = self.logged_in = self.driver is not None
+        if self.driver is None:
+            self.driver = driver_pool.acquire(DRIVER_POOL_KEY)
         
         if Config.START_MAXIMIZED and not Config.HEADLESS:
             self.driver.maximize_window()
@@ -234,7 +261,7 @@ class BrowserService:
         """Clean up browser resources"""
         if self.driver:
             try:
-                self.driver.quit()
+                session_pool.release(DRIVER_POOL_KEY, Config.OCTOTEL_USERNAME, self.driver, self.logged_in)
                 logger.info("Browser closed")
             except Exception as e:
                 logger.error(f"Error during cleanup: {str(e)}")
@@ -1605,12 +1632,16 @@ class OctotelValidationAutomation:
             self._setup_services(request.job_id)
             self.take_screenshot("initial_state")
             
-            # Login
-            login_handler = OctotelTOTPLogin()
-            login_success = login_handler.login(self.driver)
-            
-            if not login_success:
-                raise Exception("Login failed")
+            # Login, unless a kept session is still logged in
+            if self.browser_service.session_reused:
+                logger.info("Reusing logged-in Octotel session")
+            else:
+                login_handler = OctotelTOTPLogin()
+                login_success = login_handler.login(self.driver)
+                
+                if not login_success:
+                    raise Exception("Login failed")
+                self.browser_service.logged_in = True
             
             self.take_screenshot("after_login")
             
@@ -33,6 +33,8 @@ from pydantic import BaseModel, Field
 
 # Import configuration
 from config import Config
+from driver_pool import driver_pool
+from session_pool import page_check, session_pool
 
 # Configure logging
 logging.basicConfig(
@@ -185,6 +187,56 @@ def robust_send_keys(driver: webdriver.Chrome, element, value: str, description:
     
     return False
 
+# Drivers are pooled when "osn" is in DRIVER_POOL_PROVIDERS
+DRIVER_POOL_KEY = "osn.validation"
+
+
+def launch_chrome() -> webdriver.Chrome:
+    """Start Chrome with the options this automation needs; also used by the driver pool"""
+    # Container-optimized Chrome options
+    options = ChromeOptions()
+    
+    # Essential container options
+    if Config.HEADLESS:
+        options.add_argument('--headless=new')
+    if Config.NO_SANDBOX:
+        options.add_argument('--no-sandbox')
+    if Config.DISABLE_DEV_SHM_USAGE:
+        options.add_argument('--disable-dev-shm-usage')
+    
+    # Additional container stability options
+    options.add_argument('--disable-gpu')
+    options.add_argument('--disable-dev-tools')
+    options.add_argument('--disable-extensions')
+    options.add_argument('--disable-plugins')
+    options.add_argument('--disable-images')
+    options.add_argument('--disable-javascript-harmony-shipping')
+    options.add_argument('--disable-background-timer-throttling')
+    options.add_argument('--disable-backgrounding-occluded-windows')
+    options.add_argument('--disable-renderer-backgrounding')
+    options.add_argument('--disable-features=TranslateUI')
+    options.add_argument('--window-size=1920,1080')
+    # Pooled drivers run side by side and cannot share a fixed DevTools port
+    pooled = driver_pool.enabled_for(DRIVER_POOL_KEY) or session_pool.enabled_for(DRIVER_POOL_KEY)
+    options.add_argument('--remote-debugging-port=0' if pooled else '--remote-debugging-port=9222')
+    
+    # Memory and performance optimizations for containers
+    options.add_argument('--memory-pressure-off')
+    options.add_argument('--max_old_space_size=4096')
+    
+    # Create service and driver
+    service = Service(executable_path=Config.CHROMEDRIVER_PATH)
+    return webdriver.Chrome(service=service, options=options)
+
+
+driver_pool.register_factory(DRIVER_POOL_KEY, launch_chrome)
+# Logged-in sessions are kept when "osn" is in SESSION_POOL_PROVIDERS
+session_pool.register_check(DRIVER_POOL_KEY, page_check(
+    "https://partners.openserve.co.za/",
+    logged_in=(By.ID, "navOrders"),
+    logged_out=(By.ID, "email"),
+))
+
 # ==================== MAIN AUTOMATION CLASS ====================
 
 class OSNValidationAutomation:
@@ -194,6 +246,9 @@ class OSNValidationAutomation:
         self.config = Config
         self.logger = logging.getLogger(self.__class__.__name__)
         self.driver: Optional[webdriver.Chrome] = None
+        # Set when the driver is logged in to the portal, so cleanup keeps the session
+        self.session_reused = False
+        self.logged_in = False
         self.screenshots: List[ScreenshotData] = []
         self.screenshot_dir: Optional[Path] = None
         self.execution_summary_path: Optional[Path] = None
@@ -204,38 +259,11 @@ class OSNValidationAutomation:
         self.screenshot_dir.mkdir(parents=True, exist_ok=True)
         self.execution_summary_path = Config.get_execution_summary_path(job_id)
         
-        # Container-optimized Chrome options
-        options = ChromeOptions()
-        
-        # Essential container options
-        if Config.HEADLESS:
-            options.add_argument('--headless=new')
-        if Config.NO_SANDBOX:
-            options.add_argument('--no-sandbox')
-        if Config.DISABLE_DEV_SHM_USAGE:
-            options.add_argument('--disable-dev-shm-usage')
-        
-        # Additional container stability options
-        options.add_argument('--disable-gpu')
-        options.add_argument('--disable-dev-tools')
-        options.add_argument('--disable-extensions')
-        options.add_argument('--disable-plugins')
-        options.add_argument('--disable-images')
-        options.add_argument('--disable-javascript-harmony-shipping')
-        options.add_argument('--disable-background-timer-throttling')
-        options.add_argument('--disable-backgrounding-occluded-windows')
-        options.add_argument('--disable-renderer-backgrounding')
-        options.add_argument('--disable-features=TranslateUI')
-        options.add_argument('--window-size=1920,1080')
-        options.add_argument('--remote-debugging-port=9222')
-        
-        # Memory and performance optimizations for containers
-        options.add_argument('--memory-pressure-off')
-        options.add_argument('--max_old_space_size=4096')
-        
-        # Create service and driver
-        service = Service(executable_path=Config.CHROMEDRIVER_PATH)
-        self.driver = webdriver.Chrome(service=service, options=options)
+        # A session still logged in from an earlier job, if one is kept
+        self.driver = session_pool.checkout(DRIVER_POOL_KEY, Config.OSEMAIL)
+        self.session_reused = self.logged_in = self.driver is not None
+        if self.driver is None:
+            self.driver = driver_pool.acquire(DRIVER_POOL_KEY)
         
         # Set container-friendly timeouts
         self.driver.set_page_load_timeout(Config.OSN_PAGE_LOAD_TIMEOUT)
@@ -247,7 +275,7 @@ class OSNValidationAutomation:
         """Cleanup browser resources"""
         if self.driver:
             try:
-                self.driver.quit()
+                session_pool.release(DRIVER_POOL_KEY, Config.OSEMAIL, self.driver, self.logged_in)
                 logger.info("Browser cleaned up successfully")
             except Exception as e:
                 logger.error(f"Browser cleanup error: {str(e)}")
@@ -762,8 +790,12 @@ class OSNValidationAutomation:
             self._setup_browser(request.job_id)
             self._take_screenshot("initial_state")
             
-            # Login
-            self._login()
+            # Login, unless a kept session is still logged in
+            if self.session_reused:
+                logger.info("Reusing logged-in OSN session")
+            else:
+                self._login()
+                self.logged_in = True
             self._take_screenshot("after_login")
             
             # Navigate to orders
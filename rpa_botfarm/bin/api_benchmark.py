@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+API Response Benchmark
+----------------------
+Measures requests/sec, latency and peak Python memory of the job listing and
+detail endpoints, GET /jobs?limit=1000 in particular, on a synthetic dataset
+(the same generator as bin/db_benchmark.py).
+
+Requests go through the ASGI app in-process with a single client, so the
+figures cover routing, database reads and serialization but not the network
+or uvicorn. Run it on two checkouts to compare serialization paths; results
+are JSON so they can be stored per release.
+
+Usage:
+    python bin/api_benchmark.py
+    python bin/api_benchmark.py --jobs 20000 --requests 50 --output api_bench.json
+    python bin/api_benchmark.py --compare api_bench_before.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+BIN_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BIN_DIR.parent))
+sys.path.insert(0, str(BIN_DIR))
+
+# (name, path) pairs; {job_id} is replaced with a finished job's ID
+ENDPOINTS = [
+    ("list_1000_full", "/jobs?limit=1000"),
+    ("list_1000_summary", "/jobs?limit=1000&view=summary"),
+    ("list_1000_ndjson", "/jobs?limit=1000&format=ndjson"),
+    ("job_detail", "/jobs/{job_id}"),
+]
+
+
+def measure(client, path, requests):
+    """Time sequential requests, then measure one more under tracemalloc."""
+    client.get(path)  # warm up
+    samples = []
+    size = 0
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = client.get(path)
+        samples.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {path} returned {response.status_code}")
+        size = len(response.content)
+
+    tracemalloc.start()
+    client.get(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    samples.sort()
+    return {
+        "requests": requests,
+        "requests_per_sec": round(1000 / statistics.mean(samples), 1),
+        "median_ms": round(statistics.median(samples), 2),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 2),
+        "peak_memory_kb": round(peak / 1024),
+        "response_bytes": size,
+    }
+
+
+def compare(report, baseline_path):
+    """Print throughput and memory changes against a baseline report."""
+    baseline = json.loads(Path(baseline_path).read_text())
+    for name, stats in report["results"].items():
+        base = baseline["results"].get(name)
+        if not base:
+            print(f"{name:20s} no baseline")
+            continue
+        print(
+            f"{name:20s} {base['requests_per_sec']:8.1f} -> {stats['requests_per_sec']:8.1f} req/s"
+            f"  x{stats['requests_per_sec'] / base['requests_per_sec']:5.2f}"
+            f"   peak {base['peak_memory_kb']:7d} -> {stats['peak_memory_kb']:7d} KB"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark job listing and detail responses")
+    parser.add_argument("--jobs", type=int, default=10000, help="Number of synthetic jobs")
+    parser.add_argument("--requests", type=int, default=30, help="Timed requests per endpoint")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for data generation")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--compare", help="Baseline JSON report to compare against")
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix="api_bench_")
+    try:
+        return run(args, data_dir)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def run(args, data_dir):
+    """Generate the dataset in data_dir and measure every endpoint."""
+    # Point the orchestrator modules at the scratch directory before importing them
+    os.environ["BASE_DATA_DIR"] = data_dir
+    os.environ["ORCHESTRATOR_MODE"] = "api"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.pop("DATABASE_URL", None)
+
+    import db  # noqa: E402
+    import screenshot_store  # noqa: E402
+    from config import Config  # noqa: E402
+    from db_benchmark import environment_info, generate_dataset, seed_screenshot_store  # noqa: E402
+
+    Config.setup_directories()
+    if not db.init_db():
+        print("Database initialization failed", file=sys.stderr)
+        return 1
+
+    print(f"Generating {args.jobs:,} jobs in {data_dir}", file=sys.stderr)
+    generate_dataset(db, args.jobs, args.seed, seed_screenshot_store(screenshot_store))
+    job_id = db.list_jobs(status="completed", limit=1, fields=["id"])[0]["id"]
+
+    import orchestrator  # noqa: E402
+    from fastapi.testclient import TestClient  # noqa: E402
+
+    # No context manager: the app's startup (status snapshot, event relay) is not needed
+    client = TestClient(orchestrator.app)
+    report = {"environment": environment_info(), "jobs": args.jobs, "results": {}}
+    for name, path in ENDPOINTS:
+        print(f"Measuring {name}", file=sys.stderr)
+        report["results"][name] = measure(client, path.format(job_id=job_id), args.requests)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"Report written to {args.output}", file=sys.stderr)
+    if args.compare:
+        compare(report, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+API Key Management
+------------------
+Issues, lists and revokes API keys for service-to-service callers. Callers
+send the key in the X-API-Key header; only its HMAC-SHA256 digest (keyed with
+API_KEY_SECRET) is stored, so a key is shown once, when it is created.
+
+Run with the same environment (DATABASE_URL, API_KEY_SECRET) as the
+orchestrator.
+
+Usage:
+    python bin/api_keys.py create billing-service
+    python bin/api_keys.py list
+    python bin/api_keys.py revoke 3
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import auth  # noqa: E402
+import db  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage API keys for service callers")
+    commands = parser.add_subparsers(dest="command", required=True)
+    create = commands.add_parser("create", help="Issue a new key")
+    create.add_argument("name", help="Service the key is for")
+    commands.add_parser("list", help="List keys")
+    revoke = commands.add_parser("revoke", help="Disable a key")
+    revoke.add_argument("id", type=int, help="Key ID from 'list'")
+    args = parser.parse_args()
+
+    if not db.init_db():
+        print("Database initialization failed", file=sys.stderr)
+        return 1
+
+    if args.command == "create":
+        api_key, record = auth.generate_api_key(args.name)
+        print(f"Created API key {record['id']} for {record['name']}:")
+        print(api_key)
+        print("Store it now; it cannot be shown again.", file=sys.stderr)
+    elif args.command == "list":
+        for record in db.list_api_keys():
+            state = "disabled" if record["disabled"] else "active"
+            print(f"{record['id']:5d}  {record['key_prefix']}...  {state:8s}  {record['created_at']}  {record['name']}")
+    elif args.command == "revoke":
+        if not auth.revoke_api_key(args.id):
+            print(f"API key {args.id} not found", file=sys.stderr)
+            return 1
+        print(f"Revoked API key {args.id}; running orchestrators stop accepting it within AUTH_CACHE_TTL seconds")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
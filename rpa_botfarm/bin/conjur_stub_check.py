@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Conjur Client Check
+-------------------
+Exercises conjur_client against a local stub of the Conjur API: batched
+retrieval through /secrets?variable_ids=, the per-variable fallback when a
+batch contains a missing variable, refresh-ahead caching, re-authentication
+after a revoked token and concurrent callers on a cold cache.
+
+The stub listens on 127.0.0.1 and needs no real Conjur server or secrets.
+
+Usage:
+    python bin/conjur_stub_check.py
+    python bin/conjur_stub_check.py --latency 0.2 --threads 32
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import conjur_client  # noqa: E402
+
+ACCOUNT = "stubAccount"
+
+
+class StubConjur:
+    """In-memory Conjur with request counters."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.secrets = {}
+        self.tokens = set()
+        self.requests = Counter()
+        self.lock = threading.Lock()
+
+    def count(self, kind: str):
+        with self.lock:
+            self.requests[kind] += 1
+
+    def handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def reply(self, status, body, content_type="text/plain"):
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def authorized(self):
+                header = self.headers.get("Authorization", "")
+                return header.startswith('Token token="') and header[13:-1] in stub.tokens
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                if not self.path.startswith(f"/authn/{ACCOUNT}/"):
+                    return self.reply(404, "not found")
+                stub.count("authenticate")
+                token = f"token-{time.monotonic_ns()}"
+                with stub.lock:
+                    stub.tokens.add(token)
+                self.reply(200, token)
+
+            def do_GET(self):
+                time.sleep(stub.latency)
+                url = urllib.parse.urlsplit(self.path)
+                if not self.authorized():
+                    stub.count("unauthorized")
+                    return self.reply(401, "unauthorized")
+
+                if url.path == "/secrets":
+                    stub.count("batch")
+                    raw_ids = urllib.parse.parse_qs(url.query)["variable_ids"][0].split(",")
+                    ids = [urllib.parse.unquote(variable_id) for variable_id in raw_ids]
+                    prefix = f"{ACCOUNT}:variable:"
+                    if any(variable_id[len(prefix):] not in stub.secrets for variable_id in ids):
+                        return self.reply(404, "variable not found")
+                    values = {variable_id: stub.secrets[variable_id[len(prefix):]] for variable_id in ids}
+                    return self.reply(200, json.dumps(values), "application/json")
+
+                variable_prefix = f"/secrets/{ACCOUNT}/variable/"
+                if url.path.startswith(variable_prefix):
+                    stub.count("single")
+                    path = urllib.parse.unquote(url.path[len(variable_prefix):])
+                    if path not in stub.secrets:
+                        return self.reply(404, "variable not found")
+                    return self.reply(200, stub.secrets[path])
+
+                self.reply(404, "not found")
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check conjur_client against a local Conjur stub")
+    parser.add_argument("--latency", type=float, default=0.1, help="Seconds the stub takes per secret request")
+    parser.add_argument("--threads", type=int, default=16, help="Concurrent callers on a cold cache")
+    args = parser.parse_args()
+
+    stub = StubConjur(args.latency)
+    for provider in conjur_client.PROVIDER_SECRET_FIELDS:
+        for path in conjur_client.provider_secret_paths(provider):
+            stub.secrets[path] = f"value of {path}"
+    for name in ("jwt_secret", "admin_username", "admin_password"):
+        stub.secrets[f"BotApp/auth/{name}"] = f"value of {name}"
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), stub.handler())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def client(**kwargs):
+        return conjur_client.ConjurClient(conjur_url=url, account=ACCOUNT, host_id="host/stub", api_key="stub", **kwargs)
+
+    checks = {}
+
+    # Prefetch: every provider and auth secret in one batch request
+    conjur_client._conjur_client = client()
+    prefetched = conjur_client.prefetch_secrets()
+    checks["prefetch in one batch request"] = prefetched == len(stub.secrets) and stub.requests["batch"] == 1
+
+    before = sum(stub.requests.values())
+    octotel = conjur_client.get_provider_secrets("octotel")
+    checks["provider secrets served from cache"] = (
+        len(octotel) == 4 and sum(stub.requests.values()) == before
+    )
+
+    # Missing variable: the batch 404s, the rest are fetched one by one
+    stub.requests.clear()
+    fallback = client().get_secrets_batch(["BotApp/auth/jwt_secret", "BotApp/missing", "BotApp/auth/admin_username"])
+    checks["per-variable fallback on missing variable"] = (
+        set(fallback) == {"BotApp/auth/jwt_secret", "BotApp/auth/admin_username"}
+        and stub.requests["batch"] == 1 and stub.requests["single"] == 3
+    )
+
+    # Refresh-ahead: reads after the refresh point return at once and refresh in the background
+    refreshing = client(cache_duration=4, refresh_ahead=3)
+    path = "BotApp/providers/evotel/password"
+    refreshing.get_secret(path)
+    stub.secrets[path] = "rotated"
+    time.sleep(1.2)
+    stub.requests.clear()
+    start = time.perf_counter()
+    first = refreshing.get_secret(path)
+    read_seconds = time.perf_counter() - start
+    time.sleep(args.latency * 3 + 0.2)
+    checks["refresh-ahead serves cached value without waiting"] = (
+        first == f"value of {path}" and read_seconds < args.latency
+    )
+    checks["refresh-ahead fetched the new value"] = (
+        refreshing.get_secret(path) == "rotated" and stub.requests["batch"] == 1
+    )
+
+    # Revoked token: one 401, re-authenticate, retry
+    revoked = client()
+    revoked.get_secret("BotApp/auth/jwt_secret")
+    stub.tokens.clear()
+    stub.requests.clear()
+    checks["re-authenticates after revoked token"] = (
+        revoked.get_secret("BotApp/auth/admin_password", use_cache=False) == "value of admin_password"
+        and stub.requests["unauthorized"] == 1 and stub.requests["authenticate"] == 1
+    )
+
+    # Concurrent callers on a cold cache all get complete results
+    shared = client()
+    paths = conjur_client.provider_secret_paths("metrofiber")
+    results = []
+    errors = []
+
+    def caller():
+        try:
+            results.append(shared.get_secrets_batch(paths))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=caller) for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    checks["concurrent callers"] = not errors and all(len(result) == len(paths) for result in results)
+
+    server.shutdown()
+    for name, passed in checks.items():
+        print(f"  {'PASS' if passed else 'FAIL'}  {name}")
+    for error in errors:
+        print(f"  error: {error}")
+
+    return 0 if all(checks.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
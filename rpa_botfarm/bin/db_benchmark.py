@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+"""
+Database Layer Benchmark
+------------------------
+Times the db.py functions the orchestrator calls on every poll and API
+request against synthetic datasets of realistic shape: jobs spread over the
+four providers with parameters/results, a status history per job,
+screenshot metadata and a month of system metrics.
+
+Each scale runs in its own process with its own scratch data directory, so
+the benchmark never touches a real orchestrator database. Results are JSON
+so they can be stored per release and compared.
+
+Usage:
+    python bin/db_benchmark.py --scale 100k
+    python bin/db_benchmark.py --scale 100k --scale 1M --output bench_2.3.0.json
+    python bin/db_benchmark.py --scale 1M --data-dir /var/tmp/bench --keep   # reuse the dataset next run
+    python bin/db_benchmark.py --scale 100k --compare bench_2.2.0.json       # exit 1 on regressions
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BIN_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BIN_DIR.parent))
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1M": 1_000_000, "5M": 5_000_000}
+
+PROVIDERS = ["mfn", "osn", "octotel", "evotel"]
+
+# Final status mix of a long-running production queue
+STATUS_WEIGHTS = [
+    ("completed", 0.86),
+    ("failed", 0.06),
+    ("error", 0.03),
+    ("cancelled", 0.01),
+    ("pending", 0.02),
+    ("retry_pending", 0.01),
+    ("running", 0.01),
+]
+
+HISTORY_STEPS = {
+    "completed": ["created", "dispatching", "running", "completed"],
+    "failed": ["created", "dispatching", "running", "failed"],
+    "error": ["created", "dispatching", "running", "retry_pending", "running", "error"],
+    "cancelled": ["created", "cancelled"],
+    "pending": ["created"],
+    "retry_pending": ["created", "dispatching", "running", "retry_pending"],
+    "running": ["created", "dispatching", "running"],
+}
+
+OUTCOMES = ["Bitstream Validated", "Bitstream Not Found", "Bitstream Already Cancelled", "Bitstream Cancellation Pending"]
+
+BATCH_SIZE = 5000
+SCREENSHOT_RATIO = 0.2       # Share of finished jobs with screenshots
+SCREENSHOTS_PER_JOB = 3
+METRICS_DAYS = 30
+
+
+# ---------------------------------------------------------------------------
+# Data generation
+# ---------------------------------------------------------------------------
+
+def synthetic_result(rng, provider, circuit_number, status):
+    """A validation result of the size and shape the automations return."""
+    if status != "completed":
+        return {"status": "failure", "message": "Portal login failed after 3 attempts", "error_type": "TimeoutException"}
+    return {
+        "status": "success",
+        "message": f"Successfully validated circuit {circuit_number}",
+        "details": {
+            "found": True,
+            "service_found": True,
+            "is_active": rng.random() > 0.2,
+            "circuit_number": circuit_number,
+            "service_provider": provider.upper(),
+            "customer_name": f"Customer {rng.randint(1, 50000)}",
+            "service_address": f"{rng.randint(1, 999)} Main Road, Suburb {rng.randint(1, 300)}",
+            "speed_profile": rng.choice(["50/25", "100/50", "200/100", "1000/500"]),
+            "activation_date": f"20{rng.randint(18, 25)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "ont_serial": uuid.UUID(int=rng.getrandbits(128)).hex[:16].upper(),
+            "port_details": [{"port": i, "vlan": rng.randint(100, 4000), "status": "up"} for i in range(4)],
+            "raw_extraction": {f"field_{i}": f"value {rng.randint(0, 10 ** 6)}" for i in range(20)},
+        },
+        "evidence_dir": f"/opt/rpa/evidence/{provider}/{circuit_number}",
+        "execution_time": round(rng.uniform(20, 180), 2),
+    }
+
+
+def generate_dataset(db, job_count, seed, screenshot_hashes):
+    """Insert the synthetic dataset with bulk Core inserts."""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    statuses = [status for status, _ in STATUS_WEIGHTS]
+    weights = [weight for _, weight in STATUS_WEIGHTS]
+
+    jobs_table = db.JobQueue.__table__
+    history_table = db.JobHistory.__table__
+    screenshot_table = db.Screenshot.__table__
+    metrics_table = db.SystemMetrics.__table__
+
+    counts = {"jobs": 0, "history": 0, "screenshots": 0, "metrics": 0}
+
+    for batch_start in range(1, job_count + 1, BATCH_SIZE):
+        batch_ids = range(batch_start, min(batch_start + BATCH_SIZE, job_count + 1))
+        jobs, history, screenshots = [], [], []
+
+        for job_id in batch_ids:
+            provider = PROVIDERS[job_id % len(PROVIDERS)]
+            action = "validation" if rng.random() < 0.8 else "cancellation"
+            status = rng.choices(statuses, weights)[0]
+            circuit_number = f"FTTX{rng.randint(0, job_count // 3):07d}"
+            # Oldest jobs first so ids follow creation order, like production
+            created_at = now - timedelta(days=365) + timedelta(seconds=job_id * 365 * 86400 / job_count)
+            started_at = created_at + timedelta(seconds=rng.randint(5, 120)) if status != "pending" else None
+            finished = status in ("completed", "failed", "error", "cancelled")
+            completed_at = started_at + timedelta(seconds=rng.randint(20, 300)) if finished and started_at else None
+            locked = status == "running"
+
+            jobs.append({
+                "id": job_id,
+                "external_job_id": f"EXT{job_id:09d}",
+                "provider": provider,
+                "action": action,
+                "parameters": {"circuit_number": circuit_number, "external_job_id": f"EXT{job_id:09d}"},
+                "priority": rng.randint(0, 10),
+                "status": status,
+                "retry_count": 1 if status in ("error", "retry_pending") else 0,
+                "max_retries": 3,
+                "created_at": created_at,
+                "updated_at": completed_at or started_at or created_at,
+                "scheduled_for": now - timedelta(minutes=1) if status == "retry_pending" else None,
+                "started_at": started_at,
+                "completed_at": completed_at,
+                "result": synthetic_result(rng, provider, circuit_number, status) if finished else None,
+                "evidence": None,
+                "assigned_worker": "http://worker-1:8621/execute" if started_at else None,
+                # Half of the running jobs hold locks old enough for recover_stale_locks
+                "lock_id": str(uuid.UUID(int=rng.getrandbits(128))) if locked else None,
+                "locked_at": (now - timedelta(minutes=rng.choice([5, 90]))) if locked else None,
+                "circuit_number": circuit_number,
+                "solution_id": None,
+                "outcome": rng.choice(OUTCOMES) if status == "completed" else None,
+                "change_seq": job_id,
+            })
+
+            step_time = created_at
+            for step in HISTORY_STEPS[status]:
+                history.append({
+                    "job_id": job_id,
+                    "status": step,
+                    "timestamp": step_time,
+                    "details": f"Job status changed to {step}" if step != "created" else "Job created",
+                })
+                step_time += timedelta(seconds=rng.randint(1, 60))
+
+            if finished and rng.random() < SCREENSHOT_RATIO:
+                for index in range(SCREENSHOTS_PER_JOB):
+                    content_hash = rng.choice(screenshot_hashes)
+                    screenshots.append({
+                        "job_id": job_id,
+                        "name": f"step_{index}",
+                        "timestamp": started_at,
+                        "mime_type": "image/png",
+                        "description": None,
+                        "content_hash": content_hash,
+                        "size_bytes": 48_000,
+                        "image_data": None,
+                    })
+
+        with db.engine.begin() as conn:
+            conn.execute(jobs_table.insert(), jobs)
+            conn.execute(history_table.insert(), history)
+            if screenshots:
+                conn.execute(screenshot_table.insert(), screenshots)
+
+        counts["jobs"] += len(jobs)
+        counts["history"] += len(history)
+        counts["screenshots"] += len(screenshots)
+        print(f"  loaded {counts['jobs']:,}/{job_count:,} jobs", end="\r", file=sys.stderr)
+
+    print(file=sys.stderr)
+
+    metrics = []
+    for index in range(METRICS_DAYS * 24 * 12):  # one row per 5 minutes
+        metrics.append({
+            "timestamp": now - timedelta(minutes=5 * index),
+            "queued_jobs": rng.randint(0, 50),
+            "running_jobs": rng.randint(0, 8),
+            "completed_jobs": rng.randint(0, job_count),
+            "failed_jobs": rng.randint(0, job_count // 10),
+            "worker_status": {"http://worker-1:8621/execute": "online"},
+        })
+    with db.engine.begin() as conn:
+        conn.execute(metrics_table.insert(), metrics)
+    counts["metrics"] = len(metrics)
+
+    if db.backend.name == "sqlite":
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql("ANALYZE")
+
+    return counts
+
+
+def seed_screenshot_store(screenshot_store, count=20):
+    """Put a small set of distinct images in the store for screenshot rows to reference."""
+    rng = random.Random(7)
+    return [screenshot_store.put_bytes(bytes(rng.getrandbits(8) for _ in range(2048)))[0] for _ in range(count)]
+
+
+# ---------------------------------------------------------------------------
+# Timing
+# ---------------------------------------------------------------------------
+
+def time_call(func, iterations, setup=None):
+    """Run func iterations times and summarise the wall-clock latency in ms."""
+    samples = []
+    for _ in range(iterations):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        func(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "iterations": iterations,
+        "min_ms": round(samples[0], 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "max_ms": round(samples[-1], 3),
+    }
+
+
+def run_benchmarks(db, job_count, iterations, seed):
+    """Time each db.py entry point; write paths run against random existing rows."""
+    from health_reporter import HealthReporter
+
+    rng = random.Random(seed + 1)
+    results = {}
+
+    def random_job_id():
+        return (rng.randint(1, job_count),)
+
+    results["get_pending_jobs"] = time_call(lambda: db.get_pending_jobs(limit=10), iterations)
+
+    pending = [job["id"] for job in db.get_pending_jobs(limit=iterations)]
+    lock_ids = {}
+
+    def next_pending():
+        job_id = pending.pop() if pending else random_job_id()[0]
+        lock_ids[job_id] = str(uuid.uuid4())
+        return job_id, lock_ids[job_id]
+
+    results["acquire_job_lock"] = time_call(lambda job_id, lock_id: db.acquire_job_lock(job_id, lock_id), iterations, next_pending)
+
+    locked = list(lock_ids.items())
+    results["release_job_lock"] = time_call(
+        lambda job_id, lock_id: db.release_job_lock(job_id, lock_id, "pending"),
+        len(locked) or 1,
+        lambda: locked.pop() if locked else (0, "none")
+    )
+
+    results["claim_pending_jobs"] = time_call(lambda: db.claim_pending_jobs(10, str(uuid.uuid4())), iterations)
+
+    results["update_job_status"] = time_call(
+        lambda job_id: db.update_job_status(job_id, "completed", result={"status": "success", "message": "benchmark"}),
+        iterations,
+        random_job_id
+    )
+
+    results["get_jobs_by_status"] = time_call(lambda: db.get_jobs_by_status("completed", limit=100), iterations)
+    results["get_jobs_by_status_deep_offset"] = time_call(
+        lambda: db.get_jobs_by_status("completed", limit=100, offset=job_count // 2),
+        max(iterations // 5, 1)
+    )
+    results["list_jobs_summary"] = time_call(
+        lambda: db.list_jobs(limit=100, fields=list(db.JOB_SUMMARY_FIELDS)),
+        iterations
+    )
+
+    results["get_job"] = time_call(db.get_job, iterations, random_job_id)
+    results["get_job_history"] = time_call(db.get_job_history, iterations, random_job_id)
+    results["get_job_screenshots"] = time_call(db.get_job_screenshots, iterations, random_job_id)
+    results["search_jobs_circuit"] = time_call(
+        lambda number: db.search_jobs(circuit_number=f"FTTX{number:07d}"),
+        iterations,
+        lambda: (rng.randint(0, job_count // 3),)
+    )
+    results["get_job_changes"] = time_call(
+        lambda since: db.get_job_changes(since, 0, limit=100),
+        iterations,
+        lambda: (rng.randint(0, job_count),)
+    )
+
+    results["recover_stale_locks"] = time_call(lambda: db.recover_stale_locks(30), max(iterations // 5, 1))
+
+    # Health queries
+    results["get_jobs_count_by_status"] = time_call(db.get_jobs_count_by_status, max(iterations // 5, 1))
+    results["get_recent_metrics"] = time_call(lambda: db.get_recent_metrics(limit=24), iterations)
+    if db.backend.name == "sqlite":
+        reporter = HealthReporter(endpoint="", server_type="Orchestrator", db_path=db.Config.DB_PATH)
+        results["health_reporter_job_metrics"] = time_call(reporter.collect_job_metrics, max(iterations // 5, 1))
+
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Drivers
+# ---------------------------------------------------------------------------
+
+def run_single(args):
+    """Build or reuse one dataset and benchmark it (runs in a child process)."""
+    job_count = SCALES.get(args.single, None) or int(args.single)
+    data_dir = Path(args.data_dir) / f"jobs_{job_count}"
+    marker = data_dir / "dataset.json"
+
+    if marker.exists() and not args.rebuild:
+        dataset = json.loads(marker.read_text())
+        dataset["reused"] = True
+    else:
+        shutil.rmtree(data_dir, ignore_errors=True)
+        dataset = None
+
+    # Point the orchestrator modules at the scratch directory before importing them
+    os.environ["BASE_DATA_DIR"] = str(data_dir)
+    os.environ.pop("DATABASE_URL", None)
+    import db  # noqa: E402
+    import screenshot_store  # noqa: E402
+    from config import Config  # noqa: E402
+
+    Config.setup_directories()
+    if not db.init_db():
+        raise RuntimeError("Database initialization failed")
+
+    if dataset is None:
+        print(f"Generating {job_count:,} jobs in {data_dir}", file=sys.stderr)
+        start = time.perf_counter()
+        hashes = seed_screenshot_store(screenshot_store)
+        counts = generate_dataset(db, job_count, args.seed, hashes)
+        dataset = {"rows": counts, "load_seconds": round(time.perf_counter() - start, 1), "reused": False}
+        marker.write_text(json.dumps(dataset))
+
+    print(f"Benchmarking {job_count:,} jobs", file=sys.stderr)
+    results = run_benchmarks(db, job_count, args.iterations, args.seed)
+
+    db_size = os.path.getsize(Config.DB_PATH)
+    wal_path = f"{Config.DB_PATH}-wal"
+    if os.path.exists(wal_path):
+        db_size += os.path.getsize(wal_path)
+
+    report = {
+        "scale": args.single,
+        "jobs": job_count,
+        "dataset": dataset,
+        "db_size_bytes": db_size,
+        "results": results,
+    }
+    print(json.dumps(report))
+    return 0
+
+
+def environment_info():
+    """Describe what was measured, so results from different runs can be matched up."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BIN_DIR, capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(report, baseline_path, threshold):
+    """Print median changes against a baseline report; return True if any regressed."""
+    baseline = json.loads(Path(baseline_path).read_text())
+    baseline_runs = {run["scale"]: run for run in baseline.get("runs", [])}
+    regressed = False
+
+    for run in report["runs"]:
+        base_run = baseline_runs.get(run["scale"])
+        if not base_run:
+            print(f"[{run['scale']}] no baseline")
+            continue
+        for name, stats in run["results"].items():
+            base_stats = base_run["results"].get(name)
+            if not base_stats or not base_stats["median_ms"]:
+                continue
+            ratio = stats["median_ms"] / base_stats["median_ms"]
+            flag = "REGRESSION" if ratio > threshold else ""
+            regressed = regressed or bool(flag)
+            print(f"[{run['scale']}] {name:32s} {base_stats['median_ms']:10.3f} -> {stats['median_ms']:10.3f} ms  x{ratio:5.2f} {flag}")
+
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark db.py on synthetic orchestrator datasets")
+    parser.add_argument("--scale", action="append", help=f"Dataset size: {', '.join(SCALES)} or a job count (repeatable, default 100k)")
+    parser.add_argument("--iterations", type=int, default=50, help="Timed calls per function")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for data generation")
+    parser.add_argument("--data-dir", help="Directory for generated datasets (default: temporary)")
+    parser.add_argument("--keep", action="store_true", help="Keep generated datasets for reuse")
+    parser.add_argument("--rebuild", action="store_true", help="Regenerate datasets even if present in --data-dir")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--compare", help="Baseline JSON report to compare medians against")
+    parser.add_argument("--threshold", type=float, default=1.5, help="Median slowdown ratio counted as a regression")
+    parser.add_argument("--single", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        return run_single(args)
+
+    scales = args.scale or ["100k"]
+    for scale in scales:
+        if scale not in SCALES and not scale.isdigit():
+            parser.error(f"Unknown scale: {scale}")
+
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="db_bench_")
+    report = {"environment": environment_info(), "iterations": args.iterations, "runs": []}
+
+    try:
+        for scale in scales:
+            command = [
+                sys.executable, __file__, "--single", scale,
+                "--data-dir", data_dir,
+                "--iterations", str(args.iterations),
+                "--seed", str(args.seed),
+            ]
+            if args.rebuild:
+                command.append("--rebuild")
+            completed = subprocess.run(command, stdout=subprocess.PIPE, text=True)
+            if completed.returncode != 0:
+                print(f"Benchmark for {scale} failed", file=sys.stderr)
+                return completed.returncode
+            report["runs"].append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    finally:
+        if not args.keep:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"Report written to {args.output}", file=sys.stderr)
+
+    if args.compare and compare(report, args.compare, args.threshold):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+JSON Column Codec Benchmark
+---------------------------
+Measures database size and encode/decode time of the job_queue JSON columns
+(parameters, result, evidence) before and after re-encoding them with
+json_codec.
+
+Always run against a COPY of the production database: the script copies the
+given file to a scratch location, rewrites the copy and never touches the
+original.
+
+Usage:
+    python bin/json_codec_benchmark.py /path/to/orchestrator.db
+    python bin/json_codec_benchmark.py /path/to/orchestrator.db --output codec_report.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import json_codec  # noqa: E402
+from config import Config  # noqa: E402
+
+JSON_COLUMNS = ["parameters", "result", "evidence"]
+
+
+def legacy_decode(value):
+    """Decode a value the way the old JSONType did."""
+    if isinstance(value, bytes):
+        return json_codec.decode(value)
+    return json.loads(value)
+
+
+def measure_column(conn, column):
+    """Time legacy vs codec encode/decode for one column over every row."""
+    rows = conn.execute(
+        f"SELECT id, {column} FROM job_queue WHERE {column} IS NOT NULL"
+    ).fetchall()
+
+    values = []
+    stored_bytes = 0
+    start = time.perf_counter()
+    for _, raw in rows:
+        stored_bytes += len(raw) if raw is not None else 0
+        values.append(legacy_decode(raw))
+    legacy_decode_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    legacy_encoded = [json.dumps(value) for value in values]
+    legacy_encode_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    codec_encoded = [json_codec.encode(value) for value in values]
+    codec_encode_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for payload in codec_encoded:
+        json_codec.decode(payload)
+    codec_decode_time = time.perf_counter() - start
+
+    compressed_rows = sum(1 for payload in codec_encoded if isinstance(payload, bytes))
+
+    return {
+        "rows": len(rows),
+        "stored_bytes": stored_bytes,
+        "legacy_bytes": sum(len(p.encode("utf-8")) for p in legacy_encoded),
+        "codec_bytes": sum(len(p) if isinstance(p, bytes) else len(p.encode("utf-8")) for p in codec_encoded),
+        "compressed_rows": compressed_rows,
+        "legacy_encode_sec": round(legacy_encode_time, 4),
+        "legacy_decode_sec": round(legacy_decode_time, 4),
+        "codec_encode_sec": round(codec_encode_time, 4),
+        "codec_decode_sec": round(codec_decode_time, 4),
+    }, [(row[0], payload) for row, payload in zip(rows, codec_encoded)]
+
+
+def file_size(path):
+    """Size of a SQLite database including any WAL file."""
+    size = os.path.getsize(path)
+    wal = f"{path}-wal"
+    if os.path.exists(wal):
+        size += os.path.getsize(wal)
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the JSON column codec on a copy of an orchestrator database")
+    parser.add_argument("db_path", help="Path to the orchestrator database to copy")
+    parser.add_argument("--workdir", help="Directory for the scratch copy (default: system temp dir)")
+    parser.add_argument("--output", help="Write the report to a JSON file")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db_path):
+        print(f"Database not found: {args.db_path}")
+        return 1
+
+    workdir = tempfile.mkdtemp(prefix="codec_bench_", dir=args.workdir)
+    copy_path = os.path.join(workdir, "orchestrator_copy.db")
+
+    try:
+        # sqlite3 backup gives a consistent snapshot even if the source is in WAL mode
+        with sqlite3.connect(args.db_path) as source, sqlite3.connect(copy_path) as target:
+            source.backup(target)
+
+        with sqlite3.connect(copy_path) as conn:
+            # Rollback journal so VACUUM rewrites the main file rather than a WAL
+            conn.execute("PRAGMA journal_mode=DELETE")
+            conn.execute("VACUUM")
+        size_before = file_size(copy_path)
+
+        report = {
+            "source": os.path.abspath(args.db_path),
+            "settings": {
+                "compression": Config.JSON_COMPRESSION,
+                "threshold": Config.JSON_COMPRESSION_THRESHOLD,
+                "level": Config.JSON_COMPRESSION_LEVEL,
+                "orjson": json_codec.orjson is not None,
+                "zstandard": json_codec.zstandard is not None,
+            },
+            "columns": {},
+        }
+
+        with sqlite3.connect(copy_path) as conn:
+            for column in JSON_COLUMNS:
+                stats, encoded = measure_column(conn, column)
+                report["columns"][column] = stats
+                conn.executemany(
+                    f"UPDATE job_queue SET {column} = ? WHERE id = ?",
+                    [(payload, row_id) for row_id, payload in encoded]
+                )
+            conn.commit()
+            conn.execute("VACUUM")
+
+        size_after = file_size(copy_path)
+        report["db_size_before"] = size_before
+        report["db_size_after"] = size_after
+        report["db_size_reduction_pct"] = round((1 - size_after / size_before) * 100, 2) if size_before else 0
+
+        print(json.dumps(report, indent=2))
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"Report written to {args.output}")
+        return 0
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -326,11 +326,44 @@ class LoadTester:
         
         start_time = time.time()
         pending_jobs = set(job_ids)
+        monitored_jobs = set(job_ids)
         job_statuses = {}
         final_states = ['completed', 'failed', 'error', 'cancelled']
         
+        # Follow the change feed so each poll costs one request for the jobs
+        # that changed; fall back to per-job polling on older orchestrators
+        cursor = "0"
+        use_change_feed = True
+        
         while pending_jobs and (time.time() - start_time) < max_duration:
-            for job_id in list(pending_jobs):
+            if use_change_feed:
+                try:
+                    while True:
+                        response = requests.get(
+                            f"{self.base_url}/jobs/changes",
+                            params={"since": cursor, "limit": 1000, "fields": "status"},
+                            timeout=self.timeout
+                        )
+                        if response.status_code != 200:
+                            self.print_warning(f"Change feed unavailable ({response.status_code}), polling jobs individually")
+                            use_change_feed = False
+                            break
+                        
+                        feed = response.json()
+                        for job in feed["changes"]:
+                            if job["id"] not in monitored_jobs:
+                                continue
+                            job_statuses[job["id"]] = job["status"]
+                            if job["status"] in final_states and job["id"] in pending_jobs:
+                                self.print_info(f"Job {job['id']} finished with status: {job['status']}")
+                                pending_jobs.remove(job["id"])
+                        cursor = feed["next_cursor"]
+                        if not feed["has_more"]:
+                            break
+                except Exception as e:
+                    self.print_error(f"Error reading change feed: {str(e)}")
+            
+            for job_id in ([] if use_change_feed else list(pending_jobs)):
                 try:
                     response = requests.get(
                         f"{self.base_url}/jobs/{job_id}",
@@ -407,6 +407,7 @@ def run_validation(orchestrator_url, circuit_number):
     completed = False
     max_wait_time = 180  # 3 minutes
     start_monitoring = datetime.now()
+    since_seq = None
     
     logger.info(f"Monitoring validation job {job_id} until completion (max {max_wait_time}s)...")
     
@@ -420,8 +421,11 @@ def run_validation(orchestrator_url, circuit_number):
                     completed = True
                     break
             
-            # Otherwise check the API
-            response = requests.get(f"{orchestrator_url}/jobs/{job_id}")
+            # Otherwise check the API, long-polling so a change is seen at once
+            params = {"wait": 10}
+            if since_seq is not None:
+                params["since_seq"] = since_seq
+            response = requests.get(f"{orchestrator_url}/jobs/{job_id}", params=params, timeout=40)
             
             if response.status_code != 200:
                 logger.warning(f"⚠️ Failed to get job status: {response.status_code}")
@@ -430,6 +434,7 @@ def run_validation(orchestrator_url, circuit_number):
                 
             job_data = response.json()
             status = job_data.get("status")
+            since_seq = job_data.get("change_seq")
             
             # Log current status
             if status is None:
@@ -455,8 +460,9 @@ def run_validation(orchestrator_url, circuit_number):
                         completed = True
                         break
             
-            # Wait 5 seconds between checks
-            time.sleep(5)
+            # Orchestrators without long-poll support answer at once
+            if since_seq is None:
+                time.sleep(5)
             
         except Exception as e:
             logger.warning(f"⚠️ Error checking validation job status: {str(e)}")
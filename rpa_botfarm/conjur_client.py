@@ -2,22 +2,44 @@
 CyberArk Conjur Client for RPA Orchestration System
 ==================================================
 Secure credential retrieval from CyberArk Conjur vault.
+
+Secrets are fetched in batches through Conjur's multi-variable endpoint
+(GET /secrets?variable_ids=...) over a pooled HTTP session and kept in a
+lock-protected cache. A cached secret older than the refresh-ahead point is
+still returned immediately while a background thread fetches it again, so
+callers only wait on Conjur for the first read or after the hard expiry.
+Concurrent fetches of the same secret share one request.
 """
 import os
 import sys
 import requests
 import logging
+import threading
 import time
-from typing import Optional, Dict, Any
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Dict, Any, Iterable, List
 from pathlib import Path
 import urllib.parse
 
+from requests.adapters import HTTPAdapter
+
 # Disable SSL warnings for development (remove in production)
 import urllib3
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 logger = logging.getLogger(__name__)
 
+# Secret fields stored per provider under BotApp/providers/<provider>/<field>
+PROVIDER_SECRET_FIELDS = {
+    'metrofiber': ['url', 'email', 'password'],
+    'openserve': ['url', 'email', 'password'],
+    'octotel': ['url', 'username', 'password', 'totp_secret'],
+    'evotel': ['url', 'email', 'password']
+}
+
+# Variables per /secrets request, keeping the query string well under URL length limits
+BATCH_SIZE = 50
+
 class ConjurClient:
     """CyberArk Conjur client for secure credential management."""
     
@@ -26,7 +48,10 @@ class ConjurClient:
                  account: str = "myConjurAccount", 
                  host_id: str = "host/BotApp/myDemoApp",
                  api_key: str = None,
-                 verify_ssl: bool = False):
+                 verify_ssl: bool = False,
+                 cache_duration: float = 300,
+                 refresh_ahead: float = 60,
+                 pool_size: int = 10):
         """
         Initialize Conjur client.
         
@@ -36,6 +61,9 @@ class ConjurClient:
             host_id: Host identity (URL encoded)
             api_key: API key for authentication
             verify_ssl: Whether to verify SSL certificates
+            cache_duration: Seconds a cached secret may be served
+            refresh_ahead: Seconds before expiry at which a read triggers a background refresh
+            pool_size: Connections kept open to Conjur
         """
         self.conjur_url = conjur_url.rstrip('/')
         self.account = account
@@ -43,14 +71,28 @@ class ConjurClient:
         self.api_key = api_key or os.getenv("CONJUR_API_KEY", "1rmxf8watvpsf1j9f72y1a482t62a6dxjr2aedrx2259sy8f11rb5wy")
         self.verify_ssl = verify_ssl
         
+        # Pooled connections shared by all threads
+        self._session = requests.Session()
+        self._session.verify = verify_ssl
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        
         # Token management
         self._token = None
         self._token_expiry = 0
         self._token_file = "/tmp/conjur_token"
+        self._auth_lock = threading.Lock()
         
-        # Cache for secrets to reduce API calls
+        # Cache for secrets to reduce API calls: path -> {'value', 'timestamp'}
         self._secret_cache = {}
-        self._cache_duration = 300  # 5 minutes
+        self._cache_duration = cache_duration
+        self._refresh_ahead = min(refresh_ahead, cache_duration)
+        self._cache_lock = threading.Lock()
+        self._refreshing = set()
+        # Path -> Future with the value of the fetch in progress for it
+        self._in_flight: Dict[str, Future] = {}
+        self._refresh_pool = None
         
         logger.info(f"Conjur client initialized for account: {account}")
     
@@ -68,10 +110,9 @@ class ConjurClient:
             
             logger.debug(f"Authenticating with Conjur at: {auth_url}")
             
-            response = requests.post(
+            response = self._session.post(
                 auth_url,
                 data=self.api_key,
-                verify=self.verify_ssl,
                 timeout=10
             )
             
@@ -107,9 +148,45 @@ class ConjurClient:
             bool: True if we have a valid token
         """
         # Check if we need to authenticate or re-authenticate
-        if not self._token or time.time() >= self._token_expiry - 60:  # Refresh 1 min before expiry
-            return self._authenticate()
-        return True
+        with self._auth_lock:
+            if not self._token or time.time() >= self._token_expiry - 60:  # Refresh 1 min before expiry
+                return self._authenticate()
+            return True
+    
+    def _auth_headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Token token=\"{self._token}\""}
+    
+    def _cached(self, secret_path: str) -> Optional[Dict[str, Any]]:
+        """Get a cache entry that has not expired; must hold _cache_lock."""
+        entry = self._secret_cache.get(secret_path)
+        if entry and time.time() - entry['timestamp'] < self._cache_duration:
+            return entry
+        return None
+    
+    def _store(self, secrets: Dict[str, str]):
+        now = time.time()
+        with self._cache_lock:
+            for path, value in secrets.items():
+                self._secret_cache[path] = {'value': value, 'timestamp': now}
+    
+    def _schedule_refresh(self, secret_paths: List[str]):
+        """Fetch secrets again in the background, once per path at a time."""
+        with self._cache_lock:
+            paths = [path for path in secret_paths if path not in self._refreshing]
+            if not paths:
+                return
+            self._refreshing.update(paths)
+            if self._refresh_pool is None:
+                self._refresh_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="conjur-refresh")
+        
+        def refresh():
+            try:
+                self._fetch(paths)
+            finally:
+                with self._cache_lock:
+                    self._refreshing.difference_update(paths)
+        
+        self._refresh_pool.submit(refresh)
     
     def get_secret(self, secret_path: str, use_cache: bool = True) -> Optional[str]:
         """
@@ -122,48 +199,23 @@ class ConjurClient:
         Returns:
             str: Secret value or None if not found
         """
-        # Check cache first
-        if use_cache and secret_path in self._secret_cache:
-            cached_data = self._secret_cache[secret_path]
-            if time.time() - cached_data['timestamp'] < self._cache_duration:
-                logger.debug(f"Using cached secret: {secret_path}")
-                return cached_data['value']
-        
-        # Ensure we're authenticated
-        if not self._ensure_authenticated():
-            logger.error("Failed to authenticate with Conjur")
-            return None
-        
+        if use_cache:
+            return self.get_secrets_batch([secret_path]).get(secret_path)
+        return self._fetch([secret_path]).get(secret_path)
+    
+    def _fetch_one(self, secret_path: str) -> Optional[str]:
+        """Retrieve one variable from Conjur, bypassing the cache."""
         try:
             # URL encode the secret path
             encoded_path = urllib.parse.quote(secret_path, safe='')
             secret_url = f"{self.conjur_url}/secrets/{self.account}/variable/{encoded_path}"
             
-            headers = {
-                "Authorization": f"Token token=\"{self._token}\""
-            }
-            
             logger.debug(f"Retrieving secret: {secret_path}")
-            
-            response = requests.get(
-                secret_url,
-                headers=headers,
-                verify=self.verify_ssl,
-                timeout=10
-            )
+            response = self._session.get(secret_url, headers=self._auth_headers(), timeout=10)
             
             if response.status_code == 200:
-                secret_value = response.text
-                
-                # Cache the secret
-                if use_cache:
-                    self._secret_cache[secret_path] = {
-                        'value': secret_value,
-                        'timestamp': time.time()
-                    }
-                
                 logger.debug(f"Successfully retrieved secret: {secret_path}")
-                return secret_value
+                return response.text
             elif response.status_code == 404:
                 logger.warning(f"Secret not found: {secret_path}")
                 return None
@@ -174,11 +226,113 @@ class ConjurClient:
         except requests.exceptions.RequestException as e:
             logger.error(f"Network error retrieving secret {secret_path}: {e}")
             return None
-        except Exception as e:
-            logger.error(f"Unexpected error retrieving secret {secret_path}: {e}")
+    
+    def _fetch_batch(self, secret_paths: List[str]) -> Optional[Dict[str, str]]:
+        """
+        Retrieve variables with one /secrets?variable_ids= request.
+        
+        Returns:
+            dict: Path to value, or None if Conjur rejected the batch
+            (it answers 404 when any one variable is missing)
+        """
+        prefix = f"{self.account}:variable:"
+        # IDs are encoded here rather than through params so the separating commas stay literal
+        variable_ids = ",".join(urllib.parse.quote(prefix + path, safe=':/') for path in secret_paths)
+        batch_url = f"{self.conjur_url}/secrets?variable_ids={variable_ids}"
+        try:
+            response = self._session.get(batch_url, headers=self._auth_headers(), timeout=10)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Network error retrieving {len(secret_paths)} secrets: {e}")
+            return None
+        
+        if response.status_code == 401:
+            # Token revoked or expired early: authenticate once more and retry
+            with self._auth_lock:
+                self._token = None
+            if not self._ensure_authenticated():
+                return None
+            try:
+                response = self._session.get(batch_url, headers=self._auth_headers(), timeout=10)
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Network error retrieving {len(secret_paths)} secrets: {e}")
+                return None
+        
+        if response.status_code != 200:
+            logger.warning(f"Batch retrieval of {len(secret_paths)} secrets failed: {response.status_code}")
+            return None
+        
+        try:
+            values = response.json()
+        except ValueError as e:
+            logger.warning(f"Batch retrieval of {len(secret_paths)} secrets returned invalid JSON: {e}")
+            return None
+        if not isinstance(values, dict):
+            logger.warning(f"Batch retrieval of {len(secret_paths)} secrets returned unexpected {type(values).__name__}")
             return None
+        return {path: values[prefix + path] for path in secret_paths if prefix + path in values}
     
-    def get_secrets_batch(self, secret_paths: list) -> Dict[str, str]:
+    def _fetch(self, secret_paths: List[str]) -> Dict[str, str]:
+        """
+        Retrieve secrets from Conjur and cache them, one request per path at a time.
+        
+        Paths another thread is already fetching are not requested again; this
+        call waits for that fetch's result instead, so a burst of cache misses
+        or a refresh racing a miss costs Conjur one request per secret.
+        """
+        own = []
+        waiting = {}
+        with self._cache_lock:
+            for path in dict.fromkeys(secret_paths):
+                future = self._in_flight.get(path)
+                if future is None:
+                    self._in_flight[path] = Future()
+                    own.append(path)
+                else:
+                    waiting[path] = future
+        
+        results = {}
+        try:
+            if own:
+                results = self._request(own)
+        finally:
+            with self._cache_lock:
+                futures = {path: self._in_flight.pop(path) for path in own}
+            for path, future in futures.items():
+                future.set_result(results.get(path))
+        
+        for path, future in waiting.items():
+            value = future.result()
+            if value is not None:
+                results[path] = value
+        return results
+    
+    def _request(self, secret_paths: List[str]) -> Dict[str, str]:
+        """
+        Request secrets from Conjur and cache them.
+        
+        Batches of BATCH_SIZE go through the multi-variable endpoint; a batch
+        Conjur rejects (e.g. because one variable is missing) or answers with
+        something other than a JSON object is retried variable by variable,
+        concurrently.
+        """
+        if not self._ensure_authenticated():
+            logger.error("Failed to authenticate with Conjur")
+            return {}
+        
+        results = {}
+        for start in range(0, len(secret_paths), BATCH_SIZE):
+            batch = secret_paths[start:start + BATCH_SIZE]
+            values = self._fetch_batch(batch)
+            if values is None:
+                with ThreadPoolExecutor(max_workers=min(len(batch), 8), thread_name_prefix="conjur-fetch") as pool:
+                    fetched = pool.map(self._fetch_one, batch)
+                values = {path: value for path, value in zip(batch, fetched) if value is not None}
+            results.update(values)
+        
+        self._store(results)
+        return results
+    
+    def get_secrets_batch(self, secret_paths: Iterable[str]) -> Dict[str, str]:
         """
         Retrieve multiple secrets efficiently.
         
@@ -189,17 +343,38 @@ class ConjurClient:
             dict: Dictionary mapping secret paths to values
         """
         results = {}
-        for path in secret_paths:
-            value = self.get_secret(path)
-            if value is not None:
-                results[path] = value
+        missing = []
+        stale = []
+        now = time.time()
+        with self._cache_lock:
+            for path in dict.fromkeys(secret_paths):
+                entry = self._cached(path)
+                if entry is None:
+                    missing.append(path)
+                    continue
+                results[path] = entry['value']
+                if now - entry['timestamp'] >= self._cache_duration - self._refresh_ahead:
+                    stale.append(path)
+        
+        if stale:
+            self._schedule_refresh(stale)
+        if missing:
+            results.update(self._fetch(missing))
         return results
     
     def clear_cache(self):
         """Clear the secret cache."""
-        self._secret_cache.clear()
+        with self._cache_lock:
+            self._secret_cache.clear()
         logger.info("Secret cache cleared")
     
+    def close(self):
+        """Stop background refreshes and close pooled connections."""
+        if self._refresh_pool is not None:
+            self._refresh_pool.shutdown(wait=False)
+            self._refresh_pool = None
+        self._session.close()
+    
     def health_check(self) -> bool:
         """
         Check if Conjur is accessible and authentication works.
@@ -216,13 +391,15 @@ class ConjurClient:
 
 # Global Conjur client instance
 _conjur_client = None
+_conjur_client_lock = threading.Lock()
 
 def get_conjur_client() -> ConjurClient:
     """Get or create the global Conjur client instance."""
     global _conjur_client
-    if _conjur_client is None:
-        _conjur_client = ConjurClient()
-    return _conjur_client
+    with _conjur_client_lock:
+        if _conjur_client is None:
+            _conjur_client = ConjurClient()
+        return _conjur_client
 
 def get_secret_with_fallback(secret_path: str, env_var: str, default: str = None) -> str:
     """
@@ -280,18 +457,37 @@ def get_provider_secrets(provider: str) -> Dict[str, str]:
     Returns:
         dict: Provider secrets
     """
-    base_paths = {
-        'metrofiber': ['url', 'email', 'password'],
-        'openserve': ['url', 'email', 'password'],
-        'octotel': ['url', 'username', 'password', 'totp_secret'],
-        'evotel': ['url', 'email', 'password']
-    }
-    
-    if provider not in base_paths:
+    if provider not in PROVIDER_SECRET_FIELDS:
         raise ValueError(f"Unknown provider: {provider}")
     
-    paths = [f"BotApp/providers/{provider}/{field}" for field in base_paths[provider]]
-    return get_conjur_client().get_secrets_batch(paths)
+    return get_conjur_client().get_secrets_batch(provider_secret_paths(provider))
+
+def provider_secret_paths(provider: str) -> List[str]:
+    """Get the Conjur paths of a provider's secrets."""
+    return [f"BotApp/providers/{provider}/{field}" for field in PROVIDER_SECRET_FIELDS[provider]]
+
+def prefetch_secrets(providers: Optional[Iterable[str]] = None) -> int:
+    """
+    Load the authentication secrets and all provider secrets into the cache
+    in one batched request, so the first job does not wait on Conjur.
+    
+    Args:
+        providers: Providers to prefetch; all known providers by default
+        
+    Returns:
+        int: Number of secrets cached
+    """
+    paths = [
+        "BotApp/auth/jwt_secret",
+        "BotApp/auth/admin_username",
+        "BotApp/auth/admin_password"
+    ]
+    for provider in providers or PROVIDER_SECRET_FIELDS:
+        paths.extend(provider_secret_paths(provider))
+    
+    secrets = get_conjur_client().get_secrets_batch(paths)
+    logger.info(f"Prefetched {len(secrets)} of {len(paths)} secrets from Conjur")
+    return len(secrets)
 
 def test_conjur_connection():
     """Test Conjur connection and print status."""
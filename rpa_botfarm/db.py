@@ -2,53 +2,75 @@
 RPA Orchestration System - Database Utilities
 --------------------------------------------
 Database connection and utility functions for the RPA orchestration system.
-Uses SQLAlchemy for improved connection handling with SQLite backend.
+Uses SQLAlchemy with a pluggable backend selected by Config.DATABASE_URL:
+SQLite (default, single orchestrator) or PostgreSQL (several orchestrator
+replicas claiming jobs with FOR UPDATE SKIP LOCKED).
 """
 
 import os
 import json
 import datetime
 import logging
+import traceback
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Any, Optional, List, Union
+from typing import Dict, Any, Optional, List, Union, Callable, Iterator
 
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import create_engine, Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Index, Sequence, select, update, case
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship, scoped_session
+from sqlalchemy.orm import sessionmaker, relationship, scoped_session, deferred, undefer_group
 from sqlalchemy.pool import QueuePool
 from sqlalchemy.engine import Engine
 from sqlalchemy import event
 from sqlalchemy.sql import func
 import sqlalchemy.types as types
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from sqlalchemy import LargeBinary
 from sqlalchemy.dialects.sqlite import JSON as SQLiteJSON
 from sqlalchemy import text
+from sqlalchemy import inspect
 
 from config import Config
+import json_codec
+import result_diff
+import screenshot_store
 
 logger = logging.getLogger(__name__)
 
 # Create a custom JSON data type for SQLAlchemy
 class JSONType(types.TypeDecorator):
+    """
+    JSON column stored through json_codec (compact JSON, compressed above a size threshold).
+    
+    SQLite stores text and compressed blobs side by side in a TEXT column;
+    other databases use a binary column so both forms fit.
+    """
     impl = Text
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "sqlite":
+            return dialect.type_descriptor(Text())
+        return dialect.type_descriptor(LargeBinary())
 
     def process_bind_param(self, value, dialect):
         if value is not None:
-            return json.dumps(value)
+            encoded = json_codec.encode(value)
+            if dialect.name != "sqlite" and isinstance(encoded, str):
+                encoded = encoded.encode("utf-8")
+            return encoded
         return None
 
     def process_result_value(self, value, dialect):
         if value is not None:
             try:
-                return json.loads(value)
+                return json_codec.decode(value)
             except (ValueError, TypeError):
                 return {}
         return None
 
-# SQLite foreign key support
-@event.listens_for(Engine, "connect")
+# SQLite foreign key support, registered on SQLite engines by SQLiteBackend
 def set_sqlite_pragma(dbapi_connection, connection_record):
     cursor = dbapi_connection.cursor()
     cursor.execute("PRAGMA foreign_keys=ON")
@@ -69,6 +91,16 @@ class User(Base):
     created_at = Column(DateTime, default=func.now())
     last_login = Column(DateTime, nullable=True)
 
+class ApiKey(Base):
+    __tablename__ = 'api_keys'
+    
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False)  # Service the key was issued to
+    key_prefix = Column(String(16), nullable=False, index=True)  # Leading characters, for lookup and display
+    key_hash = Column(String(64), nullable=False)  # HMAC-SHA256 of the full key; the key itself is not stored
+    disabled = Column(Boolean, default=False)
+    created_at = Column(DateTime, default=func.now())
+
 class JobQueue(Base):
     __tablename__ = 'job_queue'
     
@@ -76,7 +108,7 @@ class JobQueue(Base):
     external_job_id = Column(String(100), nullable=True, index=True)  # Renamed from job_id to external_job_id
     provider = Column(String(50), nullable=False)
     action = Column(String(50), nullable=False)
-    parameters = Column(JSONType, nullable=False)
+    parameters = deferred(Column(JSONType, nullable=False), group="payload")
     priority = Column(Integer, default=0)
     status = Column(String(20), default="pending")
     retry_count = Column(Integer, default=0)
@@ -86,12 +118,28 @@ class JobQueue(Base):
     scheduled_for = Column(DateTime, nullable=True)
     started_at = Column(DateTime, nullable=True)
     completed_at = Column(DateTime, nullable=True)
-    result = Column(JSONType, nullable=True)
-    evidence = Column(JSONType, nullable=True)
+    result = deferred(Column(JSONType, nullable=True), group="payload")
+    evidence = deferred(Column(JSONType, nullable=True), group="payload")
     assigned_worker = Column(String(100), nullable=True)
     lock_id = Column(String(36), nullable=True)
     locked_at = Column(DateTime, nullable=True)
     
+    # Search columns extracted from parameters on create and from the result on completion
+    circuit_number = Column(String(100), nullable=True)
+    solution_id = Column(String(100), nullable=True, index=True)
+    outcome = Column(String(100), nullable=True)  # Provider status outcome, e.g. "Bitstream Validated"
+    
+    # Bumped on every insert and update; drives the /jobs/changes feed
+    change_seq = Column(Integer, nullable=True, index=True)
+    
+    __table_args__ = (
+        # Newest-first listings, with and without a status filter
+        Index("ix_job_queue_created_at", "created_at"),
+        Index("ix_job_queue_status_created_at", "status", "created_at"),
+        Index("ix_job_queue_circuit_number_created_at", "circuit_number", "created_at"),
+        Index("ix_job_queue_provider_outcome_created_at", "provider", "outcome", "created_at"),
+    )
+    
     # Relationships
     history = relationship("JobHistory", back_populates="job", cascade="all, delete-orphan")
     screenshots = relationship("Screenshot", back_populates="job", cascade="all, delete-orphan")
@@ -108,7 +156,9 @@ class Screenshot(Base):
     timestamp = Column(DateTime, default=func.now())
     mime_type = Column(String(50), default="image/png")
     description = Column(String(255), nullable=True)
-    image_data = Column(Text, nullable=False)  # Base64 encoded image
+    content_hash = Column(String(64), nullable=True, index=True)  # SHA-256 of the image in screenshot_store
+    size_bytes = Column(Integer, nullable=True)
+    image_data = Column(Text, nullable=True)  # Legacy base64 image, only set on rows not yet moved to the store
     
     # Relationships
     job = relationship("JobQueue", back_populates="screenshots")
@@ -136,35 +186,425 @@ class SystemMetrics(Base):
     failed_jobs = Column(Integer, default=0)
     worker_status = Column(JSONType, nullable=True)
 
+class ValidationTimeline(Base):
+    __tablename__ = 'validation_timeline'
+    
+    id = Column(Integer, primary_key=True)
+    provider = Column(String(50), nullable=False)
+    circuit_number = Column(String(100), nullable=False)
+    seq = Column(Integer, nullable=False)  # Position in the circuit's timeline, from 1
+    job_id = Column(Integer, ForeignKey('job_queue.id', ondelete='SET NULL'), nullable=True)
+    created_at = Column(DateTime, default=func.now())
+    is_keyframe = Column(Boolean, nullable=False)  # data is the full result, otherwise a diff against seq - 1
+    data = Column(JSONType, nullable=False)
+    change_count = Column(Integer, nullable=False, default=0)  # Significant changes since the previous entry
+    
+    __table_args__ = (
+        Index("ix_validation_timeline_circuit", "circuit_number", "provider", "seq", unique=True),
+    )
+
+class LeaderLease(Base):
+    __tablename__ = 'leader_leases'
+    
+    role = Column(String(50), primary_key=True)  # Periodic duty group, e.g. "dispatcher"
+    holder = Column(String(100), nullable=False)  # Orchestrator instance ID
+    acquired_at = Column(DateTime, nullable=False)
+    renewed_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+# Heavy JSON columns on JobQueue are deferred (group "payload") and only loaded
+# when a read path asks for them.
+JOB_PAYLOAD_FIELDS = ("parameters", "result", "evidence")
+
+# Columns for job listings that never decode JSON payloads
+JOB_SUMMARY_FIELDS = (
+    "id",
+    "external_job_id",
+    "provider",
+    "action",
+    "status",
+    "priority",
+    "retry_count",
+    "max_retries",
+    "created_at",
+    "updated_at",
+    "scheduled_for",
+    "started_at",
+    "completed_at",
+    "assigned_worker",
+    "circuit_number",
+    "solution_id",
+    "outcome",
+    "change_seq",
+)
+
+# Statuses after which a job does not change again
+TERMINAL_STATUSES = ("completed", "failed", "error", "cancelled")
+
+# Key of the job result stored for validations recorded in the timeline
+TIMELINE_RESULT_KEY = "validation_timeline"
+
+# PostgreSQL sequence job change_seq values are drawn from
+CHANGE_SEQ_SEQUENCE = "job_queue_change_seq"
+# First key of the advisory locks that mark transactions drawing change_seq values
+CHANGE_SEQ_LOCK_SPACE = 720530
+
+def extract_search_keys(parameters: Optional[Dict[str, Any]]) -> Dict[str, Optional[str]]:
+    """
+    Extract the indexed search columns from job parameters.
+    Evotel jobs may still send the legacy serial_number parameter.
+    """
+    parameters = parameters if isinstance(parameters, dict) else {}
+    keys = {}
+    for column, names in (("circuit_number", ("circuit_number", "serial_number")), ("solution_id", ("solution_id",))):
+        value = next((parameters[name] for name in names if parameters.get(name) not in (None, "")), None)
+        keys[column] = str(value).strip()[:100] if value is not None else None
+    return keys
+
+def job_columns(fields: Optional[List[str]] = None) -> List:
+    """
+    Resolve job field names to JobQueue columns for a projected query.
+    The id column is always included.
+    
+    Args:
+        fields: Field names to select, or None for every column
+        
+    Raises:
+        ValueError: If a field name is not a job_queue column
+    """
+    table_columns = JobQueue.__table__.columns
+    if fields is None:
+        return [getattr(JobQueue, column.name) for column in table_columns]
+    
+    unknown = [field for field in fields if field not in table_columns]
+    if unknown:
+        raise ValueError(f"Unknown job fields: {', '.join(unknown)}")
+    
+    selected = ["id"] + [field for field in fields if field != "id"]
+    return [getattr(JobQueue, field) for field in dict.fromkeys(selected)]
+
+# Database backends
+class DatabaseBackend:
+    """
+    Database-specific parts of the job store.
+    
+    Models and query functions in this module are shared by every backend;
+    a backend supplies engine setup, the job claim used by the dispatcher
+    and the history full-text index.
+    """
+    name = None
+    
+    def __init__(self, url: str):
+        self.url = url
+    
+    def create_engine(self) -> Engine:
+        """Create the SQLAlchemy engine for this backend."""
+        raise NotImplementedError
+    
+    def claim_pending_jobs(self, session, limit: int, lock_id: str) -> List[int]:
+        """
+        Lock up to limit dispatchable jobs for lock_id in one statement.
+        
+        Returns:
+            List[int]: IDs of the claimed jobs
+        """
+        raise NotImplementedError
+    
+    def create_history_search_index(self, conn):
+        """Create the full-text index over job_history.details if missing."""
+        raise NotImplementedError
+    
+    def prepare_change_seq(self, session):
+        """
+        Get the transaction ready to draw change_seq values; call before
+        next_change_seq() is used. No-op unless the backend needs it.
+        """
+        pass
+    
+    def next_change_seq(self):
+        """
+        SQL expression for the next job change sequence number.
+        
+        SQLite allows a single writer, so one more than the highest stamped
+        value becomes visible in the order it was assigned.
+        """
+        return select(func.coalesce(func.max(JobQueue.change_seq), 0) + 1).scalar_subquery()
+    
+    def init_change_seq(self, conn):
+        """Create or advance whatever next_change_seq() draws from."""
+        pass
+    
+    def change_feed_horizon(self, session) -> Optional[int]:
+        """
+        Highest change_seq the change feed may return: no later commit can
+        stamp a value at or below it. None if every visible value is safe.
+        """
+        return None
+    
+    def history_search_filter(self, phrase: str):
+        """Get a select of job IDs whose history details contain phrase."""
+        raise NotImplementedError
+
+def _dispatchable_jobs_query(limit: int):
+    """Select IDs of jobs ready to dispatch, highest priority and oldest first."""
+    now = datetime.datetime.utcnow()
+    return (
+        select(JobQueue.id)
+        .where(
+            (
+                (JobQueue.status == "pending") |
+                ((JobQueue.status == "retry_pending") & (JobQueue.scheduled_for <= now))
+            ) &
+            (JobQueue.lock_id.is_(None))
+        )
+        .order_by(JobQueue.priority.desc(), JobQueue.created_at.asc())
+        .limit(limit)
+    )
+
+class SQLiteBackend(DatabaseBackend):
+    """Single-file SQLite job store. One writer at a time, so one orchestrator."""
+    name = "sqlite"
+    
+    def create_engine(self) -> Engine:
+        # Ensure directory exists
+        database = make_url(self.url).database
+        if database and database != ":memory:":
+            Path(database).parent.mkdir(parents=True, exist_ok=True)
+        
+        # Create engine with connection pooling and improved settings
+        sqlite_engine = create_engine(
+            self.url,
+            poolclass=QueuePool,
+            pool_size=10,          # Increased from 5
+            max_overflow=20,       # Increased from 10
+            pool_timeout=30,
+            pool_recycle=1800,     # Reduced from 3600 (30 mins instead of 60)
+            pool_pre_ping=True,    # Added to test connections before use
+            connect_args={
+                "check_same_thread": False,  # Needed for SQLite
+                "timeout": 30  # SQLite timeout in seconds
+            }
+        )
+        event.listen(sqlite_engine, "connect", set_sqlite_pragma)
+        return sqlite_engine
+    
+    def claim_pending_jobs(self, session, limit: int, lock_id: str) -> List[int]:
+        # SQLite serialises writers, so a single UPDATE over the candidate
+        # subquery is atomic; the claimed rows are then read back by lock_id.
+        candidates = _dispatchable_jobs_query(limit).subquery()
+        session.execute(
+            update(JobQueue)
+            .where(JobQueue.id.in_(select(candidates.c.id)), JobQueue.lock_id.is_(None))
+            .values(lock_id=lock_id, locked_at=datetime.datetime.utcnow(), change_seq=next_change_seq())
+            .execution_options(synchronize_session=False)
+        )
+        return list(session.scalars(select(JobQueue.id).where(JobQueue.lock_id == lock_id)))
+    
+    def create_history_search_index(self, conn):
+        exists = conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'job_history_fts'"
+        )).first()
+        if exists:
+            return
+        
+        try:
+            conn.execute(text(
+                "CREATE VIRTUAL TABLE job_history_fts USING fts5("
+                "details, content='job_history', content_rowid='id')"
+            ))
+        except SQLAlchemyError as e:
+            logger.warning(f"FTS5 not available, history text search disabled: {str(e)}")
+            return
+        
+        conn.execute(text(
+            "CREATE TRIGGER job_history_fts_ai AFTER INSERT ON job_history BEGIN "
+            "INSERT INTO job_history_fts(rowid, details) VALUES (new.id, new.details); END"
+        ))
+        conn.execute(text(
+            "CREATE TRIGGER job_history_fts_ad AFTER DELETE ON job_history BEGIN "
+            "INSERT INTO job_history_fts(job_history_fts, rowid, details) VALUES ('delete', old.id, old.details); END"
+        ))
+        conn.execute(text(
+            "CREATE TRIGGER job_history_fts_au AFTER UPDATE ON job_history BEGIN "
+            "INSERT INTO job_history_fts(job_history_fts, rowid, details) VALUES ('delete', old.id, old.details); "
+            "INSERT INTO job_history_fts(rowid, details) VALUES (new.id, new.details); END"
+        ))
+        # Index rows written before the FTS table existed
+        conn.execute(text("INSERT INTO job_history_fts(job_history_fts) VALUES ('rebuild')"))
+        logger.info("Created full-text index over job history")
+    
+    def history_search_filter(self, phrase: str):
+        # Quote as a single FTS5 phrase so user input cannot inject query syntax
+        quoted = '"' + phrase.replace('"', '""') + '"'
+        return text(
+            "SELECT job_id FROM job_history WHERE id IN "
+            "(SELECT rowid FROM job_history_fts WHERE job_history_fts MATCH :phrase)"
+        ).bindparams(phrase=quoted).columns(job_id=Integer)
+
+class PostgresBackend(DatabaseBackend):
+    """
+    PostgreSQL job store. Several orchestrator replicas can share it: each
+    claims jobs with FOR UPDATE SKIP LOCKED, so concurrent pollers take
+    disjoint batches instead of blocking on the same rows.
+    """
+    name = "postgresql"
+    
+    def create_engine(self) -> Engine:
+        return create_engine(
+            self.url,
+            pool_size=10,
+            max_overflow=20,
+            pool_timeout=30,
+            pool_recycle=1800,
+            pool_pre_ping=True
+        )
+    
+    def claim_pending_jobs(self, session, limit: int, lock_id: str) -> List[int]:
+        candidates = _dispatchable_jobs_query(limit).with_for_update(skip_locked=True).scalar_subquery()
+        self.prepare_change_seq(session)
+        result = session.execute(
+            update(JobQueue)
+            .where(JobQueue.id.in_(candidates))
+            .values(lock_id=lock_id, locked_at=datetime.datetime.utcnow(), change_seq=next_change_seq())
+            .returning(JobQueue.id)
+            .execution_options(synchronize_session=False)
+        )
+        return [row.id for row in result]
+    
+    def create_history_search_index(self, conn):
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_job_history_details_fts ON job_history "
+            "USING gin (to_tsvector('simple', coalesce(details, '')))"
+        ))
+    
+    def prepare_change_seq(self, session):
+        # Hold a shared advisory lock keyed by a value drawn now until the transaction
+        # ends: every change_seq it stamps afterwards is larger, so change_feed_horizon
+        # can see which values may still commit. Shared locks never wait on each other.
+        transaction = session.get_transaction()
+        if transaction is not None and session.info.get("change_seq_marker") is transaction:
+            return
+        session.execute(text(
+            f"SELECT pg_advisory_xact_lock_shared({CHANGE_SEQ_LOCK_SPACE}, nextval('{CHANGE_SEQ_SEQUENCE}')::integer)"
+        ))
+        session.info["change_seq_marker"] = transaction
+    
+    def next_change_seq(self):
+        # Writers draw without waiting for each other; values may commit out
+        # of order, which change_feed_horizon accounts for
+        return Sequence(CHANGE_SEQ_SEQUENCE).next_value()
+    
+    def init_change_seq(self, conn):
+        conn.execute(text(f"CREATE SEQUENCE IF NOT EXISTS {CHANGE_SEQ_SEQUENCE}"))
+        # Continue after values stamped before the sequence existed
+        conn.execute(text(
+            f"SELECT setval('{CHANGE_SEQ_SEQUENCE}', stamped.max_seq + 1, false) "
+            f"FROM (SELECT coalesce(max(change_seq), 0) AS max_seq FROM job_queue) stamped, {CHANGE_SEQ_SEQUENCE} seq "
+            "WHERE seq.last_value <= stamped.max_seq"
+        ))
+    
+    def change_feed_horizon(self, session) -> Optional[int]:
+        # Derived from the database alone, so every replica answers the same from
+        # its first poll. The markers are read after the sequence: a writer that
+        # stamped a value at or below drawn took its marker before that value.
+        drawn = session.execute(text(
+            f"SELECT CASE WHEN is_called THEN last_value ELSE last_value - 1 END FROM {CHANGE_SEQ_SEQUENCE}"
+        )).scalar()
+        lowest_marker = session.execute(text(
+            "SELECT min(objid::bigint) FROM pg_locks "
+            "WHERE locktype = 'advisory' AND objsubid = 2 AND classid::bigint = :space "
+            "AND database = (SELECT oid FROM pg_database WHERE datname = current_database())"
+        ).bindparams(space=CHANGE_SEQ_LOCK_SPACE)).scalar()
+        return drawn if lowest_marker is None else min(drawn, lowest_marker - 1)
+    
+    def history_search_filter(self, phrase: str):
+        return text(
+            "SELECT job_id FROM job_history "
+            "WHERE to_tsvector('simple', coalesce(details, '')) @@ phraseto_tsquery('simple', :phrase)"
+        ).bindparams(phrase=phrase).columns(job_id=Integer)
+
+BACKENDS = {
+    "sqlite": SQLiteBackend,
+    "postgresql": PostgresBackend,
+}
+
+def get_backend(url: Optional[str] = None) -> DatabaseBackend:
+    """
+    Get the backend for a database URL.
+    
+    Args:
+        url: SQLAlchemy database URL, defaults to Config.DATABASE_URL
+        
+    Raises:
+        ValueError: If the URL's database is not supported
+    """
+    url = url or Config.DATABASE_URL
+    backend_name = make_url(url).get_backend_name()
+    if backend_name not in BACKENDS:
+        raise ValueError(f"Unsupported database backend: {backend_name}")
+    return BACKENDS[backend_name](url)
+
 # Engine and session setup
 def create_db_engine():
     """Create SQLAlchemy engine for database connection."""
-    # Ensure directory exists
-    Path(Config.DB_DIR).mkdir(parents=True, exist_ok=True)
-    
-    # Create SQLite URL
-    db_url = f"sqlite:///{Config.DB_PATH}"
-    
-    # Create engine with connection pooling and improved settings
-    engine = create_engine(
-        db_url,
-        poolclass=QueuePool,
-        pool_size=10,          # Increased from 5
-        max_overflow=20,       # Increased from 10
-        pool_timeout=30,
-        pool_recycle=1800,     # Reduced from 3600 (30 mins instead of 60)
-        pool_pre_ping=True,    # Added to test connections before use
-        connect_args={
-            "check_same_thread": False,  # Needed for SQLite
-            "timeout": 30  # SQLite timeout in seconds
-        }
-    )
-    
-    return engine
+    return backend.create_engine()
 
 # Create engine and session factory
+backend = get_backend()
 engine = create_db_engine()
 session_factory = sessionmaker(bind=engine)
+
+def next_change_seq():
+    """
+    SQL expression for the next job change sequence number, evaluated inside
+    the writing statement. Call backend.prepare_change_seq(session) first.
+    """
+    return backend.next_change_seq()
+
+@event.listens_for(session_factory, "before_flush")
+def assign_change_seq(session, flush_context, instances):
+    """Stamp new and modified jobs with the next change sequence number."""
+    changed_jobs = [
+        obj for obj in list(session.new) + list(session.dirty)
+        if isinstance(obj, JobQueue) and (obj in session.new or session.is_modified(obj, include_collections=False))
+    ]
+    if not changed_jobs:
+        return
+    
+    backend.prepare_change_seq(session)
+    mark_jobs_changed(session, [job.id for job in changed_jobs if job.id is not None])
+    for job in changed_jobs:
+        job.change_seq = next_change_seq()
+
+# Callbacks run after a commit that changed jobs, with the IDs of the
+# changed existing jobs (see job_events and job_cache)
+_job_change_listeners: List[Callable[[List[int]], None]] = []
+
+def add_job_change_listener(callback: Callable[[List[int]], None]):
+    """Register a callback to run after every commit that changes jobs."""
+    _job_change_listeners.append(callback)
+
+def mark_jobs_changed(session, job_ids: List[int]):
+    """Record jobs changed in a session; the job change listeners run when it commits."""
+    session.info.setdefault("changed_job_ids", set()).update(job_ids)
+
+@event.listens_for(session_factory, "after_commit")
+def notify_job_change_listeners(session):
+    """Run the job change listeners once the changes are visible to other sessions."""
+    job_ids = session.info.pop("changed_job_ids", None)
+    if job_ids is None:
+        return
+    for callback in list(_job_change_listeners):
+        try:
+            callback(list(job_ids))
+        except Exception as e:
+            logger.error(f"Job change listener failed: {str(e)}")
+
+@event.listens_for(session_factory, "after_rollback")
+def discard_changed_job_ids(session):
+    """Forget the recorded changes when they were rolled back."""
+    session.info.pop("changed_job_ids", None)
+
 SessionLocal = scoped_session(session_factory)
 
 @contextmanager
@@ -195,16 +635,176 @@ def init_db():
         bool: True if initialization was successful, False otherwise
     """
     try:
+        # Rebuild legacy tables whose constraints cannot be altered in place
+        _migrate_screenshot_table()
+        
         # Create tables if they don't exist
         Base.metadata.create_all(engine)
+        added_columns = _add_missing_columns()
+        if "job_queue.circuit_number" in added_columns:
+            filled = backfill_job_search_keys()
+            logger.info(f"Backfilled search columns for {filled} existing jobs")
+        if "job_queue.change_seq" in added_columns:
+            # Existing rows enter the change feed in creation order
+            with engine.begin() as conn:
+                conn.execute(text("UPDATE job_queue SET change_seq = id WHERE change_seq IS NULL"))
+        with engine.begin() as conn:
+            backend.init_change_seq(conn)
+        _create_history_search_index()
         logger.info("Database tables created or verified")
+        
+        moved = externalize_legacy_screenshots()
+        if moved:
+            logger.info(f"Moved {moved} legacy screenshots to the screenshot store")
         return True
     except Exception as e:
         logger.error(f"Database initialization error: {str(e)}")
         return False
 
+def _add_missing_columns() -> List[str]:
+    """
+    Add columns and indexes defined on the models but missing from existing tables.
+    
+    Returns:
+        List[str]: Added columns as "table.column"
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+    
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                added.append(f"{table.name}.{column.name}")
+                logger.info(f"Added missing column {table.name}.{column.name}")
+            
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+    
+    return added
+
+def _create_history_search_index():
+    """Create the backend's full-text index over job_history.details."""
+    with engine.begin() as conn:
+        backend.create_history_search_index(conn)
+
+def backfill_job_search_keys(batch_size: int = 1000) -> int:
+    """
+    Populate circuit_number and solution_id for jobs created before the
+    search columns existed.
+    
+    Returns:
+        int: Number of jobs updated
+    """
+    updated = 0
+    last_id = 0
+    
+    while True:
+        with db_session() as session:
+            rows = (
+                session.query(JobQueue.id, JobQueue.parameters)
+                .filter(JobQueue.id > last_id, JobQueue.circuit_number.is_(None))
+                .order_by(JobQueue.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                return updated
+            
+            mappings = []
+            for job_id, parameters in rows:
+                last_id = job_id
+                keys = extract_search_keys(parameters)
+                if keys["circuit_number"] or keys["solution_id"]:
+                    mappings.append({"id": job_id, **keys})
+            
+            if mappings:
+                session.bulk_update_mappings(JobQueue, mappings)
+                updated += len(mappings)
+
+def _migrate_screenshot_table():
+    """
+    Rebuild a legacy job_screenshots table where image_data is NOT NULL.
+    
+    SQLite cannot drop a NOT NULL constraint in place, so the table is renamed,
+    recreated from the model and the rows copied across.
+    """
+    inspector = inspect(engine)
+    if Screenshot.__tablename__ not in inspector.get_table_names():
+        return
+    
+    columns = {column["name"]: column for column in inspector.get_columns(Screenshot.__tablename__)}
+    if "image_data" not in columns or columns["image_data"]["nullable"]:
+        return
+    
+    logger.info("Migrating job_screenshots table to content-addressed storage schema")
+    shared_columns = ", ".join(c.name for c in Screenshot.__table__.columns if c.name in columns)
+    
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE job_screenshots RENAME TO job_screenshots_legacy"))
+        for index in inspect(conn).get_indexes("job_screenshots_legacy"):
+            conn.execute(text(f"DROP INDEX IF EXISTS {index['name']}"))
+        Screenshot.__table__.create(conn)
+        conn.execute(text(
+            f"INSERT INTO job_screenshots ({shared_columns}) "
+            f"SELECT {shared_columns} FROM job_screenshots_legacy"
+        ))
+        conn.execute(text("DROP TABLE job_screenshots_legacy"))
+
+def externalize_legacy_screenshots(batch_size: int = 200) -> int:
+    """
+    Move base64 screenshots still held in the database into the screenshot store.
+    
+    Args:
+        batch_size: Number of rows to migrate per transaction
+        
+    Returns:
+        int: Number of screenshots moved
+    """
+    moved = 0
+    last_id = 0
+    
+    while True:
+        with db_session() as session:
+            rows = (
+                session.query(Screenshot)
+                .filter(
+                    Screenshot.id > last_id,
+                    Screenshot.content_hash.is_(None),
+                    Screenshot.image_data.isnot(None)
+                )
+                .order_by(Screenshot.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                return moved
+            
+            for screenshot in rows:
+                last_id = screenshot.id
+                try:
+                    content_hash, size = screenshot_store.put_base64(screenshot.image_data)
+                except screenshot_store.ScreenshotStoreError as e:
+                    logger.warning(f"Leaving screenshot {screenshot.id} in database: {str(e)}")
+                    continue
+                
+                screenshot.content_hash = content_hash
+                screenshot.size_bytes = size
+                screenshot.image_data = None
+                moved += 1
+
 def recover_database():
     """Try to recover database from WAL files if present."""
+    if backend.name != "sqlite":
+        return True
     try:
         import sqlite3
         # Connect directly to the database file
@@ -218,16 +818,32 @@ def recover_database():
         logger.error(f"Database recovery failed: {str(e)}")
         return False
 
-def to_dict(model) -> Dict:
-    """Convert SQLAlchemy model to dictionary."""
+def to_dict(model, fields: Optional[List[str]] = None) -> Dict:
+    """
+    Convert SQLAlchemy model to dictionary.
+    
+    Args:
+        model: Model instance
+        fields: Optional column names to include; reading only these avoids
+            loading deferred columns that are not needed
+    """
     result = {}
-    for column in model.__table__.columns:
-        value = getattr(model, column.name)
+    names = fields if fields is not None else [column.name for column in model.__table__.columns]
+    for name in names:
+        value = getattr(model, name)
         # Handle datetime objects
         if isinstance(value, datetime.datetime):
-            result[column.name] = value.isoformat()
+            result[name] = value.isoformat()
         else:
-            result[column.name] = value
+            result[name] = value
+    return result
+
+def row_to_dict(row) -> Dict:
+    """Convert a column-projected query row to dictionary."""
+    result = row._asdict()
+    for key, value in result.items():
+        if isinstance(value, datetime.datetime):
+            result[key] = value.isoformat()
     return result
 
 def get_pending_jobs(limit: int = 10) -> List[Dict]:
@@ -236,6 +852,7 @@ def get_pending_jobs(limit: int = 10) -> List[Dict]:
         now = datetime.datetime.utcnow()
         jobs = (
             session.query(JobQueue)
+            .options(undefer_group("payload"))
             .filter(
                 (
                     (JobQueue.status == "pending") |
@@ -249,6 +866,36 @@ def get_pending_jobs(limit: int = 10) -> List[Dict]:
         )
         return [to_dict(job) for job in jobs]
 
+def claim_pending_jobs(limit: int, lock_id: str) -> List[Dict]:
+    """
+    Atomically lock a batch of dispatchable jobs for this orchestrator.
+    
+    Replaces get_pending_jobs + acquire_job_lock per job: the claim is a single
+    statement, and on PostgreSQL concurrent orchestrators skip each other's
+    locked rows rather than competing for them.
+    
+    Args:
+        limit: Maximum number of jobs to claim
+        lock_id: Lock identifier recorded on every claimed job
+        
+    Returns:
+        List[Dict]: Claimed jobs, highest priority first
+    """
+    with db_session() as session:
+        job_ids = backend.claim_pending_jobs(session, limit, lock_id)
+        if not job_ids:
+            return []
+        mark_jobs_changed(session, job_ids)
+        
+        jobs = (
+            session.query(JobQueue)
+            .options(undefer_group("payload"))
+            .filter(JobQueue.id.in_(job_ids))
+            .order_by(JobQueue.priority.desc(), JobQueue.created_at.asc())
+            .all()
+        )
+        return [to_dict(job) for job in jobs]
+
 def create_job(
     provider: str, 
     action: str, 
@@ -268,7 +915,8 @@ def create_job(
             priority=priority,
             retry_count=retry_count,
             max_retries=max_retries,
-            status="pending"  # Ensure status is explicitly set
+            status="pending",  # Ensure status is explicitly set
+            **extract_search_keys(parameters)
         )
         session.add(job)
         session.flush()  # Flush to get the job ID
@@ -295,11 +943,17 @@ def update_job_status(
     status: str, 
     result: Optional[Dict] = None, 
     evidence: Optional[List[str]] = None, 
-    assigned_worker: Optional[str] = None
+    assigned_worker: Optional[str] = None,
+    outcome: Optional[str] = None
 ) -> Optional[Dict]:
-    """Update job status in the database."""
+    """
+    Update job status in the database.
+    
+    Args:
+        outcome: Provider status outcome to index for search, set when the job finishes
+    """
     with db_session() as session:
-        job = session.query(JobQueue).filter(JobQueue.id == job_id).first()
+        job = session.query(JobQueue).options(undefer_group("payload")).filter(JobQueue.id == job_id).first()
         if not job:
             return None
         
@@ -308,7 +962,7 @@ def update_job_status(
         if status == "started" or status == "running":
             job.started_at = datetime.datetime.utcnow()
         
-        if status in ["completed", "failed", "error", "cancelled"]:
+        if status in TERMINAL_STATUSES:
             job.completed_at = datetime.datetime.utcnow()
         
         # Handle screenshot data before assigning result
@@ -324,11 +978,34 @@ def update_job_status(
         if assigned_worker is not None:
             job.assigned_worker = assigned_worker
         
+        if outcome is not None:
+            job.outcome = outcome[:100]
+        
+        # Fill search columns the job was created without, e.g. a solution ID found by the automation
+        if isinstance(result, dict) and (job.circuit_number is None or job.solution_id is None):
+            for column, value in extract_search_keys(result).items():
+                if value and getattr(job, column) is None:
+                    setattr(job, column, value)
+        
         # Add history entry
         details = f"Job status changed to {status}"
+        timeline_entry = None
+        if status == "completed" and job.action == "validation" and job.circuit_number and isinstance(result, dict):
+            timeline_entry = _record_validation_result(session, job, result)
+        
+        if timeline_entry is not None:
+            # The timeline holds the result; the job keeps a reference, resolved when read
+            job.result = {TIMELINE_RESULT_KEY: {
+                "circuit_number": job.circuit_number,
+                "provider": job.provider,
+                "seq": timeline_entry["seq"]
+            }}
+            details += f" with validation timeline entry {timeline_entry['seq']}: {timeline_entry['summary']}"
         if result:
-            result_str = json.dumps(result)
-            details += f" with result summary: {result_str[:100]}..." if len(result_str) > 100 else f" with result: {result_str}"
+            # Kept for timeline entries too: history text search finds outcomes by it
+            result_str = json_codec.dumps(result)
+            separator = ";" if timeline_entry is not None else " with"
+            details += f"{separator} result summary: {result_str[:100]}..." if len(result_str) > 100 else f"{separator} result: {result_str}"
             
         history = JobHistory(
             job_id=job.id,
@@ -339,23 +1016,271 @@ def update_job_status(
         
         # Process screenshot data if provided
         if screenshot_data:
-            for screenshot_info in screenshot_data:
-                # Skip if missing required fields
-                if 'base64_data' not in screenshot_info or 'name' not in screenshot_info:
-                    continue
-                    
-                screenshot = Screenshot(
-                    job_id=job_id,
-                    name=screenshot_info["name"],
-                    mime_type=screenshot_info.get("mime_type", "image/png"),
-                    description=screenshot_info.get("description", None),
-                    image_data=screenshot_info["base64_data"]
-                )
-                session.add(screenshot)
+            count = _add_screenshots(session, job_id, screenshot_data)
+            logger.info(f"Saved {count} screenshots for job {job_id}")
+        
+        job_dict = to_dict(job)
+        if timeline_entry is not None:
+            job_dict["result"] = timeline_entry["document"]
+        return job_dict
+
+def _latest_timeline_entry(session, circuit_number: str, provider: str) -> Optional[ValidationTimeline]:
+    return (
+        session.query(ValidationTimeline)
+        .filter(ValidationTimeline.circuit_number == circuit_number, ValidationTimeline.provider == provider)
+        .order_by(ValidationTimeline.seq.desc())
+        .first()
+    )
+
+def _reconstruct(session, circuit_number: str, provider: str, seq: int) -> Optional[Dict]:
+    """Rebuild the result at seq from the nearest keyframe at or before it."""
+    keyframe_seq = (
+        session.query(func.max(ValidationTimeline.seq))
+        .filter(
+            ValidationTimeline.circuit_number == circuit_number,
+            ValidationTimeline.provider == provider,
+            ValidationTimeline.seq <= seq,
+            ValidationTimeline.is_keyframe.is_(True)
+        )
+        .scalar()
+    )
+    if keyframe_seq is None:
+        return None
+    
+    entries = (
+        session.query(ValidationTimeline.seq, ValidationTimeline.data)
+        .filter(
+            ValidationTimeline.circuit_number == circuit_number,
+            ValidationTimeline.provider == provider,
+            ValidationTimeline.seq >= keyframe_seq,
+            ValidationTimeline.seq <= seq
+        )
+        .order_by(ValidationTimeline.seq)
+        .all()
+    )
+    if not entries or entries[-1].seq != seq:
+        return None
+    
+    document = entries[0].data
+    for entry in entries[1:]:
+        document = result_diff.apply(document, entry.data)
+    return document
+
+def timeline_reference(result: Any) -> Optional[Dict]:
+    """Get the timeline entry a stored job result refers to, if it is a reference."""
+    if isinstance(result, dict) and len(result) == 1 and isinstance(result.get(TIMELINE_RESULT_KEY), dict):
+        return result[TIMELINE_RESULT_KEY]
+    return None
+
+def _resolve_results(session, jobs: List[Dict]) -> List[Dict]:
+    """
+    Replace validation timeline references in job results with the results
+    they stand for. A reference whose entries cannot be read is left as is.
+    """
+    for job in jobs:
+        reference = timeline_reference(job.get("result"))
+        if reference is None:
+            continue
+        try:
+            document = _reconstruct(session, reference["circuit_number"], reference["provider"], reference["seq"])
+        except (KeyError, result_diff.PatchError) as e:
+            logger.warning(f"Could not rebuild result of job {job.get('id')} from its timeline: {str(e)}")
+            continue
+        if document is not None:
+            job["result"] = document
+    return jobs
+
+def _record_validation_result(session, job: JobQueue, result: Dict) -> Optional[Dict]:
+    """
+    Append a completed validation result to its circuit's timeline.
+    
+    The first result and every VALIDATION_KEYFRAME_INTERVAL-th are stored in
+    full, the rest as a diff against the previous result. Failures are logged
+    and never fail the status update.
+    
+    Returns:
+        Dict with seq, a change summary and the recorded document, or None if
+        nothing was recorded
+    """
+    # Normalise through JSON so the stored form reconstructs to an identical document
+    document = json_codec.loads(json_codec.dumps(result))
+    
+    try:
+        with session.begin_nested():
+            previous = _latest_timeline_entry(session, job.circuit_number, job.provider)
+            seq = previous.seq + 1 if previous else 1
+            
+            patch = None
+            if previous is not None:
+                previous_document = _reconstruct(session, job.circuit_number, job.provider, previous.seq)
+                if previous_document is not None:
+                    patch = result_diff.diff(previous_document, document)
+            
+            changes = result_diff.significant_changes(patch) if patch is not None else []
+            is_keyframe = (
+                patch is None
+                or (seq - 1) % Config.VALIDATION_KEYFRAME_INTERVAL == 0
+                or len(json_codec.dumps(patch)) >= len(json_codec.dumps(document))
+            )
             
-            logger.info(f"Saved {len(screenshot_data)} screenshots for job {job_id}")
+            session.add(ValidationTimeline(
+                provider=job.provider,
+                circuit_number=job.circuit_number,
+                seq=seq,
+                job_id=job.id,
+                is_keyframe=is_keyframe,
+                data=document if is_keyframe else patch,
+                change_count=len(changes)
+            ))
+    except (SQLAlchemyError, result_diff.PatchError) as e:
+        logger.warning(f"Could not record validation timeline for job {job.id}: {str(e)}")
+        return None
+    
+    if previous is None:
+        summary = "first validation"
+    elif not changes:
+        summary = "no changes"
+    else:
+        paths = ", ".join(".".join(str(key) for key in change["path"]) for change in changes[:10])
+        summary = f"{len(changes)} changes ({paths})"
+    return {"seq": seq, "summary": summary, "document": document}
+
+def get_validation_timeline(
+    circuit_number: str,
+    provider: Optional[str] = None,
+    limit: int = 100
+) -> List[Dict]:
+    """
+    List a circuit's validation timeline entries, newest first, without their data.
+    
+    Args:
+        circuit_number: Circuit number
+        provider: Provider name, defaults to the provider of the most recent validation
+        limit: Maximum number of entries to return
+    """
+    with db_session() as session:
+        provider = provider.lower() if provider else _timeline_provider(session, circuit_number)
+        if provider is None:
+            return []
+        
+        rows = (
+            session.query(
+                ValidationTimeline.seq,
+                ValidationTimeline.provider,
+                ValidationTimeline.circuit_number,
+                ValidationTimeline.job_id,
+                ValidationTimeline.created_at,
+                ValidationTimeline.is_keyframe,
+                ValidationTimeline.change_count
+            )
+            .filter(ValidationTimeline.circuit_number == circuit_number, ValidationTimeline.provider == provider)
+            .order_by(ValidationTimeline.seq.desc())
+            .limit(limit)
+            .all()
+        )
+        return [row_to_dict(row) for row in rows]
+
+def _timeline_provider(session, circuit_number: str) -> Optional[str]:
+    """Get the provider of a circuit's most recent timeline entry."""
+    return (
+        session.query(ValidationTimeline.provider)
+        .filter(ValidationTimeline.circuit_number == circuit_number)
+        .order_by(ValidationTimeline.created_at.desc(), ValidationTimeline.id.desc())
+        .limit(1)
+        .scalar()
+    )
+
+def get_validation_result(circuit_number: str, seq: Optional[int] = None, provider: Optional[str] = None) -> Optional[Dict]:
+    """
+    Reconstruct a validation result from the circuit's timeline.
+    
+    Args:
+        circuit_number: Circuit number
+        seq: Timeline position, defaults to the latest
+        provider: Provider name, defaults to the provider of the most recent validation
+        
+    Returns:
+        Dict with seq, provider, job_id, created_at and the reconstructed result, or None
+    """
+    with db_session() as session:
+        provider = provider.lower() if provider else _timeline_provider(session, circuit_number)
+        if provider is None:
+            return None
+        
+        query = session.query(ValidationTimeline).filter(
+            ValidationTimeline.circuit_number == circuit_number,
+            ValidationTimeline.provider == provider
+        )
+        entry = (
+            query.filter(ValidationTimeline.seq == seq).first() if seq is not None
+            else query.order_by(ValidationTimeline.seq.desc()).first()
+        )
+        if entry is None:
+            return None
+        
+        return {
+            "circuit_number": circuit_number,
+            "provider": provider,
+            "seq": entry.seq,
+            "job_id": entry.job_id,
+            "created_at": entry.created_at.isoformat() if entry.created_at else None,
+            "result": _reconstruct(session, circuit_number, provider, entry.seq)
+        }
+
+def get_validation_changes(
+    circuit_number: str,
+    since_seq: Optional[int] = None,
+    provider: Optional[str] = None,
+    include_volatile: bool = False
+) -> Optional[Dict]:
+    """
+    Describe what changed in a circuit's latest validation.
+    
+    Args:
+        circuit_number: Circuit number
+        since_seq: Compare against this timeline position instead of the previous validation
+        provider: Provider name, defaults to the provider of the most recent validation
+        include_volatile: Also report run-specific fields such as timestamps
+        
+    Returns:
+        Dict with the compared positions, a changed flag and the list of changes,
+        or None if the circuit has no timeline
+    """
+    with db_session() as session:
+        provider = provider.lower() if provider else _timeline_provider(session, circuit_number)
+        if provider is None:
+            return None
+        
+        latest = _latest_timeline_entry(session, circuit_number, provider)
+        if latest is None:
+            return None
+        
+        base_seq = since_seq if since_seq is not None else latest.seq - 1
+        response = {
+            "circuit_number": circuit_number,
+            "provider": provider,
+            "current_seq": latest.seq,
+            "current_job_id": latest.job_id,
+            "current_at": latest.created_at.isoformat() if latest.created_at else None,
+            "previous_seq": base_seq if base_seq >= 1 else None,
+            "changed": False,
+            "changes": []
+        }
+        if base_seq < 1 or base_seq >= latest.seq:
+            return response
         
-        return to_dict(job)
+        previous_document = _reconstruct(session, circuit_number, provider, base_seq)
+        if previous_document is None:
+            return None
+        current_document = _reconstruct(session, circuit_number, provider, latest.seq)
+        
+        changes = result_diff.diff(previous_document, current_document, include_old=True)
+        if not include_volatile:
+            changes = result_diff.significant_changes(changes)
+        
+        response["changed"] = bool(result_diff.significant_changes(changes))
+        response["changes"] = changes
+        return response
 
 def update_job_retry_count(job_id: int, retry_count: int) -> bool:
     """Update job retry count."""
@@ -381,6 +1306,8 @@ def acquire_job_lock(job_id: int, lock_id: str) -> bool:
     with db_session() as session:
         try:
             # Try to update the job with our lock
+            backend.prepare_change_seq(session)
+            mark_jobs_changed(session, [job_id])
             result = (
                 session.query(JobQueue)
                 .filter(
@@ -390,8 +1317,9 @@ def acquire_job_lock(job_id: int, lock_id: str) -> bool:
                 )
                 .update({
                     "lock_id": lock_id,
-                    "locked_at": datetime.datetime.utcnow()
-                })
+                    "locked_at": datetime.datetime.utcnow(),
+                    "change_seq": next_change_seq()
+                }, synchronize_session=False)
             )
             
             # Return True if a row was updated (lock acquired)
@@ -400,7 +1328,12 @@ def acquire_job_lock(job_id: int, lock_id: str) -> bool:
             logger.error(f"Error acquiring job lock: {str(e)}")
             return False
 
-def release_job_lock(job_id: int, lock_id: str, status: str = "pending") -> bool:
+def release_job_lock(
+    job_id: int,
+    lock_id: str,
+    status: str = "pending",
+    scheduled_for: Optional[datetime.datetime] = None
+) -> bool:
     """
     Release a lock on a job.
     
@@ -408,6 +1341,7 @@ def release_job_lock(job_id: int, lock_id: str, status: str = "pending") -> bool
         job_id: ID of the job to unlock
         lock_id: Lock ID to verify ownership
         status: New status for the job
+        scheduled_for: Earliest time (naive UTC) a retry_pending job is claimed again
         
     Returns:
         bool: True if lock released, False otherwise
@@ -415,17 +1349,23 @@ def release_job_lock(job_id: int, lock_id: str, status: str = "pending") -> bool
     with db_session() as session:
         try:
             # Only release if we own the lock
+            backend.prepare_change_seq(session)
+            mark_jobs_changed(session, [job_id])
+            values = {
+                "lock_id": None,
+                "locked_at": None,
+                "status": status,
+                "change_seq": next_change_seq()
+            }
+            if scheduled_for is not None:
+                values["scheduled_for"] = scheduled_for
             result = (
                 session.query(JobQueue)
                 .filter(
                     JobQueue.id == job_id,
                     JobQueue.lock_id == lock_id
                 )
-                .update({
-                    "lock_id": None,
-                    "locked_at": None,
-                    "status": status
-                })
+                .update(values, synchronize_session=False)
             )
             
             # Return True if a row was updated (lock released)
@@ -454,8 +1394,9 @@ def recover_stale_locks(max_lock_age_minutes: int = 30) -> int:
                 .filter(
                     JobQueue.lock_id.isnot(None),
                     JobQueue.locked_at < cutoff_time,
-                    # Only recover jobs that are in a state that makes sense to recover
-                    JobQueue.status.in_(["dispatching", "running", "retry_pending"])
+                    # Only recover jobs that are in a state that makes sense to recover;
+                    # pending ones were claimed by a dispatcher that stopped before dispatching them
+                    JobQueue.status.in_(["pending", "dispatching", "running", "retry_pending"])
                 )
                 .all()
             )
@@ -543,18 +1484,89 @@ def update_user_last_login(username: str) -> bool:
             logger.error(f"Error updating user last login: {str(e)}")
             return False
 
-def get_job(job_id: int) -> Optional[Dict]:
-    """Get job details from the database."""
+def create_api_key(name: str, key_prefix: str, key_hash: str) -> Optional[Dict]:
+    """Store a new API key by its prefix and hash."""
     with db_session() as session:
-        job = session.query(JobQueue).filter(JobQueue.id == job_id).first()
-        if job:
-            job_dict = to_dict(job)
+        try:
+            api_key = ApiKey(name=name, key_prefix=key_prefix, key_hash=key_hash)
+            session.add(api_key)
+            session.flush()
+            return to_dict(api_key)
+        except SQLAlchemyError as e:
+            logger.error(f"Error creating API key: {str(e)}")
+            return None
+
+def get_api_keys_by_prefix(key_prefix: str) -> List[Dict]:
+    """Get the API keys whose key starts with key_prefix."""
+    with db_session() as session:
+        return [to_dict(api_key) for api_key in session.query(ApiKey).filter(ApiKey.key_prefix == key_prefix)]
+
+def list_api_keys() -> List[Dict]:
+    """List API keys without their hashes."""
+    with db_session() as session:
+        return [
+            to_dict(api_key, ["id", "name", "key_prefix", "disabled", "created_at"])
+            for api_key in session.query(ApiKey).order_by(ApiKey.id)
+        ]
+
+def set_api_key_disabled(api_key_id: int, disabled: bool = True) -> bool:
+    """Disable (revoke) or re-enable an API key."""
+    with db_session() as session:
+        try:
+            api_key = session.get(ApiKey, api_key_id)
+            if not api_key:
+                return False
+            api_key.disabled = disabled
+            return True
+        except SQLAlchemyError as e:
+            logger.error(f"Error updating API key {api_key_id}: {str(e)}")
+            return False
+
+def get_job(job_id: int, fields: Optional[List[str]] = None) -> Optional[Dict]:
+    """
+    Get job details from the database.
+    
+    Args:
+        job_id: ID of the job
+        fields: Optional list of job fields to return (see job_columns)
+    """
+    with db_session() as session:
+        row = session.query(*job_columns(fields)).filter(JobQueue.id == job_id).first()
+        if row:
+            job_dict = _resolve_results(session, [row_to_dict(row)])[0]
             # Ensure status is never None
-            if 'status' not in job_dict or job_dict['status'] is None:
+            if fields is None and job_dict.get('status') is None:
                 job_dict['status'] = "pending"
             return job_dict
         return None
 
+def get_job_version(job_id: int) -> Optional[int]:
+    """
+    Get a job's change_seq without reading the rest of the row.
+    
+    Returns:
+        The change_seq (0 if never stamped), or None if the job does not exist
+    """
+    with db_session() as session:
+        row = session.query(JobQueue.change_seq).filter(JobQueue.id == job_id).first()
+        if row is None:
+            return None
+        return row.change_seq or 0
+
+def get_jobs(job_ids: List[int], fields: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Get several jobs by ID in one query. Missing IDs are skipped.
+    
+    Args:
+        job_ids: IDs of the jobs
+        fields: Optional list of job fields to return (see job_columns)
+    """
+    if not job_ids:
+        return []
+    with db_session() as session:
+        rows = session.query(*job_columns(fields)).filter(JobQueue.id.in_(job_ids)).all()
+        return _resolve_results(session, [row_to_dict(row) for row in rows])
+
 def get_job_history(job_id: int) -> List[Dict]:
     """Get job history."""
     try:
@@ -598,9 +1610,14 @@ def get_job_history(job_id: int) -> List[Dict]:
 def get_job_by_external_id(external_job_id: str) -> Optional[Dict]:
     """Get job details from the database by external ID."""
     with db_session() as session:
-        job = session.query(JobQueue).filter(JobQueue.external_job_id == external_job_id).first()
+        job = (
+            session.query(JobQueue)
+            .options(undefer_group("payload"))
+            .filter(JobQueue.external_job_id == external_job_id)
+            .first()
+        )
         if job:
-            job_dict = to_dict(job)
+            job_dict = _resolve_results(session, [to_dict(job)])[0]
             # Ensure status is never None
             if 'status' not in job_dict or job_dict['status'] is None:
                 job_dict['status'] = "pending"
@@ -618,32 +1635,368 @@ def get_recent_metrics(limit: int = 24) -> List[Dict]:
         )
         return [to_dict(metric) for metric in metrics]
 
+def acquire_lease(role: str, holder: str, ttl_seconds: int) -> Optional[datetime.datetime]:
+    """
+    Acquire or renew the leader lease for a role.
+    
+    The lease is taken if it is free, expired or already held by holder.
+    
+    Args:
+        role: Lease role
+        holder: Instance ID of the caller
+        ttl_seconds: Lease lifetime from now
+        
+    Returns:
+        datetime: New expiry time if the caller holds the lease, None otherwise
+    """
+    now = datetime.datetime.utcnow()
+    expires_at = now + datetime.timedelta(seconds=ttl_seconds)
+    
+    with db_session() as session:
+        updated = (
+            session.query(LeaderLease)
+            .filter(
+                LeaderLease.role == role,
+                (LeaderLease.holder == holder) | (LeaderLease.expires_at < now)
+            )
+            .update({
+                "acquired_at": case((LeaderLease.holder == holder, LeaderLease.acquired_at), else_=now),
+                "holder": holder,
+                "renewed_at": now,
+                "expires_at": expires_at
+            }, synchronize_session=False)
+        )
+        if updated:
+            return expires_at
+        
+        if session.get(LeaderLease, role) is not None:
+            # Held by another instance
+            return None
+        
+        try:
+            session.add(LeaderLease(role=role, holder=holder, acquired_at=now, renewed_at=now, expires_at=expires_at))
+            session.flush()
+        except IntegrityError:
+            # Another instance created the lease first
+            session.rollback()
+            return None
+        
+        return expires_at
+
+def release_lease(role: str, holder: str) -> bool:
+    """Release a lease held by holder so another instance can take it immediately."""
+    with db_session() as session:
+        deleted = (
+            session.query(LeaderLease)
+            .filter(LeaderLease.role == role, LeaderLease.holder == holder)
+            .delete(synchronize_session=False)
+        )
+        return deleted > 0
+
+def get_leases() -> List[Dict]:
+    """Get all leader leases."""
+    with db_session() as session:
+        return [to_dict(lease) for lease in session.query(LeaderLease).order_by(LeaderLease.role).all()]
+
 def get_jobs_by_status(status: str, limit: int = 100, offset: int = 0) -> List[Dict]:
     """Get jobs by status with pagination."""
+    return list_jobs(status=status, limit=limit, offset=offset)
+
+def list_jobs(
+    status: Optional[str] = None,
+    limit: int = 100,
+    offset: int = 0,
+    fields: Optional[List[str]] = None
+) -> List[Dict]:
+    """
+    List jobs, newest first, selecting only the requested columns.
+    
+    Args:
+        status: Optional status filter
+        limit: Maximum number of jobs to return
+        offset: Number of jobs to skip
+        fields: Optional list of job fields to return (see job_columns);
+            JOB_SUMMARY_FIELDS lists jobs without decoding any JSON payloads
+    """
     with db_session() as session:
-        jobs = (
-            session.query(JobQueue)
-            .filter(JobQueue.status == status)
+        query = session.query(*job_columns(fields))
+        if status:
+            query = query.filter(JobQueue.status == status)
+        rows = (
+            query
             .order_by(JobQueue.created_at.desc())
             .offset(offset)
             .limit(limit)
             .all()
         )
-        return [to_dict(job) for job in jobs]
+        return _resolve_results(session, [row_to_dict(row) for row in rows])
+
+def iter_jobs(
+    status: Optional[str] = None,
+    limit: Optional[int] = 100,
+    offset: int = 0,
+    fields: Optional[List[str]] = None,
+    batch_size: int = 500,
+    provider: Optional[str] = None,
+    created_from: Optional[datetime.datetime] = None,
+    created_to: Optional[datetime.datetime] = None,
+    before_id: Optional[int] = None
+) -> Iterator[Dict]:
+    """
+    Like list_jobs, but yield jobs as they are read so that at most
+    batch_size rows are held in memory. Used for streamed listings and exports.
+    
+    The generator owns its session rather than the thread's scoped session,
+    because a streaming response may resume it on different threads.
+    
+    Args:
+        limit: Maximum number of jobs, or None for all matching jobs
+        provider: Optional provider filter
+        created_from: Only jobs created at or after this time (naive UTC)
+        created_to: Only jobs created before this time (naive UTC)
+        before_id: Only jobs that come after this job in the listing order
+            (created_at, id descending), to continue where a listing stopped
+    """
+    session = session_factory()
+    try:
+        query = session.query(*job_columns(fields))
+        if status:
+            query = query.filter(JobQueue.status == status)
+        if provider:
+            query = query.filter(JobQueue.provider == provider)
+        if created_from:
+            query = query.filter(JobQueue.created_at >= created_from)
+        if created_to:
+            query = query.filter(JobQueue.created_at < created_to)
+        if before_id:
+            # Compare against the stored value, not a round-tripped timestamp: SQLite
+            # compares timestamps as text, whose precision depends on how they were written
+            boundary = (
+                session.query(JobQueue.created_at)
+                .filter(JobQueue.id == before_id)
+                .scalar_subquery()
+            )
+            query = query.filter(
+                (JobQueue.created_at < boundary) |
+                ((JobQueue.created_at == boundary) & (JobQueue.id < before_id))
+            )
+        query = (
+            query
+            .order_by(JobQueue.created_at.desc(), JobQueue.id.desc())
+            .offset(offset)
+            .limit(limit)
+            .yield_per(batch_size)
+        )
+        for row in query:
+            yield _resolve_results(session, [row_to_dict(row)])[0]
+    finally:
+        session.close()
+
+def search_jobs(
+    circuit_number: Optional[str] = None,
+    solution_id: Optional[str] = None,
+    provider: Optional[str] = None,
+    outcome: Optional[str] = None,
+    status: Optional[str] = None,
+    text_query: Optional[str] = None,
+    limit: int = 100,
+    offset: int = 0,
+    fields: Optional[List[str]] = None
+) -> List[Dict]:
+    """
+    Search jobs by the indexed search columns and history text, newest first.
+    
+    Args:
+        circuit_number: Exact circuit number
+        solution_id: Exact solution ID
+        provider: Provider name
+        outcome: Provider status outcome, e.g. "Bitstream Validated"
+        status: Internal job status
+        text_query: Phrase to match in job history details (full-text index)
+        limit: Maximum number of jobs to return
+        offset: Number of jobs to skip
+        fields: Optional list of job fields to return (see job_columns)
+    """
+    with db_session() as session:
+        query = session.query(*job_columns(fields))
+        
+        if circuit_number:
+            query = query.filter(JobQueue.circuit_number == circuit_number.strip())
+        if solution_id:
+            query = query.filter(JobQueue.solution_id == solution_id.strip())
+        if provider:
+            query = query.filter(JobQueue.provider == provider.lower())
+        if outcome:
+            query = query.filter(JobQueue.outcome == outcome)
+        if status:
+            query = query.filter(JobQueue.status == status)
+        if text_query:
+            matching_jobs = backend.history_search_filter(text_query)
+            query = query.filter(JobQueue.id.in_(matching_jobs))
+        
+        rows = (
+            query
+            .order_by(JobQueue.created_at.desc())
+            .offset(offset)
+            .limit(limit)
+            .all()
+        )
+        return _resolve_results(session, [row_to_dict(row) for row in rows])
+
+def get_job_changes(
+    since_seq: int = 0,
+    since_id: int = 0,
+    limit: int = 100,
+    fields: Optional[List[str]] = None
+) -> List[Dict]:
+    """
+    Get jobs changed after a change feed position, in change order.
+    
+    A job appears once, at its latest change. The position is the
+    (change_seq, id) of the last row the caller has seen, so rows sharing a
+    change_seq are never skipped between pages. change_seq values may have
+    gaps, and on PostgreSQL rows are only returned up to the backend's
+    change_feed_horizon, so a change committed late is not passed over.
+    
+    Args:
+        since_seq: change_seq of the last row seen
+        since_id: id of the last row seen
+        limit: Maximum number of jobs to return
+        fields: Optional list of job fields to return; change_seq is always included
+    """
+    columns = job_columns(fields)
+    if fields is not None and "change_seq" not in fields:
+        columns.append(JobQueue.change_seq)
+    
+    with db_session() as session:
+        query = session.query(*columns)
+        horizon = backend.change_feed_horizon(session)
+        if horizon is not None:
+            query = query.filter(JobQueue.change_seq <= horizon)
+        rows = (
+            query
+            .filter(
+                (JobQueue.change_seq > since_seq) |
+                ((JobQueue.change_seq == since_seq) & (JobQueue.id > since_id))
+            )
+            .order_by(JobQueue.change_seq, JobQueue.id)
+            .limit(limit)
+            .all()
+        )
+        return _resolve_results(session, [row_to_dict(row) for row in rows])
 
 def get_jobs_count_by_status() -> Dict[str, int]:
-    """Get count of jobs by status."""
+    """Get count of jobs by status in a single grouped query."""
     with db_session() as session:
-        result = {}
-        for status in ["pending", "running", "completed", "failed", "error", "cancelled"]:
-            count = session.query(JobQueue).filter(JobQueue.status == status).count()
+        result = {status: 0 for status in ["pending", "running", "completed", "failed", "error", "cancelled"]}
+        for status, count in session.query(JobQueue.status, func.count(JobQueue.id)).group_by(JobQueue.status):
             result[status] = count
         return result
 
+def get_queue_depth_by_provider() -> Dict[str, Dict[str, int]]:
+    """
+    Count unfinished jobs per provider.
+    
+    Returns:
+        Dict mapping provider to {"queued": n, "running": n}; queued covers
+        pending and retry_pending jobs, running covers dispatching and running
+    """
+    with db_session() as session:
+        rows = (
+            session.query(JobQueue.provider, JobQueue.status, func.count(JobQueue.id))
+            .filter(JobQueue.status.in_(["pending", "retry_pending", "dispatching", "running"]))
+            .group_by(JobQueue.provider, JobQueue.status)
+        )
+        result = {}
+        for provider, status, count in rows:
+            depth = result.setdefault(provider, {"queued": 0, "running": 0})
+            depth["queued" if status in ("pending", "retry_pending") else "running"] += count
+        return result
+
+def get_recent_job_durations(sample_size: int = 500) -> Dict[str, Dict[str, float]]:
+    """
+    Average run time per provider over the most recently created finished jobs.
+    
+    Args:
+        sample_size: Number of recent finished jobs to look at
+        
+    Returns:
+        Dict mapping provider to {"avg_seconds": s, "samples": n}
+    """
+    with db_session() as session:
+        rows = (
+            session.query(JobQueue.provider, JobQueue.started_at, JobQueue.completed_at)
+            .filter(
+                JobQueue.status.in_(TERMINAL_STATUSES),
+                JobQueue.started_at.isnot(None),
+                JobQueue.completed_at.isnot(None)
+            )
+            .order_by(JobQueue.id.desc())
+            .limit(sample_size)
+            .all()
+        )
+    
+    totals: Dict[str, List[float]] = {}
+    for provider, started_at, completed_at in rows:
+        seconds = (completed_at - started_at).total_seconds()
+        if seconds >= 0:
+            totals.setdefault(provider, []).append(seconds)
+    return {
+        provider: {"avg_seconds": sum(values) / len(values), "samples": len(values)}
+        for provider, values in totals.items()
+    }
+
+def _add_screenshots(session, job_id: int, screenshot_data: List[Dict]) -> int:
+    """
+    Write screenshots to the screenshot store and add their metadata rows to the session.
+    Skips entries with missing fields and names already saved for the job.
+    
+    Returns:
+        int: Number of screenshots added
+    """
+    count = 0
+    
+    # Get existing screenshot names for this job to avoid duplicates
+    existing_names = {
+        name for (name,) in session.query(Screenshot.name).filter(Screenshot.job_id == job_id)
+    }
+    
+    for screenshot_info in screenshot_data:
+        # Skip if missing required fields
+        if 'base64_data' not in screenshot_info or 'name' not in screenshot_info:
+            logger.warning(f"Skipping screenshot with missing fields for job {job_id}")
+            continue
+        
+        # Skip duplicates based on name
+        if screenshot_info["name"] in existing_names:
+            logger.debug(f"Skipping duplicate screenshot '{screenshot_info['name']}' for job {job_id}")
+            continue
+        
+        try:
+            content_hash, size = screenshot_store.put_base64(screenshot_info["base64_data"])
+        except screenshot_store.ScreenshotStoreError as e:
+            logger.error(f"Error storing screenshot '{screenshot_info.get('name')}' for job {job_id}: {str(e)}")
+            continue
+        
+        screenshot = Screenshot(
+            job_id=job_id,
+            name=screenshot_info["name"],
+            mime_type=screenshot_info.get("mime_type", "image/png"),
+            description=screenshot_info.get("description"),
+            content_hash=content_hash,
+            size_bytes=size
+        )
+        session.add(screenshot)
+        existing_names.add(screenshot_info["name"])  # Update tracked names
+        count += 1
+    
+    return count
+
 def save_screenshots_for_job(job_id: int, screenshot_data: List[Dict]) -> int:
     """
     Save multiple screenshots for a job in a single transaction.
-    Checks for duplicates based on name and timestamp.
+    Image bytes go to the content-addressed screenshot store; only metadata
+    is written to the database. Checks for duplicates based on name.
     
     Args:
         job_id: ID of the job
@@ -655,72 +2008,102 @@ def save_screenshots_for_job(job_id: int, screenshot_data: List[Dict]) -> int:
     """
     with db_session() as session:
         try:
-            count = 0
-            
-            # Get existing screenshots for this job to avoid duplicates
-            existing_screenshots = session.query(Screenshot).filter(Screenshot.job_id == job_id).all()
-            existing_names = {s.name for s in existing_screenshots}
-            
-            for screenshot_info in screenshot_data:
-                # Skip if missing required fields
-                if 'base64_data' not in screenshot_info or 'name' not in screenshot_info:
-                    logger.warning(f"Skipping screenshot with missing fields for job {job_id}")
-                    continue
-                
-                # Skip duplicates based on name
-                if screenshot_info["name"] in existing_names:
-                    logger.debug(f"Skipping duplicate screenshot '{screenshot_info['name']}' for job {job_id}")
-                    continue
-                
-                try:
-                    # Create screenshot record
-                    screenshot = Screenshot(
-                        job_id=job_id,
-                        name=screenshot_info["name"],
-                        mime_type=screenshot_info.get("mime_type", "image/png"),
-                        description=screenshot_info.get("description"),
-                        image_data=screenshot_info["base64_data"]
-                    )
-                    
-                    session.add(screenshot)
-                    existing_names.add(screenshot_info["name"])  # Update tracked names
-                    count += 1
-                    
-                except SQLAlchemyError as e:
-                    logger.error(f"Error saving screenshot '{screenshot_info.get('name')}' for job {job_id}: {str(e)}")
-                    continue
-            
+            count = _add_screenshots(session, job_id, screenshot_data)
+            if count:
+                # Bump the job's change_seq so cached screenshot listings are rebuilt
+                backend.prepare_change_seq(session)
+                mark_jobs_changed(session, [job_id])
+                session.execute(
+                    update(JobQueue)
+                    .where(JobQueue.id == job_id)
+                    .values(change_seq=next_change_seq())
+                    .execution_options(synchronize_session=False)
+                )
             return count
         except SQLAlchemyError as e:
             logger.error(f"Error saving screenshots: {str(e)}")
             return 0
 
+# Screenshot columns returned without loading any image data
+_SCREENSHOT_METADATA_COLUMNS = (
+    Screenshot.id,
+    Screenshot.job_id,
+    Screenshot.name,
+    Screenshot.timestamp,
+    Screenshot.mime_type,
+    Screenshot.description,
+    Screenshot.content_hash,
+    Screenshot.size_bytes,
+)
+
 def get_job_screenshots(job_id: int, include_data: bool = False) -> List[Dict]:
     """
     Get screenshots associated with a job.
     
     Args:
         job_id: ID of the job
-        include_data: Whether to include the image data (can be large)
+        include_data: Whether to include the base64 image data (can be large)
         
     Returns:
         List[Dict]: List of screenshot metadata
     """
     with db_session() as session:
         try:
-            screenshots = session.query(Screenshot).filter(Screenshot.job_id == job_id).all()
+            columns = _SCREENSHOT_METADATA_COLUMNS
+            if include_data:
+                columns = columns + (Screenshot.image_data,)
+            
+            rows = (
+                session.query(*columns)
+                .filter(Screenshot.job_id == job_id)
+                .order_by(Screenshot.id)
+                .all()
+            )
             
             result = []
-            for screenshot in screenshots:
-                data = to_dict(screenshot)
-                
-                # Remove image_data if not requested to reduce payload size
-                if not include_data:
-                    data.pop('image_data', None)
-                    
+            for row in rows:
+                data = row_to_dict(row)
+                if include_data and data["content_hash"]:
+                    data["image_data"] = screenshot_store.read_base64(data["content_hash"])
                 result.append(data)
                 
             return result
         except SQLAlchemyError as e:
             logger.error(f"Error retrieving screenshots: {str(e)}")
-            return []
\ No newline at end of file
+            return []
+
+def get_screenshots_for_jobs(job_ids: List[int]) -> Dict[int, List[Dict]]:
+    """
+    Get screenshot metadata for several jobs in one query.
+    
+    Returns:
+        Dict mapping job ID to its screenshots in insertion order; jobs
+        without screenshots are absent
+    """
+    if not job_ids:
+        return {}
+    with db_session() as session:
+        rows = (
+            session.query(*_SCREENSHOT_METADATA_COLUMNS)
+            .filter(Screenshot.job_id.in_(job_ids))
+            .order_by(Screenshot.job_id, Screenshot.id)
+            .all()
+        )
+        result: Dict[int, List[Dict]] = {}
+        for row in rows:
+            data = row_to_dict(row)
+            result.setdefault(data["job_id"], []).append(data)
+        return result
+
+def get_screenshot(job_id: int, screenshot_id: int) -> Optional[Dict]:
+    """
+    Get a single screenshot's metadata, plus legacy base64 data for rows
+    not yet moved to the screenshot store.
+    """
+    with db_session() as session:
+        row = (
+            session.query(*_SCREENSHOT_METADATA_COLUMNS, Screenshot.image_data)
+            .filter(Screenshot.job_id == job_id, Screenshot.id == screenshot_id)
+            .first()
+        )
+        return row_to_dict(row) if row else None
@@ -0,0 +1,785 @@
+"""
+RPA Orchestration System - Dispatcher
+-------------------------------------
+Scheduler and dispatch side of the orchestrator: claims pending jobs from
+the job store, sends them to workers, polls workers for results and runs
+the periodic housekeeping duties.
+
+The API and the dispatcher share nothing but the job store. The API inserts
+pending jobs and reads their state; the dispatcher claims, dispatches and
+records results. Importing this module starts no threads, so API processes
+can import it for the shared status helpers.
+
+Usage:
+    python dispatcher.py                          # next to API processes started with ORCHESTRATOR_MODE=api
+    ORCHESTRATOR_MODE=combined python orchestrator.py   # dispatcher inside the single API process (default)
+"""
+import os
+import json
+import logging
+import datetime
+import threading
+import signal
+import sys
+import uuid
+import traceback
+from pathlib import Path
+from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from pydantic import BaseModel
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.jobstores.memory import MemoryJobStore
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+
+from config import Config
+import db
+from external_reports import send_external_report, determine_job_outcome
+from health_reporter import HealthReporter
+from leader_election import elector, leader_only, renew_leases, ROLE_DISPATCHER, ROLE_HOUSEKEEPING
+
+logger = logging.getLogger(__name__)
+
+PROCESS_STARTED_AT = datetime.datetime.now(datetime.UTC)
+
+# Created on first use so that importing the module has no side effects
+worker_pool: Optional[ThreadPoolExecutor] = None
+scheduler: Optional[BackgroundScheduler] = None
+_pool_lock = threading.Lock()
+# Dispatches submitted to worker_pool and not yet finished
+_in_flight = 0
+
+class SystemStatus(BaseModel):
+    status: str
+    uptime: str
+    queued_jobs: int
+    running_jobs: int
+    completed_jobs: int
+    failed_jobs: int
+    workers: Dict[str, str]
+    version: str = "1.0.0"
+
+def get_worker_pool() -> ThreadPoolExecutor:
+    """Get the thread pool that runs dispatches, creating it on first use."""
+    global worker_pool
+    with _pool_lock:
+        if worker_pool is None:
+            worker_pool = ThreadPoolExecutor(max_workers=Config.MAX_WORKERS, thread_name_prefix="dispatch")
+        return worker_pool
+
+def _run_dispatch(job, lock_id):
+    """Dispatch one claimed job on the pool, freeing its slot afterwards."""
+    global _in_flight
+    try:
+        dispatch_job(job, lock_id)
+    finally:
+        with _pool_lock:
+            _in_flight -= 1
+
+def create_jobstore():
+    """
+    Job store for the scheduler's own jobs.
+    
+    In memory by default: every job is re-registered at startup, so nothing
+    needs to survive a restart. SCHEDULER_JOBSTORE_URL selects a separate
+    database instead; it must not be the job database.
+    """
+    if Config.SCHEDULER_JOBSTORE_URL:
+        return SQLAlchemyJobStore(url=Config.SCHEDULER_JOBSTORE_URL)
+    return MemoryJobStore()
+
+@leader_only(ROLE_HOUSEKEEPING)
+def send_health_report():
+    """Send health report to OGGIES_LOG via ORDS."""
+    if not Config.HEALTH_REPORT_ENABLED:
+        return
+    
+    try:
+        reporter = HealthReporter(
+            endpoint=Config.HEALTH_REPORT_ENDPOINT,
+            server_type="Orchestrator",
+            db_path=Config.DB_PATH
+        )
+        
+        if reporter.send():
+            logger.info("Health report sent successfully")
+    except Exception as e:
+        logger.error(f"Error sending health report: {str(e)}")
+
+# Scheduler functions
+@leader_only(ROLE_DISPATCHER)
+def poll_job_queue():
+    """Poll the job queue for pending jobs and dispatch them to workers in parallel."""
+    global _in_flight
+    logger.info("POLLING JOB QUEUE - FUNCTION CALLED")
+    try:
+        # Claim no more than the pool can start now, so claimed jobs never wait
+        # in the pool's queue holding a lock
+        with _pool_lock:
+            free_slots = Config.MAX_WORKERS - _in_flight
+        batch_size = min(Config.BATCH_SIZE, free_slots)
+        if batch_size <= 0:
+            logger.info(f"All {Config.MAX_WORKERS} dispatch slots busy, not claiming jobs")
+            return
+        # Claim the whole batch in one statement; other orchestrators sharing
+        # the database skip these rows
+        lock_id = str(uuid.uuid4())
+        claimed_jobs = db.claim_pending_jobs(limit=batch_size, lock_id=lock_id)
+        logger.info(f"Claimed {len(claimed_jobs)} pending jobs")
+
+        pool = get_worker_pool()
+        for job in claimed_jobs:
+            with _pool_lock:
+                _in_flight += 1
+            pool.submit(_run_dispatch, job, lock_id)
+            logger.info(f"Dispatched job {job['id']} to worker pool")
+    except Exception as e:
+        logger.error(f"Error polling job queue: {str(e)}")
+        traceback.print_exc()
+ 
+def dispatch_job(job, lock_id=None):
+    """
+    Dispatch a job to a worker with improved error handling.
+    
+    Args:
+        job: Job dictionary
+        lock_id: Lock already held on the job (from claim_pending_jobs); a new lock is acquired if omitted
+    """
+    try:
+        job_id = job['id']
+        
+        if lock_id is None:
+            lock_id = str(uuid.uuid4())
+            if not db.acquire_job_lock(job_id, lock_id):
+                logger.warning(f"Could not acquire lock for job {job_id}, it may be in progress")
+                return
+        
+        try:
+            if not Config.WORKER_ENDPOINTS:
+                logger.error(f"No worker endpoints configured. Cannot dispatch job {job_id}")
+                db.release_job_lock(job_id, lock_id, "error")
+                db.update_job_status(
+                    job_id, 
+                    "error", 
+                    result={"error": "No worker endpoints configured"}
+                )
+                return
+            
+            # Check for responsive workers
+            available_workers = []
+            for endpoint in Config.WORKER_ENDPOINTS:
+                status_endpoint = endpoint.replace("/execute", "/health")
+                try:
+                    response = requests.get(status_endpoint, timeout=5)
+                    if response.status_code == 200:
+                        available_workers.append(endpoint)
+                except Exception:
+                    continue
+            
+            if not available_workers:
+                logger.warning(f"No responsive workers found, using round-robin on all workers")
+                worker_index = job_id % len(Config.WORKER_ENDPOINTS)
+                worker_endpoint = Config.WORKER_ENDPOINTS[worker_index]
+            else:
+                worker_index = job_id % len(available_workers)
+                worker_endpoint = available_workers[worker_index]
+                
+            logger.info(f"Selected worker endpoint for job {job_id}: {worker_endpoint}")
+            
+            db.update_job_status(
+                job_id, 
+                "dispatching", 
+                assigned_worker=worker_endpoint
+            )
+            
+            # Create job request
+            parameters = job["parameters"].copy()
+            if "external_job_id" not in parameters and job.get("external_job_id"):
+                parameters["external_job_id"] = job["external_job_id"]
+
+            job_request = {
+                "job_id": job_id,
+                "provider": job["provider"],
+                "action": job["action"],
+                "parameters": parameters
+            }
+            
+            try:
+                logger.info(f"Dispatching job {job_id} to worker: {worker_endpoint}")
+                execute_job_on_worker(job_request, worker_endpoint, lock_id)
+            except Exception as e:
+                logger.error(f"Error executing job {job_id} on worker: {str(e)}")
+                handle_job_error(job_id, str(e), lock_id)
+        except Exception as e:
+            db.release_job_lock(job_id, lock_id, "error")
+            logger.error(f"Error in dispatch job processing: {str(e)}")
+            raise
+    except Exception as e:
+        logger.error(f"Error in dispatch_job for job {job['id']}: {str(e)}")
+        logger.error(traceback.format_exc())
+
+@retry(
+    stop=stop_after_attempt(Config.MAX_RETRY_ATTEMPTS),
+    wait=wait_exponential(multiplier=1, min=1, max=60),
+    retry=retry_if_exception_type(requests.exceptions.RequestException)
+)
+def execute_job_on_worker(job_request, worker_endpoint, lock_id):
+    """Execute a job on a worker node with retry."""
+    try:
+        db.update_job_status(job_request["job_id"], "running")
+        job_id = job_request["job_id"]
+        
+        headers = {"Content-Type": "application/json"}
+        response = requests.post(
+            worker_endpoint,
+            json=job_request,
+            headers=headers,
+            timeout=Config.WORKER_TIMEOUT
+        )
+        
+        if response.status_code == 200:
+            result = response.json()
+            
+            # Extract screenshots if present
+            screenshot_data = []
+            if isinstance(result, dict) and isinstance(result.get("result"), dict):
+                screenshot_data = result.get("result", {}).get("screenshot_data", [])
+                
+                if screenshot_data:
+                    logger.info(f"Found {len(screenshot_data)} screenshots for job {job_id}")
+            
+            # Check for error status from worker
+            if result.get("status") == "error":
+                error_result = result.get("result", {})
+                
+                db.update_job_status(
+                    job_id,
+                    "failed",
+                    result=error_result,
+                    outcome=determine_job_outcome(job_id, "failed", error_result)
+                )
+                
+                if Config.CALLBACK_ENDPOINT:
+                    send_external_report(job_id, "failed", error_result)
+                
+                logger.error(f"Job {job_id} failed: {error_result.get('message', 'No error message')}")
+                
+                db.release_job_lock(job_id, lock_id, "failed")
+                return False
+            
+            # Process screenshots if available
+            if screenshot_data and isinstance(screenshot_data, list) and len(screenshot_data) > 0:
+                try:
+                    screenshot_count = db.save_screenshots_for_job(job_id, screenshot_data)
+                    logger.info(f"Saved {screenshot_count} screenshots for job {job_id}")
+                except Exception as screenshot_error:
+                    logger.error(f"Error saving screenshots for job {job_id}: {str(screenshot_error)}")
+            
+            # Check for internal result status
+            if isinstance(result.get("result"), dict) and result.get("result", {}).get("status") == "failure":
+                failure_result = result.get("result", {})
+                
+                db.update_job_status(
+                    job_id,
+                    "failed",
+                    result=failure_result,
+                    outcome=determine_job_outcome(job_id, "failed", failure_result)
+                )
+                
+                if Config.CALLBACK_ENDPOINT:
+                    send_external_report(job_id, "failed", failure_result)
+                
+                logger.error(f"Job {job_id} failed with internal status 'failure': {failure_result.get('message', 'No message')}")
+                
+                db.release_job_lock(job_id, lock_id, "failed")
+                return False
+            
+            # Job completed successfully
+            success_result = result.get("result", {})
+            
+            db.update_job_status(
+                job_id,
+                "completed",
+                result=success_result,
+                outcome=determine_job_outcome(job_id, "completed", success_result)
+            )
+            
+            if Config.CALLBACK_ENDPOINT:
+                send_external_report(job_id, "completed", success_result)
+            
+            logger.info(f"Job {job_id} completed successfully")
+            
+            db.release_job_lock(job_id, lock_id, "completed")
+            return True
+
+        elif response.status_code in (429, 503):
+            # Worker busy (see job_executor): the job never started, so it is not a
+            # retry; hold it back until the worker expects a free slot
+            try:
+                retry_after = max(int(response.headers.get("Retry-After", "")), 1)
+            except ValueError:
+                retry_after = Config.RETRY_DELAY
+            scheduled_for = datetime.datetime.utcnow() + datetime.timedelta(seconds=retry_after)
+            logger.warning(f"Worker {worker_endpoint} busy, requeueing job {job_id} in {retry_after}s")
+            db.release_job_lock(job_id, lock_id, "retry_pending", scheduled_for=scheduled_for)
+            return False
+
+        else:
+            error_result = {
+                "error": f"Worker returned {response.status_code}",
+                "response": response.text
+            }
+            
+            db.update_job_status(
+                job_id,
+                "failed",
+                result=error_result,
+                outcome=determine_job_outcome(job_id, "failed", error_result)
+            )
+            
+            if Config.CALLBACK_ENDPOINT:
+                send_external_report(job_id, "failed", error_result)
+            
+            logger.error(f"Job {job_id} failed: {response.status_code} - {response.text}")
+            
+            db.release_job_lock(job_id, lock_id, "failed")
+            return False
+            
+    except Exception as e:
+        logger.error(f"Error executing job {job_request['job_id']}: {str(e)}")
+        handle_job_error(job_request["job_id"], str(e), lock_id)
+        return False
+
+def handle_job_error(job_id, error_msg, lock_id):
+    """Handle job execution error with retry logic."""
+    try:
+        job = db.get_job(job_id)
+        if not job:
+            logger.error(f"Cannot find job {job_id} for error handling")
+            return
+            
+        retry_count = job["retry_count"] + 1
+        max_retries = job["max_retries"]
+        
+        if retry_count < max_retries:
+            scheduled_time = datetime.datetime.now(datetime.UTC) + datetime.timedelta(seconds=Config.RETRY_DELAY)
+            
+            db.update_job_status(
+                job_id, 
+                "retry_pending", 
+                result={"error": error_msg, "retry": retry_count, "max_retries": max_retries}
+            )
+            
+            db.update_job_retry_count(job_id, retry_count)
+            db.release_job_lock(job_id, lock_id, "retry_pending")
+            
+            logger.info(f"Job {job_id} scheduled for retry ({retry_count}/{max_retries})")
+        else:
+            error_result = {"error": error_msg, "retries_exhausted": True}
+            db.update_job_status(
+                job_id,
+                "error",
+                result=error_result,
+                outcome=determine_job_outcome(job_id, "error", error_result)
+            )
+            
+            db.release_job_lock(job_id, lock_id, "error")
+            
+            logger.error(f"Job {job_id} failed after {retry_count} retries")
+    except Exception as e:
+        try:
+            db.release_job_lock(job_id, lock_id, "error")
+        except:
+            pass
+        logger.error(f"Error handling job {job_id} failure: {str(e)}")
+
+@leader_only(ROLE_HOUSEKEEPING)
+def collect_metrics():
+    """Collect system metrics and store them in the database."""
+    try:
+        status = get_system_status()
+        
+        metrics_data = {
+            "queued_jobs": status.queued_jobs,
+            "running_jobs": status.running_jobs,
+            "completed_jobs": status.completed_jobs,
+            "failed_jobs": status.failed_jobs,
+            "workers": status.workers
+        }
+        
+        db.collect_system_metrics(metrics_data)
+        logger.debug("System metrics collected")
+    except Exception as e:
+        logger.error(f"Error collecting metrics: {str(e)}")
+
+@leader_only(ROLE_HOUSEKEEPING)
+def cleanup_old_evidence():
+    """Clean up old evidence files."""
+    try:
+        retention_days = Config.EVIDENCE_RETENTION_DAYS
+        cutoff_date = datetime.datetime.now(datetime.UTC) - datetime.timedelta(days=retention_days)
+        
+        evidence_dir = Path(Config.EVIDENCE_DIR)
+        for item in evidence_dir.glob("*"):
+            if item.is_dir():
+                stats = item.stat()
+                last_modified = datetime.datetime.fromtimestamp(stats.st_mtime)
+                
+                if last_modified < cutoff_date:
+                    job_id = item.name.split("_")[1] if "_" in item.name else None
+                    if job_id and job_id.isdigit():
+                        job = db.get_job(int(job_id))
+                        if not job:
+                            for file in item.glob("*"):
+                                file.unlink()
+                            item.rmdir()
+                            logger.info(f"Cleaned up old evidence for job {job_id}")
+    except Exception as e:
+        logger.error(f"Error cleaning up evidence: {str(e)}")
+
+@leader_only(ROLE_DISPATCHER)
+def recover_stale_jobs():
+    """Recover jobs with stale locks."""
+    try:
+        count = db.recover_stale_locks(max_lock_age_minutes=Config.WORKER_TIMEOUT // 60)
+        if count > 0:
+            logger.info(f"Recovered {count} jobs with stale locks")
+    except Exception as e:
+        logger.error(f"Error recovering stale jobs: {str(e)}")
+
+def get_uptime():
+    """Time since this process started."""
+    return str(datetime.datetime.now(datetime.UTC) - PROCESS_STARTED_AT)
+
+def check_worker_status(endpoint):
+    """Probe one worker's status endpoint."""
+    try:
+        status_endpoint = endpoint.replace("/execute", "/status")
+        response = requests.get(status_endpoint, timeout=5)
+        if response.status_code == 200:
+            return "online"
+        return f"error: {response.status_code}"
+    except Exception as e:
+        return f"offline: {str(e)}"
+
+def get_system_status():
+    """
+    Get current system status.
+    
+    Blocks on the database and on worker probes (up to 5s for a dead worker);
+    request handlers read status_snapshot instead.
+    """
+    try:
+        counts = db.get_jobs_count_by_status()
+        queued_jobs = counts.get("pending", 0)
+        running_jobs = counts.get("running", 0) + counts.get("dispatching", 0)
+        completed_jobs = counts.get("completed", 0)
+        failed_jobs = counts.get("failed", 0) + counts.get("error", 0)
+        
+        # Check worker status, probing all workers concurrently
+        endpoints = Config.WORKER_ENDPOINTS
+        with ThreadPoolExecutor(max_workers=max(len(endpoints), 1)) as probe_pool:
+            workers = dict(zip(endpoints, probe_pool.map(check_worker_status, endpoints)))
+        
+        uptime = get_uptime()
+        
+        return SystemStatus(
+            status="online",
+            uptime=uptime,
+            queued_jobs=queued_jobs,
+            running_jobs=running_jobs,
+            completed_jobs=completed_jobs,
+            failed_jobs=failed_jobs,
+            workers=workers,
+            version="0.9.0"
+        )
+    except Exception as e:
+        logger.error(f"Error getting system status: {str(e)}")
+        return SystemStatus(
+            status="degraded",
+            uptime="unknown",
+            queued_jobs=0,
+            running_jobs=0,
+            completed_jobs=0,
+            failed_jobs=0,
+            workers={"error": str(e)},
+            version="0.9.0"
+        )
+
+@leader_only(ROLE_DISPATCHER)
+def poll_worker_job_status():
+    """Poll workers for job status updates."""
+    logger.info("Polling workers for job status updates")
+    try:
+        with db.db_session() as session:
+            active_jobs = session.query(db.JobQueue).filter(
+                db.JobQueue.status.in_(["running", "dispatching"]),
+                db.JobQueue.assigned_worker.isnot(None)
+            ).all()
+            
+            active_jobs = [db.to_dict(job, db.JOB_SUMMARY_FIELDS) for job in active_jobs]
+        
+        logger.info(f"Found {len(active_jobs)} active jobs to check")
+        
+        for job in active_jobs:
+            try:
+                job_id = job["id"]
+                worker_endpoint = job["assigned_worker"]
+                
+                if not worker_endpoint:
+                    continue
+                    
+                status_endpoint = worker_endpoint.replace("/execute", f"/status/{job_id}")
+                
+                logger.info(f"Checking status of job {job_id} on worker {status_endpoint}")
+                
+                response = requests.get(
+                    status_endpoint, 
+                    timeout=Config.WORKER_TIMEOUT // 2
+                )
+                logger.info(f"Worker response structure: {json.dumps(response.json(), default=str)[:500]}")
+                if response.status_code == 200:
+                    job_status = response.json()
+                    
+                    if job_status.get("job_id") == job_id:
+                        status = job_status.get("status")
+                        
+                        if status in ["success", "completed"]:
+                            db.update_job_status(
+                                job_id,
+                                "completed", 
+                                result=job_status.get("result"),
+                                evidence=job_status.get("result", {}).get("evidence"),
+                                outcome=determine_job_outcome(job_id, "completed", job_status.get("result"))
+                            )
+                            logger.info(f"Job {job_id} completed successfully via polling")
+                            
+                        elif status in ["error", "failed"]:
+                            db.update_job_status(
+                                job_id,
+                                "failed",
+                                result=job_status.get("result"),
+                                evidence=job_status.get("result", {}).get("evidence"),
+                                outcome=determine_job_outcome(job_id, "failed", job_status.get("result"))
+                            )
+                            logger.error(f"Job {job_id} failed via polling")
+                            
+                        elif status == "in_progress":
+                            logger.debug(f"Job {job_id} still in progress")
+                            
+                        elif status == "not_found":
+                            logger.warning(f"Job {job_id} not found on worker {worker_endpoint}")
+                            if job["retry_count"] < job["max_retries"]:
+                                db.update_job_status(
+                                    job_id,
+                                    "retry_pending",
+                                    result={"error": "Job not found on assigned worker"}
+                                )
+                                db.update_job_retry_count(job_id, job["retry_count"] + 1)
+                                logger.info(f"Rescheduled job {job_id} for retry")
+                                
+                else:
+                    logger.warning(f"Error checking job {job_id} status: {response.status_code} - {response.text}")
+                
+            except requests.RequestException as e:
+                logger.error(f"Error polling status for job {job['id']}: {str(e)}")
+                
+            except Exception as e:
+                logger.error(f"Error processing job {job['id']} status: {str(e)}")
+                logger.error(traceback.format_exc())
+                
+    except Exception as e:
+        logger.error(f"Error in job status polling: {str(e)}")
+        logger.error(traceback.format_exc())
+
+def reset_and_configure_scheduler():
+    """Reset the scheduler and create all necessary jobs with proper configuration."""
+    global scheduler
+    logger.info("Resetting and configuring scheduler...")
+    
+    if scheduler and scheduler.running:
+        try:
+            logger.info("Shutting down existing scheduler...")
+            scheduler.shutdown(wait=True)
+            logger.info("Scheduler shutdown complete")
+        except Exception as e:
+            logger.warning(f"Error during scheduler shutdown: {str(e)}")
+    
+    # Recreate the scheduler
+    scheduler = BackgroundScheduler(
+        jobstores={
+            'default': create_jobstore()
+        },
+        executors={
+            'default': {'type': 'threadpool', 'max_workers': 5}
+        },
+        job_defaults={
+            'coalesce': True,
+            'max_instances': 1
+        }
+    )
+    
+    current_time = datetime.datetime.now(datetime.UTC)
+    
+    # Define required jobs - REMOVED send_system_status_report to stop null API pushes
+    jobs_config = [
+        {
+            "id": "poll_job_queue",
+            "func": poll_job_queue,
+            "trigger": "interval",
+            "seconds": Config.JOB_POLL_INTERVAL,
+            "next_run_time": current_time + datetime.timedelta(seconds=5),
+            "replace_existing": True
+        },
+        {
+            "id": "collect_metrics",
+            "func": collect_metrics,
+            "trigger": "interval",
+            "seconds": Config.METRICS_INTERVAL,
+            "next_run_time": current_time + datetime.timedelta(seconds=15),
+            "replace_existing": True
+        },
+        {
+            "id": "cleanup_old_evidence",
+            "func": cleanup_old_evidence,
+            "trigger": "cron",
+            "hour": Config.CLEANUP_HOUR,
+            "replace_existing": True
+        },
+        {
+            "id": "recover_stale_jobs",
+            "func": recover_stale_jobs,
+            "trigger": "interval",
+            "minutes": 10,
+            "next_run_time": current_time + datetime.timedelta(seconds=30),
+            "replace_existing": True
+        },
+        {
+            "id": "send_health_report",
+            "func": send_health_report,
+            "trigger": "interval",
+            "seconds": Config.HEALTH_REPORT_INTERVAL,
+            "next_run_time": current_time + datetime.timedelta(seconds=60),
+            "replace_existing": True
+        },
+        {
+            "id": "poll_worker_job_status",
+            "func": poll_worker_job_status,
+            "trigger": "interval",
+            "seconds": Config.JOB_POLL_INTERVAL,
+            "next_run_time": current_time + datetime.timedelta(seconds=45),
+            "replace_existing": True
+        }
+    ]
+    
+    # Keep leader leases alive; duties above only run in the replica holding their role
+    if elector.enabled:
+        jobs_config.append({
+            "id": "renew_leader_leases",
+            "func": renew_leases,
+            "trigger": "interval",
+            "seconds": elector.renew_interval,
+            "replace_existing": True
+        })
+    
+    # Start with fresh scheduler
+    for job_config in jobs_config:
+        try:
+            scheduler.add_job(**job_config)
+            logger.info(f"Added job: {job_config['id']}")
+        except Exception as e:
+            logger.error(f"Error adding job {job_config['id']}: {str(e)}")
+    
+    # Take leases before the first duties fire so a single instance leads immediately
+    held = elector.renew()
+    logger.info(f"Leader roles held by {elector.instance_id}: {held}")
+    
+    scheduler.start()
+    logger.info("Scheduler started successfully")
+    
+    job_count = len(scheduler.get_jobs())
+    logger.info(f"Scheduler configured with {job_count} jobs")
+    
+    for job in scheduler.get_jobs():
+        logger.info(f"Scheduled job: {job.id} - next run at {job.next_run_time}")
+    
+    return job_count
+
+def remove_existing_scheduled_jobs():
+    """Remove existing scheduled jobs before adding new ones."""
+    try:
+        from apscheduler.jobstores.base import JobLookupError
+        job_ids = ['poll_job_queue', 'collect_metrics', 'cleanup_old_evidence', 'recover_stale_jobs']
+        for job_id in job_ids:
+            try:
+                scheduler.remove_job(job_id)
+                logger.info(f"Removed existing scheduled job: {job_id}")
+            except JobLookupError:
+                pass
+        return True
+    except Exception as e:
+        logger.error(f"Error removing existing scheduled jobs: {str(e)}")
+        return False
+
+def get_scheduled_jobs():
+    """List the jobs scheduled in this process (empty if the scheduler is not running here)."""
+    if not scheduler:
+        return []
+    return [
+        {
+            "id": job.id,
+            "function": job.func.__name__,
+            "trigger": str(job.trigger),
+            "next_run": job.next_run_time.isoformat() if job.next_run_time else None
+        }
+        for job in scheduler.get_jobs()
+    ]
+
+def shutdown():
+    """Stop the scheduler, release leader leases and stop the dispatch pool."""
+    if scheduler and scheduler.running:
+        scheduler.shutdown()
+        logger.info("Scheduler shutdown complete")
+    
+    elector.release_all()
+    
+    if worker_pool:
+        worker_pool.shutdown(wait=False)
+
+def main():
+    """Run the dispatcher as a standalone service until SIGINT or SIGTERM."""
+    Config.setup_directories()
+    logging.basicConfig(
+        level=Config.LOG_LEVEL,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+        handlers=[
+            logging.StreamHandler(),
+            logging.FileHandler(Config.get_dispatcher_log_path())
+        ]
+    )
+    logger.info(f"Starting dispatcher {Config.INSTANCE_ID} using data directory: {os.path.abspath(Config.BASE_DATA_DIR)}")
+    
+    if not db.init_db():
+        logger.error("Failed to initialize database")
+        return 1
+    
+    job_count = reset_and_configure_scheduler()
+    logger.info(f"Configured scheduler with {job_count} jobs")
+    
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+    stop.wait()
+    
+    logger.info("Shutting down dispatcher...")
+    shutdown()
+    db.SessionLocal.remove()
+    db.engine.dispose()
+    logger.info("Dispatcher shutdown completed")
+    return 0
+
+# Main entry point
+if __name__ == "__main__":
+    sys.exit(main())
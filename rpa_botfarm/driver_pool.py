@@ -0,0 +1,377 @@
+"""
+RPA Orchestration System - Driver Pool
+--------------------------------------
+Warm Chrome drivers for the worker's automations.
+
+Starting Chrome and chromedriver and creating a profile takes several seconds
+per job. For providers listed in DRIVER_POOL_PROVIDERS the worker keeps up to
+DRIVER_POOL_SIZE started drivers per automation, launched at startup and
+refilled in the background. A driver handed back after a job is reset
+(cookies, storage, extra tabs) and reused, until it has run
+DRIVER_POOL_MAX_USES jobs or stops responding, when it is quit and replaced.
+
+Automations register a launch function under a key ("<provider>.<action>")
+when imported and call acquire()/release() instead of starting and quitting
+Chrome themselves. For providers that are not pooled, acquire() just launches
+a driver and release() quits it, as before.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from config import Config
+from process_governor import driver_pid, process_governor
+
+logger = logging.getLogger(__name__)
+
+# Runs in the page being left behind, before navigating away
+_CLEAR_STORAGE_SCRIPT = "try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}"
+
+
+@dataclass
+class _PooledDriver:
+    driver: Any
+    created: float = field(default_factory=time.monotonic)
+    uses: int = 0
+
+
+@dataclass
+class _KeyStats:
+    launched: int = 0
+    reused: int = 0
+    misses: int = 0
+    recycled: int = 0
+    crashed: int = 0
+    launch_failures: int = 0
+
+
+def reset_driver(driver) -> None:
+    """
+    Clear a driver's state left by the previous job.
+
+    Closes every window but one, clears local and session storage, cookies
+    and the origin's other storage, and leaves the browser on about:blank.
+
+    Raises:
+        Exception: Whatever the driver raises; the driver should then be discarded
+    """
+    handles = driver.window_handles
+    for handle in handles[1:]:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(handles[0])
+
+    origin = driver.execute_script(_CLEAR_STORAGE_SCRIPT + " return window.location.origin;")
+    try:
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        if origin and origin != "null":
+            driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+    except AttributeError:
+        # Not a Chromium driver; cookies of the current domain only
+        driver.delete_all_cookies()
+    driver.get("about:blank")
+
+
+def is_alive(driver) -> bool:
+    """Cheap liveness check: one round trip to chromedriver."""
+    try:
+        driver.window_handles
+        return True
+    except Exception:
+        return False
+
+
+class DriverPool:
+    """
+    Pool of started Chrome drivers per automation.
+
+    Args:
+        providers: Providers whose automations use the pool
+        size: Idle drivers kept per automation key
+        max_uses: Jobs a driver runs before it is replaced
+        launch_workers: Threads launching drivers in the background
+    """
+
+    def __init__(self, providers: List[str], size: int = 2, max_uses: int = 20, launch_workers: int = 2):
+        self.providers = {provider.strip().lower() for provider in providers if provider.strip()}
+        self.size = max(size, 0)
+        self.max_uses = max(max_uses, 1)
+        self.launch_workers = max(launch_workers, 1)
+
+        self._lock = threading.Lock()
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._idle: Dict[str, List[_PooledDriver]] = {}
+        self._leased: Dict[int, _PooledDriver] = {}
+        self._launching: Dict[str, int] = {}
+        self._stats: Dict[str, _KeyStats] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._closed = False
+
+    def enabled_for(self, key: str) -> bool:
+        """Whether drivers for an automation key ("<provider>.<action>") are pooled."""
+        return self.size > 0 and key.split(".", 1)[0].lower() in self.providers
+
+    def register_factory(self, key: str, factory: Callable[[], Any]):
+        """
+        Register the function that starts a driver for an automation.
+
+        Args:
+            key: "<provider>.<action>"
+            factory: Returns a new, started webdriver
+        """
+        with self._lock:
+            self._factories[key] = factory
+            self._idle.setdefault(key, [])
+            self._stats.setdefault(key, _KeyStats())
+
+    def _factory(self, key: str) -> Callable[[], Any]:
+        factory = self._factories.get(key)
+        if factory is None:
+            raise KeyError(f"No driver factory registered for {key}")
+        return factory
+
+    def acquire(self, key: str):
+        """
+        Get a driver for a job: a warm one if the pool has one, otherwise a new one.
+
+        Args:
+            key: Automation key the factory was registered under
+
+        Returns:
+            A started webdriver; give it back with release()
+        """
+        factory = self._factory(key)
+        if not self.enabled_for(key):
+            driver = factory()
+            process_governor.attach(driver)
+            return driver
+
+        while True:
+            with self._lock:
+                idle = self._idle[key]
+                pooled = idle.pop() if idle else None
+            if pooled is None:
+                break
+            if is_alive(pooled.driver):
+                pooled.uses += 1
+                with self._lock:
+                    self._leased[id(pooled.driver)] = pooled
+                    self._stats[key].reused += 1
+                process_governor.attach(pooled.driver)
+                self._refill(key)
+                return pooled.driver
+            logger.warning(f"Discarding dead idle driver for {key}")
+            with self._lock:
+                self._stats[key].crashed += 1
+            self._quit(pooled.driver)
+
+        with self._lock:
+            self._stats[key].misses += 1
+        pooled = _PooledDriver(self._launch(key), uses=1)
+        with self._lock:
+            self._leased[id(pooled.driver)] = pooled
+        process_governor.attach(pooled.driver)
+        self._refill(key)
+        return pooled.driver
+
+    def release(self, key: str, driver) -> None:
+        """
+        Give back a driver after a job.
+
+        A pooled driver is reset and kept for the next job, or quit if it is
+        worn out, unresponsive or the pool is full. Drivers of automations that
+        are not pooled are quit, and errors from quit() propagate as before.
+
+        Args:
+            key: Automation key the driver was acquired under
+            driver: The driver returned by acquire()
+        """
+        if driver is None:
+            return
+        if not self.enabled_for(key):
+            driver.quit()
+            return
+
+        with self._lock:
+            pooled = self._leased.pop(id(driver), None)
+            if pooled is None and any(p.driver is driver for p in self._idle.get(key, [])):
+                # Released twice
+                return
+        if pooled is None:
+            pooled = _PooledDriver(driver, uses=1)
+
+        keep = False
+        if not is_alive(driver):
+            reason = "not responding"
+            with self._lock:
+                self._stats[key].crashed += 1
+        elif pooled.uses >= self.max_uses:
+            reason = f"after {pooled.uses} jobs"
+        else:
+            try:
+                reset_driver(driver)
+                keep = True
+            except Exception as e:
+                reason = f"reset failed: {str(e)}"
+                with self._lock:
+                    self._stats[key].crashed += 1
+
+        with self._lock:
+            if keep and not self._closed and len(self._idle[key]) < self.size:
+                self._idle[key].append(pooled)
+                return
+            if keep:
+                reason = "pool full"
+            self._stats[key].recycled += 1
+
+        logger.info(f"Recycling driver for {key}: {reason}")
+        self._quit(driver)
+        self._refill(key)
+
+    def record_use(self, driver) -> None:
+        """Count another job on a driver kept by its holder between jobs (see session_pool)."""
+        with self._lock:
+            pooled = self._leased.get(id(driver))
+            if pooled is not None:
+                pooled.uses += 1
+
+    def worn_out(self, driver) -> bool:
+        """Whether a leased driver has run DRIVER_POOL_MAX_USES jobs."""
+        with self._lock:
+            pooled = self._leased.get(id(driver))
+            return pooled is not None and pooled.uses >= self.max_uses
+
+    def kept_pids(self, include_leased: bool = False) -> Set[int]:
+        """Chromedriver pids of idle (and optionally leased) drivers, for the process governor."""
+        with self._lock:
+            drivers = [pooled.driver for idle in self._idle.values() for pooled in idle]
+            if include_leased:
+                drivers += [pooled.driver for pooled in self._leased.values()]
+        return {pid for pid in map(driver_pid, drivers) if pid is not None}
+
+    def discard(self, key: str, driver) -> None:
+        """Quit a driver that crashed or is in an unknown state instead of returning it to the pool."""
+        if driver is None:
+            return
+        with self._lock:
+            pooled = self._leased.pop(id(driver), None)
+            if pooled is not None and key in self._stats:
+                self._stats[key].crashed += 1
+        self._quit(driver)
+        if self.enabled_for(key):
+            self._refill(key)
+
+    def _launch(self, key: str):
+        start = time.monotonic()
+        try:
+            driver = self._factory(key)()
+        except Exception:
+            with self._lock:
+                self._stats[key].launch_failures += 1
+            raise
+        with self._lock:
+            self._stats[key].launched += 1
+        logger.debug(f"Launched driver for {key} in {time.monotonic() - start:.1f}s")
+        return driver
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"Error quitting pooled driver: {str(e)}")
+
+    def _refill(self, key: str):
+        """Launch drivers in the background until key has size idle ones."""
+        with self._lock:
+            if self._closed:
+                return
+            missing = self.size - len(self._idle[key]) - self._launching.get(key, 0)
+            if missing <= 0:
+                return
+            self._launching[key] = self._launching.get(key, 0) + missing
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.launch_workers, thread_name_prefix="driver-pool"
+                )
+            executor = self._executor
+        for _ in range(missing):
+            executor.submit(self._launch_idle, key)
+
+    def _launch_idle(self, key: str):
+        try:
+            driver = self._launch(key)
+        except Exception as e:
+            logger.error(f"Error launching pooled driver for {key}: {str(e)}")
+            with self._lock:
+                self._launching[key] -= 1
+            return
+
+        with self._lock:
+            self._launching[key] -= 1
+            if not self._closed and len(self._idle[key]) < self.size:
+                self._idle[key].append(_PooledDriver(driver))
+                return
+        self._quit(driver)
+
+    def prewarm(self) -> int:
+        """
+        Start launching drivers for every registered, pooled automation.
+
+        Returns:
+            int: Number of automation keys being warmed
+        """
+        with self._lock:
+            keys = [key for key in self._factories if self.enabled_for(key)]
+        for key in keys:
+            self._refill(key)
+        if keys:
+            logger.info(f"Warming {self.size} Chrome drivers each for {', '.join(sorted(keys))}")
+        return len(keys)
+
+    def shutdown(self):
+        """Quit all idle drivers and stop background launches. Leased drivers are quit on release."""
+        with self._lock:
+            self._closed = True
+            executor = self._executor
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            idle = [pooled for drivers in self._idle.values() for pooled in drivers]
+            for drivers in self._idle.values():
+                drivers.clear()
+        for pooled in idle:
+            self._quit(pooled.driver)
+        if idle:
+            logger.info(f"Driver pool shut down, quit {len(idle)} idle drivers")
+
+    def stats(self) -> Dict[str, Any]:
+        """Idle and leased drivers and counters per automation key, for /status."""
+        with self._lock:
+            return {
+                "providers": sorted(self.providers),
+                "size": self.size,
+                "max_uses": self.max_uses,
+                "pools": {
+                    key: {
+                        "idle": len(self._idle.get(key, [])),
+                        "launching": self._launching.get(key, 0),
+                        **vars(stats),
+                    }
+                    for key, stats in self._stats.items()
+                    if self.enabled_for(key)
+                },
+                "leased": len(self._leased),
+            }
+
+
+driver_pool = DriverPool(
+    providers=Config.DRIVER_POOL_PROVIDERS,
+    size=Config.DRIVER_POOL_SIZE,
+    max_uses=Config.DRIVER_POOL_MAX_USES,
+)
+process_governor.register_keeper(driver_pool.kept_pids)
@@ -81,7 +81,8 @@ async def http_exception_handler(request: Request, exc: HTTPException):
         content={
             "detail": exc.detail,
             "timestamp": datetime.utcnow().isoformat()
-        }
+        },
+        headers=getattr(exc, "headers", None)
     )
 
 # Validation error handler
@@ -0,0 +1,248 @@
+"""
+RPA Orchestration System - Evidence Export
+------------------------------------------
+Streams audit evidence for one or many jobs as a zip archive.
+
+Per job the archive holds:
+    jobs/<id>/job.json                 job record with parameters, result and evidence
+    jobs/<id>/screenshots/...          images from the screenshot store or legacy base64 rows
+    jobs/<id>/execution_summary.txt    per-job execution summary, if written on this host
+    jobs/<id>/files/...                files in the job's SCREENSHOT_DIR directory and
+                                       evidence paths under BASE_DATA_DIR, if present here
+
+The archive is written to a non-seekable buffer that is drained after every
+chunk, and jobs are read with db.iter_jobs, so file contents and job records
+are never held beyond one chunk or batch. The one thing that grows is the zip
+central directory (a few hundred bytes per file, written at the end), which is
+why range exports stop at EVIDENCE_EXPORT_MAX_JOBS and say where to continue.
+"""
+import datetime
+import logging
+import mimetypes
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import db
+import json_codec
+import screenshot_store
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+# Jobs whose screenshot metadata is looked up together
+JOB_BATCH_SIZE = 100
+
+# Fields written to job.json
+EXPORT_FIELDS = [
+    "id", "external_job_id", "provider", "action", "status", "priority",
+    "retry_count", "created_at", "started_at", "completed_at", "assigned_worker",
+    "parameters", "result", "evidence",
+]
+
+# Already-compressed formats are stored as is
+_STORED_SUFFIXES = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".zip", ".gz", ".pdf"}
+
+
+class _StreamBuffer:
+    """Write-only, non-seekable file object whose contents are taken as they are written."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class _EvidenceZip:
+    """zipfile.ZipFile writing to a _StreamBuffer, yielding bytes as they are produced."""
+
+    def __init__(self):
+        self.buffer = _StreamBuffer()
+        self.zip = zipfile.ZipFile(self.buffer, mode="w", compression=zipfile.ZIP_DEFLATED, allowZip64=True)
+        self.files = 0
+
+    def _info(self, name: str, date_time: Optional[datetime.datetime] = None) -> zipfile.ZipInfo:
+        moment = date_time or datetime.datetime.utcnow()
+        info = zipfile.ZipInfo(name, date_time=moment.timetuple()[:6] if moment.year >= 1980 else (1980, 1, 1, 0, 0, 0))
+        stored = Path(name).suffix.lower() in _STORED_SUFFIXES
+        info.compress_type = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+        return info
+
+    def add_bytes(self, name: str, data: bytes, date_time: Optional[datetime.datetime] = None) -> Iterator[bytes]:
+        with self.zip.open(self._info(name, date_time), mode="w", force_zip64=True) as entry:
+            for start in range(0, len(data), CHUNK_SIZE):
+                entry.write(data[start:start + CHUNK_SIZE])
+                yield self.buffer.drain()
+        self.files += 1
+        yield self.buffer.drain()
+
+    def add_file(self, name: str, path: Path) -> Iterator[bytes]:
+        modified = datetime.datetime.fromtimestamp(path.stat().st_mtime)
+        with open(path, "rb") as source, self.zip.open(self._info(name, modified), mode="w", force_zip64=True) as entry:
+            while True:
+                chunk = source.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                entry.write(chunk)
+                yield self.buffer.drain()
+        self.files += 1
+        yield self.buffer.drain()
+
+    def close(self) -> bytes:
+        self.zip.close()
+        return self.buffer.drain()
+
+
+def _parse_time(value: Any) -> Optional[datetime.datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _safe_name(name: str) -> str:
+    """Reduce a stored name to a single path component."""
+    cleaned = "".join(c if c.isalnum() or c in "-_." else "_" for c in Path(str(name)).name)
+    return cleaned.strip(".") or "file"
+
+
+def _local_evidence_files(job: Dict[str, Any]) -> Iterator[Path]:
+    """Files for a job that exist on this host: its screenshot directory and evidence paths under BASE_DATA_DIR."""
+    seen = set()
+    # Not Config.get_job_screenshot_dir, which creates the directory
+    job_dir = Path(Config.SCREENSHOT_DIR) / f"job_{job['id']}"
+    if job_dir.is_dir():
+        for path in sorted(job_dir.iterdir()):
+            if path.is_file():
+                seen.add(path.resolve())
+                yield path
+
+    base_dir = Path(Config.BASE_DATA_DIR).resolve()
+    for entry in job.get("evidence") or []:
+        if not isinstance(entry, str):
+            continue
+        try:
+            path = Path(entry).resolve()
+        except (OSError, ValueError):
+            continue
+        # Evidence paths come from workers; only export files inside the data directory
+        if path in seen or base_dir not in path.parents or not path.is_file():
+            continue
+        seen.add(path)
+        yield path
+
+
+def _batches(items: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _job_entries(archive: _EvidenceZip, job: Dict[str, Any], screenshots: List[Dict[str, Any]]) -> Iterator[bytes]:
+    job_id = job["id"]
+    prefix = f"jobs/{job_id}"
+    completed_at = _parse_time(job.get("completed_at")) or _parse_time(job.get("created_at"))
+
+    yield from archive.add_bytes(f"{prefix}/job.json", json_codec.dumps_bytes(job), completed_at)
+
+    for index, screenshot in enumerate(screenshots, start=1):
+        extension = mimetypes.guess_extension(screenshot.get("mime_type") or "image/png") or ".png"
+        name = f"{prefix}/screenshots/{index:03d}_{_safe_name(screenshot['name'])}"
+        if not name.lower().endswith(extension):
+            name += extension
+        taken_at = _parse_time(screenshot.get("timestamp"))
+
+        content_hash = screenshot.get("content_hash")
+        try:
+            if content_hash:
+                path = screenshot_store.get_path(content_hash)
+                if path is None:
+                    logger.warning(f"Screenshot {screenshot['id']} for job {job_id} missing from store: {content_hash}")
+                    continue
+                yield from archive.add_file(name, path)
+            else:
+                legacy = db.get_screenshot(job_id, screenshot["id"])
+                if not legacy or not legacy.get("image_data"):
+                    continue
+                image_bytes = screenshot_store.decode_base64_image(legacy["image_data"])
+                yield from archive.add_bytes(name, image_bytes, taken_at)
+        except screenshot_store.ScreenshotStoreError as e:
+            logger.warning(f"Skipping screenshot {screenshot['id']} for job {job_id}: {str(e)}")
+
+    summary_path = Path(Config.LOG_DIR) / "executions" / f"job_{job_id}_execution_summary.txt"
+    if summary_path.is_file():
+        yield from archive.add_file(f"{prefix}/execution_summary.txt", summary_path)
+
+    for path in _local_evidence_files(job):
+        yield from archive.add_file(f"{prefix}/files/{_safe_name(path.name)}", path)
+
+
+def stream_evidence_zip(
+    jobs: Iterable[Dict[str, Any]],
+    export_info: Dict[str, Any],
+    max_jobs: Optional[int] = None
+) -> Iterator[bytes]:
+    """
+    Stream a zip archive with the evidence of every job in jobs.
+
+    Args:
+        jobs: Job dictionaries with EXPORT_FIELDS, newest first, consumed lazily
+        export_info: Description of the export (filters), written to export.json
+        max_jobs: Stop after this many jobs; export.json then has "truncated"
+            and "next_before_id", the last exported job: repeat the export with
+            before_id set to it for the remaining jobs
+
+    Yields:
+        bytes: Consecutive parts of the archive
+    """
+    archive = _EvidenceZip()
+    job_count = 0
+    last_job_id = None
+    truncated = False
+    try:
+        for batch in _batches(jobs, JOB_BATCH_SIZE):
+            if max_jobs is not None and job_count + len(batch) > max_jobs:
+                batch = batch[:max_jobs - job_count]
+                truncated = True
+            screenshots = db.get_screenshots_for_jobs([job["id"] for job in batch])
+            for job in batch:
+                job_count += 1
+                last_job_id = job["id"]
+                for chunk in _job_entries(archive, job, screenshots.get(job["id"], [])):
+                    if chunk:
+                        yield chunk
+            if truncated:
+                break
+    except Exception as e:
+        # Headers are already sent; record the failure in the archive instead
+        logger.error(f"Evidence export failed after {job_count} jobs: {str(e)}")
+        export_info = dict(export_info, error=f"Export incomplete: {str(e)}")
+
+    summary = dict(
+        export_info,
+        exported_at=datetime.datetime.utcnow().isoformat(),
+        job_count=job_count,
+        file_count=archive.files,
+    )
+    if truncated:
+        summary.update(truncated=True, next_before_id=last_job_id)
+    yield from archive.add_bytes("export.json", json_codec.dumps_bytes(summary))
+    yield archive.close()
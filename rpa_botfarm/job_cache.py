@@ -0,0 +1,124 @@
+"""
+RPA Orchestration System - Job View Cache
+-----------------------------------------
+Bounded LRU of serialized per-job API responses (job detail, history,
+screenshot listing).
+
+Entries are stored with the job's change_seq. A request reads the current
+change_seq (a primary key lookup) and serves the cached bytes when it
+matches, so changes made by any process are never served stale. Commits in
+this process also drop the changed jobs' entries right away through the db
+job change listener, keeping the cache from filling with dead versions.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from config import Config
+import db
+
+CacheKey = Tuple[int, str]
+
+
+class CachedView(NamedTuple):
+    version: int
+    body: bytes
+    etag: str
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag derived from the response body."""
+    return f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+
+class JobViewCache:
+    """
+    LRU of serialized views keyed by (job_id, view name).
+    
+    Args:
+        max_entries: Maximum number of cached views
+        max_bytes: Maximum total size of the cached bodies
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[CacheKey, CachedView]" = OrderedDict()
+        self._keys_by_job: Dict[int, Set[CacheKey]] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, job_id: int, view: str, version: int) -> Optional[CachedView]:
+        """Get a cached view if it was built from the given job version."""
+        key = (job_id, view)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, job_id: int, view: str, version: int, body: bytes) -> CachedView:
+        """Store a serialized view and return it with its ETag."""
+        entry = CachedView(version, body, make_etag(body))
+        if len(body) > self.max_bytes:
+            return entry
+
+        key = (job_id, view)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            self._keys_by_job.setdefault(job_id, set()).add(key)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+        return entry
+
+    def _remove(self, key: CacheKey):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= len(entry.body)
+        keys = self._keys_by_job.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_job[key[0]]
+
+    def invalidate(self, job_ids: List[int]):
+        """Drop every cached view of the given jobs."""
+        with self._lock:
+            for job_id in job_ids:
+                for key in list(self._keys_by_job.get(job_id, ())):
+                    self._remove(key)
+                    self.invalidations += 1
+
+    def clear(self):
+        """Drop all cached views."""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_job.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and hit counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "invalidations": self.invalidations,
+            }
+
+
+cache = JobViewCache(max_entries=Config.JOB_CACHE_MAX_ENTRIES, max_bytes=Config.JOB_CACHE_MAX_BYTES)
+db.add_job_change_listener(cache.invalidate)
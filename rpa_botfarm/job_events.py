@@ -0,0 +1,190 @@
+"""
+RPA Orchestration System - Job Events
+-------------------------------------
+In-process publish/subscribe of job changes, feeding server push to API
+clients (GET /jobs/{job_id}/events and GET /jobs/{job_id}?wait=N).
+
+Subscribers watch one job each. A relay thread reads the watched jobs in a
+single query and hands every job whose change_seq moved past a subscriber's
+last seen value to that subscriber's asyncio queue. Commits made in this
+process wake the relay immediately through the db job change listener;
+changes committed elsewhere (the dispatcher process in API-only mode, other
+replicas) are picked up every JOB_EVENTS_POLL_INTERVAL seconds, and only
+while at least one client is waiting.
+"""
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Set
+
+from config import Config
+import db
+
+logger = logging.getLogger(__name__)
+
+# Fields pushed with every change; the full job is read once it is finished
+EVENT_FIELDS = list(db.JOB_SUMMARY_FIELDS)
+
+# Watched jobs read per query
+QUERY_CHUNK_SIZE = 500
+
+
+class Subscription:
+    """
+    One client's interest in one job.
+    
+    Args:
+        job_id: Job to watch
+        since_seq: change_seq the client already has; only later changes are delivered
+        loop: Event loop of the waiting request
+    """
+
+    def __init__(self, job_id: int, since_seq: int, loop: asyncio.AbstractEventLoop):
+        self.job_id = job_id
+        self.last_seq = since_seq
+        self._loop = loop
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    def _deliver(self, job: Dict[str, Any]):
+        """Called from the relay thread."""
+        try:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, job)
+        except RuntimeError:
+            # The request's event loop has closed
+            pass
+
+    async def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Wait for the next change of the job.
+        
+        Returns:
+            Job summary fields, or None if nothing changed within timeout
+        """
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class JobEventBus:
+    """
+    Fans job changes out to subscribers.
+    
+    Args:
+        poll_interval: Seconds between checks for changes made by other processes
+    """
+
+    def __init__(self, poll_interval: float):
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.deliveries = 0
+        self.queries = 0
+
+    def notify(self, job_ids: Optional[List[int]] = None):
+        """Wake the relay; called after a local commit that changed jobs."""
+        self._wake.set()
+
+    def subscribe(self, job_id: int, since_seq: Optional[int]) -> Subscription:
+        """
+        Start watching a job. Must be called from the request's event loop.
+        
+        Args:
+            job_id: Job to watch
+            since_seq: change_seq of the state the client has already seen
+        """
+        subscription = Subscription(job_id, since_seq or 0, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.setdefault(job_id, set()).add(subscription)
+        # Check straight away so a change committed between the client's read
+        # and this subscription is not held back until the next poll
+        self._wake.set()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Stop watching a job."""
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.job_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.job_id]
+
+    def _watched(self) -> Dict[int, int]:
+        """Watched job IDs mapped to the lowest change_seq a subscriber has seen."""
+        with self._lock:
+            return {
+                job_id: min(subscription.last_seq for subscription in subscribers)
+                for job_id, subscribers in self._subscribers.items()
+            }
+
+    def _publish(self, job: Dict[str, Any]):
+        seq = job.get("change_seq") or 0
+        with self._lock:
+            subscribers = list(self._subscribers.get(job["id"], ()))
+            due = [subscription for subscription in subscribers if seq > subscription.last_seq]
+            for subscription in due:
+                subscription.last_seq = seq
+        for subscription in due:
+            subscription._deliver(job)
+        self.deliveries += len(due)
+
+    def relay_once(self):
+        """Read the watched jobs and deliver those that changed."""
+        watched = self._watched()
+        job_ids = list(watched)
+        for start in range(0, len(job_ids), QUERY_CHUNK_SIZE):
+            jobs: List[Dict[str, Any]] = db.get_jobs(job_ids[start:start + QUERY_CHUNK_SIZE], fields=EVENT_FIELDS)
+            self.queries += 1
+            for job in jobs:
+                if (job.get("change_seq") or 0) > watched[job["id"]]:
+                    self._publish(job)
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._lock:
+                idle = not self._subscribers
+            # Nobody waiting: sleep until a subscription or local change arrives
+            self._wake.wait(None if idle else self.poll_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.relay_once()
+            except Exception as e:
+                logger.error(f"Error relaying job events: {str(e)}")
+                self._stop.wait(self.poll_interval)
+
+    def start(self):
+        """Start the relay thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="job-events", daemon=True)
+        self._thread.start()
+        logger.info(f"Started job event relay, polling every {self.poll_interval}s while clients wait")
+
+    def stop(self):
+        """Stop the relay thread."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Subscriber and delivery counters."""
+        with self._lock:
+            return {
+                "watched_jobs": len(self._subscribers),
+                "subscribers": sum(len(subscribers) for subscribers in self._subscribers.values()),
+                "deliveries": self.deliveries,
+                "queries": self.queries,
+            }
+
+
+bus = JobEventBus(poll_interval=Config.JOB_EVENTS_POLL_INTERVAL)
+db.add_job_change_listener(bus.notify)
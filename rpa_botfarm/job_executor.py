@@ -0,0 +1,174 @@
+"""
+RPA Orchestration System - Job Executor
+---------------------------------------
+Bounded execution of automation jobs on the worker.
+
+/execute runs in Starlette's threadpool, which would start as many jobs (and
+Chrome instances) as it has threads. The executor admits at most
+WORKER_JOB_SLOTS jobs at once; up to WORKER_JOB_QUEUE_SIZE more wait for a
+slot, in arrival order, for at most WORKER_JOB_QUEUE_TIMEOUT seconds.
+
+Jobs arriving while the queue is full are rejected with 429, jobs that wait
+too long with 503, both with a Retry-After estimated from recent job run
+times. The dispatcher puts rejected jobs back in the queue.
+"""
+import logging
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Weight of the latest run time in the moving average
+DURATION_SMOOTHING = 0.2
+
+
+class JobRejected(Exception):
+    """A job was not admitted; status_code is 429 (queue full) or 503 (waited too long)."""
+
+    def __init__(self, status_code: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class JobExecutor:
+    """
+    Slots for concurrently running jobs with a small, bounded waiting queue.
+
+    Args:
+        slots: Jobs run at once
+        queue_size: Jobs waiting for a slot; more are rejected immediately
+        queue_timeout: Seconds a job waits for a slot before it is rejected
+        default_job_seconds: Assumed job run time until jobs have finished
+    """
+
+    def __init__(self, slots: int, queue_size: int = 2, queue_timeout: float = 30, default_job_seconds: float = 120):
+        self.slots = max(slots, 1)
+        self.queue_size = max(queue_size, 0)
+        self.queue_timeout = queue_timeout
+
+        self._lock = threading.Lock()
+        self._slot_freed = threading.Condition(self._lock)
+        self._waiting: deque = deque()
+        self._active = 0
+        self._avg_job_seconds = default_job_seconds
+        self._total = 0
+        self._successful = 0
+        self._failed = 0
+        self._rejected_full = 0
+        self._rejected_timeout = 0
+        self._wait_total = 0.0
+
+    def _retry_after(self, ahead: int) -> int:
+        """Seconds until a job behind ahead others would likely get a slot. Caller holds the lock."""
+        return max(1, math.ceil(self._avg_job_seconds * (ahead // self.slots + 1)))
+
+    @contextmanager
+    def slot(self, job_id: Optional[int] = None) -> Iterator[None]:
+        """
+        Hold a job slot while the body runs, waiting for one if needed.
+
+        Args:
+            job_id: For log messages
+
+        Raises:
+            JobRejected: The queue is full, or no slot came free within queue_timeout
+        """
+        start = time.monotonic()
+        with self._lock:
+            if self._active >= self.slots or self._waiting:
+                if len(self._waiting) >= self.queue_size:
+                    self._rejected_full += 1
+                    retry_after = self._retry_after(len(self._waiting))
+                    logger.warning(f"Rejecting job {job_id}: {self._active} running, {len(self._waiting)} waiting")
+                    raise JobRejected(429, "Worker at capacity", retry_after)
+
+                ticket = object()
+                self._waiting.append(ticket)
+                deadline = start + self.queue_timeout
+                try:
+                    while self._active >= self.slots or self._waiting[0] is not ticket:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._rejected_timeout += 1
+                            logger.warning(f"Rejecting job {job_id}: no slot within {self.queue_timeout}s")
+                            raise JobRejected(503, "Timed out waiting for a job slot", self._retry_after(len(self._waiting)))
+                        self._slot_freed.wait(remaining)
+                finally:
+                    self._waiting.remove(ticket)
+                    # The next in line may be able to go now, or has moved up
+                    self._slot_freed.notify_all()
+
+            self._active += 1
+            self._total += 1
+            self._wait_total += time.monotonic() - start
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                self._active -= 1
+                self._avg_job_seconds += DURATION_SMOOTHING * (elapsed - self._avg_job_seconds)
+                self._slot_freed.notify_all()
+
+    def record(self, success: bool) -> None:
+        """Count a finished job's outcome."""
+        with self._lock:
+            if success:
+                self._successful += 1
+            else:
+                self._failed += 1
+
+    @property
+    def active(self) -> int:
+        with self._lock:
+            return self._active
+
+    @property
+    def queued(self) -> int:
+        with self._lock:
+            return len(self._waiting)
+
+    def stats(self) -> Dict[str, Any]:
+        """Slots, queue and counters, for /status."""
+        with self._lock:
+            return {
+                "max_concurrent": self.slots,
+                "current_load": self._active,
+                "queued": len(self._waiting),
+                "queue_size": self.queue_size,
+                "queue_timeout_seconds": self.queue_timeout,
+                "accepting": self._active < self.slots or len(self._waiting) < self.queue_size,
+                "rejected_full": self._rejected_full,
+                "rejected_timeout": self._rejected_timeout,
+                "avg_job_seconds": round(self._avg_job_seconds, 1),
+                "avg_wait_seconds": round(self._wait_total / self._total, 2) if self._total else None,
+            }
+
+    def job_stats(self) -> Dict[str, int]:
+        """Running and finished job counts."""
+        with self._lock:
+            return {
+                "active": self._active,
+                "total": self._total,
+                "successful": self._successful,
+                "failed": self._failed,
+                "rejected": self._rejected_full + self._rejected_timeout,
+            }
+
+
+job_executor = JobExecutor(
+    slots=Config.WORKER_JOB_SLOTS or Config.MAX_WORKERS,
+    queue_size=Config.WORKER_JOB_QUEUE_SIZE,
+    queue_timeout=Config.WORKER_JOB_QUEUE_TIMEOUT,
+    default_job_seconds=Config.ADMISSION_DEFAULT_JOB_SECONDS,
+)
@@ -0,0 +1,163 @@
+"""
+RPA Orchestration System - JSON Column Codec
+--------------------------------------------
+Versioned storage codec for the JSON columns in db.py (job parameters,
+results, evidence, metrics).
+
+Storage format:
+    - Payloads smaller than JSON_COMPRESSION_THRESHOLD are stored as compact
+      JSON text. This is the same representation legacy rows use, so old and
+      new rows decode the same way.
+    - Larger payloads are stored as binary: a 4 byte header followed by the
+      compressed JSON. The header is the magic b"RJ", a format version byte and
+      a compression codec byte (b"z" = zlib, b"s" = zstd).
+
+orjson and zstandard are used when installed; the codec falls back to the
+standard library json and zlib modules otherwise.
+"""
+import json
+import logging
+import zlib
+from typing import Any, Optional, Union
+
+from config import Config
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"RJ"
+FORMAT_VERSION = 1
+HEADER_SIZE = 4
+
+CODEC_ZLIB = b"z"
+CODEC_ZSTD = b"s"
+
+
+class JSONCodecError(ValueError):
+    """Raised when a stored payload cannot be decoded."""
+    pass
+
+
+def dumps(value: Any) -> str:
+    """Serialize a value to compact JSON text."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+        except TypeError:
+            # Types orjson rejects but the json module accepts (e.g. int subclasses as keys)
+            pass
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def dumps_bytes(value: Any) -> bytes:
+    """Serialize a value to compact UTF-8 JSON, e.g. for an HTTP response body."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Parse JSON text."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _compression_codec() -> Optional[bytes]:
+    """Get the configured compression codec, or None when compression is disabled."""
+    compression = Config.JSON_COMPRESSION
+    if compression == "zstd":
+        if zstandard is not None:
+            return CODEC_ZSTD
+        logger.debug("zstandard not installed, falling back to zlib compression")
+        return CODEC_ZLIB
+    if compression == "zlib":
+        return CODEC_ZLIB
+    return None
+
+
+def encode(value: Any) -> Union[str, bytes]:
+    """
+    Encode a value for storage in a JSON column.
+
+    Returns:
+        str for payloads stored as plain JSON, bytes for compressed payloads
+    """
+    text = dumps(value)
+    codec = _compression_codec()
+
+    if codec is None or len(text) < Config.JSON_COMPRESSION_THRESHOLD:
+        return text
+
+    raw = text.encode("utf-8")
+    if codec == CODEC_ZSTD:
+        compressed = zstandard.ZstdCompressor(level=Config.JSON_COMPRESSION_LEVEL).compress(raw)
+    else:
+        compressed = zlib.compress(raw, Config.JSON_COMPRESSION_LEVEL)
+
+    # Keep the plain form when compression does not pay for the header
+    if len(compressed) + HEADER_SIZE >= len(raw):
+        return text
+
+    return MAGIC + bytes([FORMAT_VERSION]) + codec + compressed
+
+
+def decode(data: Union[str, bytes, memoryview]) -> Any:
+    """
+    Decode a value stored by encode() or by the legacy json.dumps column type.
+
+    Raises:
+        JSONCodecError: If the payload is malformed or uses an unknown format
+    """
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+
+    if isinstance(data, str):
+        try:
+            return loads(data)
+        except ValueError as e:
+            raise JSONCodecError(f"Invalid JSON payload: {str(e)}") from e
+
+    if not data.startswith(MAGIC):
+        # Text that the driver handed back as bytes
+        try:
+            return loads(data)
+        except ValueError as e:
+            raise JSONCodecError(f"Invalid JSON payload: {str(e)}") from e
+
+    if len(data) < HEADER_SIZE:
+        raise JSONCodecError("Truncated JSON payload header")
+
+    version = data[2]
+    codec = data[3:4]
+    body = data[HEADER_SIZE:]
+
+    if version != FORMAT_VERSION:
+        raise JSONCodecError(f"Unsupported JSON payload version: {version}")
+
+    try:
+        if codec == CODEC_ZLIB:
+            raw = zlib.decompress(body)
+        elif codec == CODEC_ZSTD:
+            if zstandard is None:
+                raise JSONCodecError("Payload is zstd compressed but zstandard is not installed")
+            raw = zstandard.ZstdDecompressor().decompress(body)
+        else:
+            raise JSONCodecError(f"Unknown JSON payload codec: {codec!r}")
+        return loads(raw)
+    except (zlib.error, ValueError) as e:
+        if isinstance(e, JSONCodecError):
+            raise
+        raise JSONCodecError(f"Corrupt compressed JSON payload: {str(e)}") from e
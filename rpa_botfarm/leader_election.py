@@ -0,0 +1,147 @@
+"""
+RPA Orchestration System - Leader Election
+------------------------------------------
+Lease-based leader election so periodic duties run in one orchestrator
+replica at a time.
+
+Each duty belongs to a role. A replica runs a duty only while it holds the
+role's lease in the leader_leases table; leases expire after
+LEADER_LEASE_TTL seconds unless renewed, and every replica tries to renew or
+take over its roles every TTL/3 seconds. Extra replicas therefore serve API
+traffic without adding scheduler load, and a crashed leader is replaced
+within one TTL.
+"""
+import functools
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from config import Config
+import db
+
+logger = logging.getLogger(__name__)
+
+# Roles and the periodic duties gated on them
+ROLE_DISPATCHER = "dispatcher"      # poll_job_queue, poll_worker_job_status, recover_stale_jobs
+ROLE_HOUSEKEEPING = "housekeeping"  # collect_metrics, cleanup_old_evidence, send_health_report
+ROLES = (ROLE_DISPATCHER, ROLE_HOUSEKEEPING)
+
+
+class LeaderElector:
+    """Acquires, renews and releases the leader leases of one orchestrator instance."""
+
+    def __init__(self, instance_id: str, ttl_seconds: int, roles=ROLES, enabled: bool = True):
+        self.instance_id = instance_id
+        self.ttl_seconds = ttl_seconds
+        self.roles = tuple(roles)
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        # role -> local monotonic deadline until which this instance may act as leader
+        self._deadlines: Dict[str, float] = {}
+
+    @property
+    def renew_interval(self) -> float:
+        """Seconds between renewals."""
+        return max(self.ttl_seconds / 3, 1)
+
+    def renew(self) -> Dict[str, bool]:
+        """
+        Try to acquire or renew every role's lease.
+
+        Returns:
+            Dict[str, bool]: Whether this instance holds each role
+        """
+        if not self.enabled:
+            return {role: True for role in self.roles}
+
+        held = {}
+        for role in self.roles:
+            # Measure from before the round trip so the local deadline never
+            # outlives the lease recorded in the database
+            started = time.monotonic()
+            try:
+                expires_at = db.acquire_lease(role, self.instance_id, self.ttl_seconds)
+            except Exception as e:
+                logger.error(f"Error renewing {role} lease: {str(e)}")
+                expires_at = None
+
+            with self._lock:
+                was_leader = self._deadlines.get(role, 0) > started
+                if expires_at is not None:
+                    # Stop acting one renewal interval early to absorb clock skew between replicas
+                    self._deadlines[role] = started + self.ttl_seconds - self.renew_interval
+                else:
+                    self._deadlines.pop(role, None)
+
+            held[role] = expires_at is not None
+            if held[role] and not was_leader:
+                logger.info(f"Instance {self.instance_id} became leader for {role}")
+            elif was_leader and not held[role]:
+                logger.warning(f"Instance {self.instance_id} lost leadership for {role}")
+
+        return held
+
+    def is_leader(self, role: str) -> bool:
+        """Check whether this instance currently holds the lease for a role."""
+        if not self.enabled:
+            return True
+        with self._lock:
+            return self._deadlines.get(role, 0) > time.monotonic()
+
+    def release_all(self):
+        """Release held leases so another replica can take over without waiting for expiry."""
+        if not self.enabled:
+            return
+        with self._lock:
+            roles = list(self._deadlines)
+            self._deadlines.clear()
+        for role in roles:
+            try:
+                db.release_lease(role, self.instance_id)
+                logger.info(f"Released {role} lease")
+            except Exception as e:
+                logger.error(f"Error releasing {role} lease: {str(e)}")
+
+    def status(self) -> Dict[str, Any]:
+        """Get leadership state of this instance and the current lease holders."""
+        try:
+            leases = db.get_leases() if self.enabled else []
+        except Exception as e:
+            logger.error(f"Error reading leases: {str(e)}")
+            leases = []
+        return {
+            "enabled": self.enabled,
+            "instance_id": self.instance_id,
+            "lease_ttl_seconds": self.ttl_seconds,
+            "roles": {role: self.is_leader(role) for role in self.roles},
+            "leases": leases,
+        }
+
+
+elector = LeaderElector(
+    instance_id=Config.INSTANCE_ID,
+    ttl_seconds=Config.LEADER_LEASE_TTL,
+    enabled=Config.LEADER_ELECTION_ENABLED
+)
+
+
+def renew_leases() -> Dict[str, bool]:
+    """Scheduler entry point for lease renewal (bound methods cannot be stored in the job store)."""
+    return elector.renew()
+
+
+def leader_only(role: str) -> Callable:
+    """
+    Decorator for periodic duties: run the function only while this
+    instance holds the lease for role, otherwise skip it and return None.
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> Optional[Any]:
+            if not elector.is_leader(role):
+                logger.debug(f"Skipping {func.__name__}: not leader for {role}")
+                return None
+            return func(*args, **kwargs)
+        return wrapper
+    return decorator
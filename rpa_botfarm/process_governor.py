@@ -0,0 +1,486 @@
+"""
+RPA Orchestration System - Process Governor
+-------------------------------------------
+Tracks the Chrome processes each job starts and makes sure they go away.
+
+Drivers a job gets from the driver pool or session pool are recorded against
+the job by their chromedriver pid; Chrome and its helpers are chromedriver's
+descendants. Every PROCESS_GOVERNOR_INTERVAL seconds the job's browser
+processes are measured. A job whose browsers together use more than
+PROCESS_JOB_MAX_RSS_MB of memory or PROCESS_JOB_MAX_CPU_SECONDS of CPU, or
+that runs longer than WORKER_PROCESS_JOB_TIMEOUT, has them killed, so the
+automation fails instead of hanging or starving the host.
+
+When a job ends, its browsers that are not kept by the pools and have not
+exited within BROWSER_CLEANUP_TIMEOUT seconds are killed. Every
+PROCESS_REAP_INTERVAL seconds orphans are reaped: browser processes this
+worker started whose parent has exited, and chromedrivers of this process
+that no job or pool holds. Browsers are recorded as this process's
+descendants while their chromedriver is still alive, so Chrome run by anything
+else on the host is never touched. With FORCE_BROWSER_KILL off, the governor
+only logs what it would kill.
+"""
+import datetime
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import psutil
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+BROWSER_NAMES = {"chrome", "chromium", "chromium-browser", "google-chrome", "headless_shell", "chromedriver"}
+DRIVER_NAMES = {"chromedriver"}
+
+
+class JobTimeout(Exception):
+    """The job ran past its wall-clock limit and its processes were killed."""
+
+
+def driver_pid(driver) -> Optional[int]:
+    """Pid of a Selenium driver's chromedriver process, if it has one."""
+    process = getattr(getattr(driver, "service", None), "process", None)
+    return getattr(process, "pid", None)
+
+
+def _name(proc: psutil.Process) -> str:
+    try:
+        return proc.name().lower()
+    except psutil.Error:
+        return ""
+
+
+def _dead(proc: psutil.Process) -> bool:
+    """Exited, or a zombie waiting for its parent: holds no memory and cannot be killed."""
+    try:
+        return proc.status() == psutil.STATUS_ZOMBIE
+    except psutil.Error:
+        return True
+
+
+def _tree(roots: Iterable[psutil.Process]) -> List[psutil.Process]:
+    """Live root processes and all their descendants."""
+    procs = {}
+    for root in roots:
+        try:
+            # Also False if the pid now belongs to another process
+            if not root.is_running():
+                continue
+            for proc in [root] + root.children(recursive=True):
+                procs[proc.pid] = proc
+        except psutil.Error:
+            continue
+    return [proc for proc in procs.values() if not _dead(proc)]
+
+
+def _cpu(proc: psutil.Process) -> float:
+    cpu = proc.cpu_times()
+    return cpu.user + cpu.system
+
+
+def _rss(procs: List[psutil.Process]) -> int:
+    total = 0
+    for proc in procs:
+        try:
+            total += proc.memory_info().rss
+        except psutil.Error:
+            pass
+    return total
+
+
+@dataclass
+class _Job:
+    job_id: Any
+    started: float = field(default_factory=time.monotonic)
+    started_at: float = field(default_factory=time.time)
+    roots: Dict[int, psutil.Process] = field(default_factory=dict)
+    # CPU time of each process when the job first saw it; only time used since counts
+    cpu_baseline: Dict[int, float] = field(default_factory=dict)
+    cpu_seconds: Dict[int, float] = field(default_factory=dict)
+    killed: Optional[str] = None
+
+
+class ProcessGovernor:
+    """
+    Per-job tracking, limits and cleanup of browser processes.
+
+    Args:
+        job_timeout: Seconds after which a job's browsers are killed; 0 disables
+        max_rss_mb: Memory of a job's browsers above which they are killed; 0 disables
+        max_cpu_seconds: CPU time of a job's browsers above which they are killed; 0 disables
+        interval: Seconds between checks of running jobs
+        reap_interval: Seconds between orphan scans; 0 disables
+        orphan_min_age: Seconds a process must exist before it can be reaped as an orphan
+        cleanup_timeout: Seconds a job's leftover browsers get to exit before they are killed
+        force_kill: Kill processes; when False they are only logged
+    """
+
+    def __init__(
+        self,
+        job_timeout: float = 0,
+        max_rss_mb: int = 0,
+        max_cpu_seconds: float = 0,
+        interval: float = 5,
+        reap_interval: float = 60,
+        orphan_min_age: float = 120,
+        cleanup_timeout: float = 5,
+        force_kill: bool = True
+    ):
+        self.job_timeout = job_timeout
+        self.max_rss_mb = max_rss_mb
+        self.max_cpu_seconds = max_cpu_seconds
+        self.interval = max(interval, 1)
+        self.reap_interval = reap_interval
+        self.orphan_min_age = orphan_min_age
+        self.cleanup_timeout = cleanup_timeout
+        self.force_kill = force_kill
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._jobs: Dict[int, _Job] = {}
+        self._keepers: List[Callable[[bool], Set[int]]] = []
+        # Browser processes started by this worker, with the parent pid they had when first seen
+        self._launched: Dict[int, Tuple[psutil.Process, int]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_reap: Optional[float] = None
+        self._tracked_rss = 0
+        self._jobs_tracked = 0
+        self._kills: Dict[str, int] = {}
+        self._not_killed = 0
+        self._reclaimed_bytes = 0
+
+    def register_keeper(self, keeper: Callable[[bool], Set[int]]):
+        """
+        Register a holder of drivers that outlive jobs (see driver_pool, session_pool).
+
+        Args:
+            keeper: Takes include_leased and returns the chromedriver pids it keeps
+        """
+        with self._lock:
+            self._keepers.append(keeper)
+
+    def _kept(self, include_leased: bool) -> Set[int]:
+        kept = set()
+        for keeper in list(self._keepers):
+            try:
+                kept |= keeper(include_leased)
+            except Exception as e:
+                logger.warning(f"Error reading kept driver pids: {str(e)}")
+        return kept
+
+    @contextmanager
+    def job(self, job_id: Any) -> Iterator[None]:
+        """
+        Track the browsers started on this thread while the body runs, and clean up after it.
+        
+        Raises:
+            JobTimeout: The job's browsers were killed at its time limit, whatever the
+                body raised or returned after that
+        """
+        job = _Job(job_id)
+        with self._lock:
+            self._jobs[id(job)] = job
+            self._jobs_tracked += 1
+        self._local.job = job
+        try:
+            yield
+        except Exception as e:
+            if job.killed == "timeout":
+                raise JobTimeout(f"Job exceeded {self.job_timeout:.0f}s and its browsers were killed") from e
+            raise
+        else:
+            if job.killed == "timeout":
+                raise JobTimeout(f"Job exceeded {self.job_timeout:.0f}s and its browsers were killed")
+        finally:
+            self._local.job = None
+            try:
+                self._finish(job)
+            except Exception as e:
+                logger.error(f"Error cleaning up browser processes of job {job_id}: {str(e)}")
+
+    def attach(self, driver) -> None:
+        """Record a driver against the job running on this thread; no-op outside a job."""
+        job = getattr(self._local, "job", None)
+        pid = driver_pid(driver)
+        if job is None or pid is None:
+            return
+        try:
+            proc = psutil.Process(pid)
+        except psutil.Error:
+            return
+        with self._lock:
+            job.roots.setdefault(pid, proc)
+        # Pooled drivers arrive with CPU time used by earlier jobs
+        self._baseline(job, _tree([proc]))
+        self._remember([proc])
+
+    def _baseline(self, job: _Job, procs: List[psutil.Process]) -> None:
+        """Record the CPU time of processes the job has not seen before."""
+        for proc in procs:
+            if proc.pid in job.cpu_baseline:
+                continue
+            try:
+                started_before_job = proc.create_time() < job.started_at
+                job.cpu_baseline[proc.pid] = _cpu(proc) if started_before_job else 0.0
+            except psutil.Error:
+                pass
+
+    def _remember(self, procs: Iterable[psutil.Process]) -> None:
+        """Record browser processes as started by this worker, with their current parent."""
+        for proc in procs:
+            if proc.pid in self._launched or _name(proc) not in BROWSER_NAMES:
+                continue
+            try:
+                ppid = proc.ppid()
+            except psutil.Error:
+                continue
+            with self._lock:
+                self._launched.setdefault(proc.pid, (proc, ppid))
+
+    def record_descendants(self) -> None:
+        """Record the browsers below this process and forget those that have exited."""
+        try:
+            self._remember(psutil.Process().children(recursive=True))
+        except psutil.Error:
+            pass
+        with self._lock:
+            launched = list(self._launched.items())
+        gone = [pid for pid, (proc, _) in launched if not proc.is_running() or _dead(proc)]
+        with self._lock:
+            for pid in gone:
+                self._launched.pop(pid, None)
+
+    def _owned(self, job: _Job) -> List[psutil.Process]:
+        """Roots of job not kept by a pool or recorded against another running job."""
+        kept = self._kept(include_leased=False)
+        with self._lock:
+            others = set().union(*(other.roots.keys() for other in self._jobs.values() if other is not job))
+            roots = dict(job.roots)
+        return [proc for pid, proc in roots.items() if pid not in kept and pid not in others]
+
+    def _finish(self, job: _Job):
+        with self._lock:
+            self._jobs.pop(id(job), None)
+        procs = _tree(self._owned(job))
+        if not procs:
+            return
+        # Give drivers being quit a moment to go
+        _, alive = psutil.wait_procs(procs, timeout=self.cleanup_timeout)
+        alive = [proc for proc in alive if not _dead(proc)]
+        if alive:
+            self._kill(alive, "job_end", f"job {job.job_id} left {len(alive)} browser processes")
+
+    def kill_driver(self, driver) -> int:
+        """
+        Kill a driver's chromedriver and browsers, e.g. after quit() failed.
+
+        Returns:
+            int: Number of processes killed
+        """
+        pid = driver_pid(driver)
+        if pid is None:
+            return 0
+        try:
+            root = psutil.Process(pid)
+        except psutil.Error:
+            return 0
+        return self._kill(_tree([root]), "driver", f"driver {pid}")
+
+    def kill_tree(self, pid: int, reason: str) -> int:
+        """
+        Kill a process and its descendants regardless of FORCE_BROWSER_KILL (see process_pool).
+
+        Returns:
+            int: Number of processes killed
+        """
+        try:
+            root = psutil.Process(pid)
+        except psutil.Error:
+            return 0
+        return self._kill(_tree([root]), reason, f"process {pid}", force=True)
+
+    def _kill(self, procs: List[psutil.Process], reason: str, what: str, force: bool = False) -> int:
+        if not procs:
+            return 0
+        if not (force or self.force_kill):
+            logger.warning(f"Not killing {what} ({reason}): FORCE_BROWSER_KILL is off")
+            with self._lock:
+                self._not_killed += len(procs)
+            return 0
+
+        sizes = {}
+        for proc in procs:
+            try:
+                sizes[proc.pid] = proc.memory_info().rss
+                proc.kill()
+            except psutil.Error:
+                pass
+        gone, alive = psutil.wait_procs(procs, timeout=self.cleanup_timeout)
+        # Killed children of other processes stay zombies until their parent waits for them
+        gone += [proc for proc in alive if _dead(proc)]
+        reclaimed = sum(sizes.get(proc.pid, 0) for proc in gone)
+        with self._lock:
+            self._kills[reason] = self._kills.get(reason, 0) + len(gone)
+            self._reclaimed_bytes += reclaimed
+        logger.warning(f"Killed {what} ({reason}): {len(gone)} processes, {reclaimed / (1024 * 1024):.0f} MB")
+        return len(gone)
+
+    def check_jobs(self) -> None:
+        """Kill the browsers of jobs over their time, memory or CPU limit."""
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if job.roots and not job.killed]
+        now = time.monotonic()
+        tracked_rss = 0
+        for job in jobs:
+            procs = _tree(self._owned(job))
+            rss = _rss(procs)
+            tracked_rss += rss
+            self._baseline(job, procs)
+            for proc in procs:
+                try:
+                    # Last value seen, so exited processes still count
+                    job.cpu_seconds[proc.pid] = _cpu(proc) - job.cpu_baseline.get(proc.pid, 0.0)
+                except psutil.Error:
+                    pass
+            cpu_seconds = sum(job.cpu_seconds.values())
+
+            reason = None
+            if self.job_timeout and now - job.started > self.job_timeout:
+                reason = "timeout"
+            elif self.max_rss_mb and rss > self.max_rss_mb * 1024 * 1024:
+                reason = "rss_cap"
+            elif self.max_cpu_seconds and cpu_seconds > self.max_cpu_seconds:
+                reason = "cpu_cap"
+            if reason:
+                job.killed = reason
+                self._kill(
+                    procs, reason,
+                    f"browsers of job {job.job_id} ({rss / (1024 * 1024):.0f} MB, {cpu_seconds:.0f} CPU s, "
+                    f"{now - job.started:.0f}s)"
+                )
+        self._tracked_rss = tracked_rss
+
+    def reap_orphans(self) -> int:
+        """
+        Kill browser processes this worker started whose parent has exited,
+        and chromedrivers of this process that no job or pool holds.
+
+        Returns:
+            int: Number of processes killed
+        """
+        self._last_reap = time.time()
+        self.record_descendants()
+        known = self._kept(include_leased=True)
+        with self._lock:
+            for job in self._jobs.values():
+                known |= job.roots.keys()
+            launched = list(self._launched.values())
+        me = os.getpid()
+        now = time.time()
+
+        orphans = []
+        for proc, launched_ppid in launched:
+            try:
+                if now - proc.create_time() < self.orphan_min_age:
+                    continue
+                ppid = proc.ppid()
+            except psutil.Error:
+                continue
+            # A process whose parent exits is reparented (to init or a subreaper)
+            if ppid != launched_ppid:
+                orphans.append(proc)
+            elif ppid == me and _name(proc) in DRIVER_NAMES and proc.pid not in known:
+                orphans.append(proc)
+
+        if not orphans:
+            return 0
+        return self._kill(_tree(orphans), "orphan", f"{len(orphans)} orphaned browser processes")
+
+    def _run(self):
+        next_reap = time.monotonic() + self.reap_interval
+        while not self._stop.wait(self.interval):
+            try:
+                self.record_descendants()
+                self.check_jobs()
+                if self.reap_interval and time.monotonic() >= next_reap:
+                    next_reap = time.monotonic() + self.reap_interval
+                    self.reap_orphans()
+            except Exception as e:
+                logger.error(f"Error in process governor: {str(e)}")
+
+    def start(self):
+        """Start the background check and reap thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="process-governor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.interval + 1)
+            self._thread = None
+
+    def take_counters(self) -> Dict[str, Any]:
+        """Counters since the last call, for a process pool child to hand to the worker."""
+        with self._lock:
+            counters = {
+                "jobs": self._jobs_tracked,
+                "kills": self._kills,
+                "not_killed": self._not_killed,
+                "reclaimed_bytes": self._reclaimed_bytes,
+            }
+            self._jobs_tracked = self._not_killed = self._reclaimed_bytes = 0
+            self._kills = {}
+            return counters
+
+    def merge(self, counters: Dict[str, Any]) -> None:
+        """Add counters taken in a process pool child."""
+        with self._lock:
+            self._jobs_tracked += counters.get("jobs", 0)
+            self._not_killed += counters.get("not_killed", 0)
+            self._reclaimed_bytes += counters.get("reclaimed_bytes", 0)
+            for reason, count in counters.get("kills", {}).items():
+                self._kills[reason] = self._kills.get(reason, 0) + count
+
+    def stats(self) -> Dict[str, Any]:
+        """Limits, kill counts and reclaimed memory, for /status."""
+        with self._lock:
+            return {
+                "force_kill": self.force_kill,
+                "job_timeout_seconds": self.job_timeout or None,
+                "max_job_rss_mb": self.max_rss_mb or None,
+                "max_job_cpu_seconds": self.max_cpu_seconds or None,
+                "active_jobs": len(self._jobs),
+                "tracked_rss_mb": round(self._tracked_rss / (1024 * 1024), 1),
+                "jobs": self._jobs_tracked,
+                "kills": dict(self._kills),
+                "processes_killed": sum(self._kills.values()),
+                "not_killed": self._not_killed,
+                "reclaimed_mb": round(self._reclaimed_bytes / (1024 * 1024), 1),
+                "last_reap": (
+                    datetime.datetime.fromtimestamp(self._last_reap, datetime.UTC).isoformat()
+                    if self._last_reap else None
+                ),
+            }
+
+
+process_governor = ProcessGovernor(
+    job_timeout=Config.WORKER_PROCESS_JOB_TIMEOUT,
+    max_rss_mb=Config.PROCESS_JOB_MAX_RSS_MB,
+    max_cpu_seconds=Config.PROCESS_JOB_MAX_CPU_SECONDS,
+    interval=Config.PROCESS_GOVERNOR_INTERVAL,
+    reap_interval=Config.PROCESS_REAP_INTERVAL,
+    orphan_min_age=Config.PROCESS_ORPHAN_MIN_AGE,
+    cleanup_timeout=Config.BROWSER_CLEANUP_TIMEOUT,
+    force_kill=Config.FORCE_BROWSER_KILL,
+)
@@ -0,0 +1,324 @@
+"""
+RPA Orchestration System - Process Pool
+---------------------------------------
+Optional process isolation for automation runs on the worker.
+
+With WORKER_PROCESS_ISOLATION set, each job's module.execute() runs in a
+child process instead of the uvicorn process. Children are forked from a
+forkserver that has already imported the automation modules, so a job does
+not pay for imports. Parameters go to the child and results come back over a
+pipe.
+
+A job still running after WORKER_PROCESS_JOB_TIMEOUT seconds has its child
+and that child's processes (Chrome, chromedriver) killed. A hung wait, a
+leaked driver or a memory leak therefore ends with the job instead of the
+worker. Children are replaced after WORKER_PROCESS_MAX_JOBS jobs, or once
+their RSS exceeds WORKER_PROCESS_MAX_RSS_MB.
+
+Each child has its own driver and session pools. Warm drivers and logged-in
+sessions are kept between the jobs one child runs and quit when it is
+replaced.
+"""
+import importlib
+import logging
+import multiprocessing
+import threading
+import traceback
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import psutil
+
+from config import Config
+from process_governor import JobTimeout, process_governor
+
+logger = logging.getLogger(__name__)
+
+# Seconds a child gets to quit its drivers and exit before it is killed
+CHILD_EXIT_TIMEOUT = 10
+
+
+class ChildError(Exception):
+    """The automation raised in the child; carries the child's traceback."""
+
+    def __init__(self, error_type: str, message: str, child_traceback: str):
+        super().__init__(f"{error_type}: {message}")
+        self.error_type = error_type
+        self.child_traceback = child_traceback
+
+
+class ChildCrashed(Exception):
+    """The child exited or the pipe broke before the job returned."""
+
+
+def _child_main(conn):
+    """Loop of a pool child: run jobs received on conn until told to stop."""
+    logging.basicConfig(
+        level=Config.LOG_LEVEL,
+        format="%(asctime)s [%(levelname)s] %(name)s[child]: %(message)s",
+    )
+    from driver_pool import driver_pool
+    from session_pool import session_pool
+
+    process_governor.start()
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:
+                break
+            if message is None:
+                break
+            module_path, parameters = message
+            try:
+                module = importlib.import_module(module_path)
+                with process_governor.job(parameters.get("job_id")):
+                    result = module.execute(parameters)
+                reply = ("ok", result)
+            except Exception as e:
+                reply = ("error", type(e).__name__, str(e), traceback.format_exc())
+            # Kill counts and reclaimed memory are reported by the worker's governor
+            conn.send((process_governor.take_counters(), reply))
+    finally:
+        session_pool.shutdown()
+        driver_pool.shutdown()
+        process_governor.stop()
+
+
+@dataclass
+class _Child:
+    process: Any
+    conn: Any
+    jobs: int = 0
+
+    @property
+    def pid(self) -> int:
+        return self.process.pid
+
+
+class ProcessPool:
+    """
+    Pre-forked children running automation jobs, one job per child at a time.
+
+    Args:
+        size: Children kept running; one per job slot
+        job_timeout: Seconds before a job's child is killed
+        max_jobs: Jobs a child runs before it is replaced
+        max_rss_mb: Child RSS (MB) after a job above which it is replaced; 0 disables
+    """
+
+    def __init__(self, size: int, job_timeout: float = 540, max_jobs: int = 50, max_rss_mb: int = 0):
+        self.size = max(size, 1)
+        self.job_timeout = job_timeout
+        self.max_jobs = max(max_jobs, 1)
+        self.max_rss_mb = max_rss_mb
+
+        self._lock = threading.Lock()
+        self._idle: List[_Child] = []
+        self._busy: Dict[int, _Child] = {}
+        self._context = None
+        self._closed = False
+        self._jobs = 0
+        self._timeouts = 0
+        self._crashes = 0
+        self._recycled = {"max_jobs": 0, "rss": 0}
+
+    def start(self, preload: List[str]):
+        """
+        Start the forkserver with preload imported, and the children.
+
+        Args:
+            preload: Modules imported once in the forkserver, e.g. the automation modules
+        """
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self._context = multiprocessing.get_context(method)
+        if method == "forkserver":
+            self._context.set_forkserver_preload(["process_pool", *preload])
+        children = [self._spawn() for _ in range(self.size)]
+        with self._lock:
+            self._idle.extend(children)
+        logger.info(f"Started {len(children)} automation processes ({method}, {len(preload)} modules preloaded)")
+
+    def _spawn(self) -> _Child:
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_child_main,
+            args=(child_conn,),
+            name="automation-child",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        return _Child(process, parent_conn)
+
+    def _checkout(self) -> _Child:
+        with self._lock:
+            if self._closed:
+                raise ChildCrashed("Process pool is shut down")
+            # Most recently used first: its pools are the warmest
+            while self._idle:
+                child = self._idle.pop()
+                if child.process.is_alive():
+                    self._busy[child.pid] = child
+                    return child
+                self._crashes += 1
+        # All children busy or dead; the job executor keeps this rare
+        child = self._spawn()
+        with self._lock:
+            self._busy[child.pid] = child
+        return child
+
+    def _checkin(self, child: _Child):
+        reason = None
+        if child.jobs >= self.max_jobs:
+            reason = "max_jobs"
+        elif self.max_rss_mb:
+            try:
+                rss_mb = psutil.Process(child.pid).memory_info().rss / (1024 * 1024)
+                if rss_mb > self.max_rss_mb:
+                    reason = "rss"
+            except psutil.NoSuchProcess:
+                pass
+
+        with self._lock:
+            self._busy.pop(child.pid, None)
+            if reason is None and not self._closed and len(self._idle) < self.size:
+                self._idle.append(child)
+                return
+            if reason:
+                self._recycled[reason] += 1
+        logger.info(f"Replacing automation process {child.pid} after {child.jobs} jobs ({reason or 'pool full'})")
+        threading.Thread(target=self._replace, args=(child,), name="automation-recycle", daemon=True).start()
+
+    def _replace(self, child: _Child):
+        self._stop(child)
+        with self._lock:
+            if self._closed or len(self._idle) + len(self._busy) >= self.size:
+                return
+        try:
+            fresh = self._spawn()
+        except Exception as e:
+            logger.error(f"Error starting automation process: {str(e)}")
+            return
+        with self._lock:
+            self._idle.append(fresh)
+
+    def _stop(self, child: _Child):
+        """Let a child quit its drivers and exit; kill it and its processes if it does not."""
+        try:
+            child.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        child.process.join(CHILD_EXIT_TIMEOUT)
+        if child.process.is_alive():
+            process_governor.kill_tree(child.pid, "child_stop")
+            child.process.join(1)
+        child.conn.close()
+
+    def _kill(self, child: _Child, reason: str):
+        with self._lock:
+            self._busy.pop(child.pid, None)
+        killed = process_governor.kill_tree(child.pid, reason)
+        child.process.join(1)
+        child.conn.close()
+        logger.warning(f"Killed automation process {child.pid} and {max(killed - 1, 0)} child processes")
+        with self._lock:
+            closed = self._closed
+        if not closed:
+            fresh = self._spawn()
+            with self._lock:
+                self._idle.append(fresh)
+
+    def run(self, module_path: str, parameters: Dict[str, Any], timeout: Optional[float] = None) -> Any:
+        """
+        Run module_path.execute(parameters) in a child.
+
+        Args:
+            module_path: Automation module, e.g. "automations.osn.validation"
+            parameters: Job parameters; must be picklable
+            timeout: Wall-clock limit in seconds; defaults to job_timeout
+
+        Returns:
+            Whatever execute() returned
+
+        Raises:
+            ChildError: execute() raised
+            ChildCrashed: The child died during the job
+            JobTimeout: The job ran past the limit; the child or its browsers were killed
+        """
+        timeout = timeout or self.job_timeout
+        child = self._checkout()
+        child.jobs += 1
+        with self._lock:
+            self._jobs += 1
+
+        try:
+            child.conn.send((module_path, parameters))
+            if not child.conn.poll(timeout):
+                with self._lock:
+                    self._timeouts += 1
+                self._kill(child, "timeout")
+                raise JobTimeout(f"Job exceeded {timeout:.0f}s and was killed")
+            counters, reply = child.conn.recv()
+        except (EOFError, OSError) as e:
+            with self._lock:
+                self._crashes += 1
+            self._kill(child, "crash")
+            raise ChildCrashed(f"Automation process {child.pid} died: exit code {child.process.exitcode}") from e
+
+        process_governor.merge(counters)
+        self._checkin(child)
+        if reply[0] == "ok":
+            return reply[1]
+        _, error_type, message, child_traceback = reply
+        if error_type == JobTimeout.__name__:
+            # The child's governor killed the job's browsers at the time limit
+            with self._lock:
+                self._timeouts += 1
+            raise JobTimeout(message)
+        raise ChildError(error_type, message, child_traceback)
+
+    def shutdown(self):
+        """Stop all idle children. Busy children are killed."""
+        with self._lock:
+            self._closed = True
+            idle = list(self._idle)
+            busy = list(self._busy.values())
+            self._idle.clear()
+        for child in idle:
+            self._stop(child)
+        for child in busy:
+            self._kill(child, "shutdown")
+
+    def stats(self) -> Dict[str, Any]:
+        """Children, job counts, timeouts and recycling, for /status."""
+        with self._lock:
+            children = list(self._idle) + list(self._busy.values())
+            stats = {
+                "size": self.size,
+                "idle": len(self._idle),
+                "busy": len(self._busy),
+                "job_timeout_seconds": self.job_timeout,
+                "max_jobs": self.max_jobs,
+                "max_rss_mb": self.max_rss_mb,
+                "jobs": self._jobs,
+                "timeouts": self._timeouts,
+                "crashes": self._crashes,
+                "recycled": dict(self._recycled),
+            }
+        rss = []
+        for child in children:
+            try:
+                rss.append(psutil.Process(child.pid).memory_info().rss / (1024 * 1024))
+            except psutil.NoSuchProcess:
+                pass
+        stats["max_child_rss_mb"] = round(max(rss), 1) if rss else None
+        return stats
+
+
+process_pool = ProcessPool(
+    size=Config.WORKER_JOB_SLOTS or Config.MAX_WORKERS,
+    job_timeout=Config.WORKER_PROCESS_JOB_TIMEOUT,
+    max_jobs=Config.WORKER_PROCESS_MAX_JOBS,
+    max_rss_mb=Config.WORKER_PROCESS_MAX_RSS_MB,
+) if Config.WORKER_PROCESS_ISOLATION else None
@@ -1,158 +1,317 @@
-# rate_limiter.py
+"""
+RPA Orchestration System - Rate Limiter
+---------------------------------------
+In-memory GCRA (generic cell rate algorithm) rate limiting for the API.
+
+Each client and endpoint rule keeps one number, its theoretical arrival time
+(TAT): requests are spaced window / limit seconds apart, and up to a full
+window's worth may arrive at once. A check is a dictionary lookup and a
+compare under one of RATE_LIMIT_SHARDS locks, so clients rarely contend and
+no I/O happens on the request path.
+
+State can optionally be saved to a small SQLite file every
+RATE_LIMIT_PERSIST_INTERVAL seconds and restored at startup, so a restart
+does not hand every client a fresh allowance.
+"""
+import logging
 import sqlite3
-from datetime import datetime, timedelta
 import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
 from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 
-class SQLiteRateLimiter:
-    def __init__(self, db_path: str = "rate_limits.db"):
-        self.db_path = db_path
+import auth
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Expired entries are swept from a shard every this many checks on it
+SWEEP_EVERY = 1024
+# Slack for floating point error when window / limit is not exact
+EPSILON = 1e-9
+
+
+@dataclass
+class RateLimitResult:
+    """Outcome of a rate limit check."""
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float  # seconds until the full allowance is available again
+    retry_after: float  # seconds until the next request is allowed; 0 if allowed
+
+
+class _Shard:
+    __slots__ = ("lock", "tats", "checks")
+
+    def __init__(self):
         self.lock = threading.Lock()
-        self._init_db()
-    
-    def _init_db(self):
-        """Initialize rate limiting table"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS rate_limits (
-                    key TEXT PRIMARY KEY,
-                    count INTEGER DEFAULT 0,
-                    window_start TIMESTAMP,
-                    last_request TIMESTAMP
-                )
-            """)
-            
-            # Create index for faster cleanup
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_window_start 
-                ON rate_limits(window_start)
-            """)
-            
-            # Clean up old entries
-            self._cleanup_old_entries()
-    
-    def _cleanup_old_entries(self):
-        """Remove entries older than 1 hour"""
+        self.tats: Dict[str, float] = {}
+        self.checks = 0
+
+
+class GCRARateLimiter:
+    """
+    Sharded in-memory GCRA rate limiter.
+
+    Args:
+        shards: Number of independently locked partitions of the key space
+        db_path: SQLite file to persist state to; None keeps state in memory only
+    """
+
+    def __init__(self, shards: int = 16, db_path: Optional[str] = None):
+        self._shards = [_Shard() for _ in range(max(shards, 1))]
+        self.db_path = db_path
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _shard(self, key: str) -> _Shard:
+        return self._shards[zlib.crc32(key.encode()) % len(self._shards)]
+
+    def check(self, key: str, limit: int, window_seconds: float = 3600) -> RateLimitResult:
+        """
+        Count a request against a key's limit.
+
+        Args:
+            key: Client and endpoint identifier
+            limit: Requests allowed per window; 0 or less rejects every request
+            window_seconds: Window length; the limit may be used in one burst
+
+        Returns:
+            RateLimitResult; a rejected request does not use up allowance
+        """
+        if limit <= 0:
+            return RateLimitResult(
+                allowed=False,
+                limit=0,
+                remaining=0,
+                reset_after=window_seconds,
+                retry_after=window_seconds,
+            )
+
+        interval = window_seconds / limit
+        now = time.time()
+        shard = self._shard(key)
+
+        with shard.lock:
+            tat = max(shard.tats.get(key, now), now)
+            new_tat = tat + interval
+            backlog = new_tat - now
+
+            if backlog > window_seconds + EPSILON:
+                allowed = False
+                backlog = tat - now
+            else:
+                allowed = True
+                shard.tats[key] = new_tat
+
+            shard.checks += 1
+            if shard.checks % SWEEP_EVERY == 0:
+                self._sweep(shard, now)
+
+        return RateLimitResult(
+            allowed=allowed,
+            limit=limit,
+            remaining=max(int((window_seconds - backlog) / interval + EPSILON), 0),
+            reset_after=backlog,
+            retry_after=0.0 if allowed else backlog + interval - window_seconds,
+        )
+
+    @staticmethod
+    def _sweep(shard: _Shard, now: float):
+        """Drop keys whose allowance has fully recovered; must hold shard.lock."""
+        expired = [key for key, tat in shard.tats.items() if tat <= now]
+        for key in expired:
+            del shard.tats[key]
+
+    def get_remaining(self, key: str, limit: int, window_seconds: float = 3600) -> int:
+        """Get the requests a key may still make right now, without counting one."""
+        interval = window_seconds / limit
+        now = time.time()
+        shard = self._shard(key)
+        with shard.lock:
+            backlog = max(shard.tats.get(key, now) - now, 0)
+        return max(int((window_seconds - backlog) / interval + EPSILON), 0)
+
+    def reset(self, key: Optional[str] = None):
+        """Forget one key's state, or all state."""
+        for shard in self._shards:
+            with shard.lock:
+                if key is None:
+                    shard.tats.clear()
+                else:
+                    shard.tats.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Number of tracked keys, for /metrics."""
+        return {
+            "keys": sum(len(shard.tats) for shard in self._shards),
+            "shards": len(self._shards),
+        }
+
+    def _snapshot(self) -> List[Tuple[str, float]]:
+        now = time.time()
+        entries = []
+        for shard in self._shards:
+            with shard.lock:
+                entries.extend((key, tat) for key, tat in shard.tats.items() if tat > now)
+        return entries
+
+    def save(self) -> int:
+        """
+        Write the current state to db_path, replacing what was saved before.
+
+        Returns:
+            int: Number of keys saved
+        """
+        if not self.db_path:
+            return 0
+        entries = self._snapshot()
         with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                DELETE FROM rate_limits 
-                WHERE window_start < datetime('now', '-1 hour')
-            """)
-    
-    def is_allowed(self, key: str, limit: int, window_seconds: int = 3600) -> bool:
-        """Check if request is allowed within rate limit"""
-        with self.lock:
-            now = datetime.now()
-            window_start = now - timedelta(seconds=window_seconds)
-            
-            with sqlite3.connect(self.db_path) as conn:
-                # Get current count
-                result = conn.execute(
-                    "SELECT count, window_start FROM rate_limits WHERE key = ?",
-                    (key,)
-                ).fetchone()
-                
-                if not result:
-                    # First request
-                    conn.execute(
-                        """INSERT INTO rate_limits 
-                        (key, count, window_start, last_request) 
-                        VALUES (?, 1, ?, ?)""",
-                        (key, now, now)
-                    )
-                    return True
-                
-                count, stored_window_start = result
-                stored_window_start = datetime.fromisoformat(stored_window_start)
-                
-                # Check if window expired
-                if stored_window_start < window_start:
-                    # Reset window
-                    conn.execute(
-                        """UPDATE rate_limits 
-                        SET count = 1, window_start = ?, last_request = ? 
-                        WHERE key = ?""",
-                        (now, now, key)
-                    )
-                    return True
-                
-                # Check limit
-                if count >= limit:
-                    return False
-                
-                # Increment counter
-                conn.execute(
-                    """UPDATE rate_limits 
-                    SET count = count + 1, last_request = ? 
-                    WHERE key = ?""",
-                    (now, key)
-                )
-                return True
-    
-    def get_remaining(self, key: str, limit: int) -> int:
-        """Get remaining requests in current window"""
+            conn.execute("CREATE TABLE IF NOT EXISTS gcra_state (key TEXT PRIMARY KEY, tat REAL NOT NULL)")
+            conn.execute("DELETE FROM gcra_state")
+            conn.executemany("INSERT INTO gcra_state (key, tat) VALUES (?, ?)", entries)
+        return len(entries)
+
+    def restore(self) -> int:
+        """
+        Load state saved by save(). Keys already tracked keep the later TAT.
+
+        Returns:
+            int: Number of keys restored
+        """
+        if not self.db_path:
+            return 0
+        now = time.time()
         with sqlite3.connect(self.db_path) as conn:
-            result = conn.execute(
-                "SELECT count FROM rate_limits WHERE key = ?",
-                (key,)
-            ).fetchone()
-            
-            if not result:
-                return limit
-            
-            return max(0, limit - result[0])
-
-# Initialize rate limiter
-rate_limiter = SQLiteRateLimiter()
-
-# Rate limiting middleware
+            conn.execute("CREATE TABLE IF NOT EXISTS gcra_state (key TEXT PRIMARY KEY, tat REAL NOT NULL)")
+            rows = conn.execute("SELECT key, tat FROM gcra_state WHERE tat > ?", (now,)).fetchall()
+
+        for key, tat in rows:
+            shard = self._shard(key)
+            with shard.lock:
+                shard.tats[key] = max(shard.tats.get(key, 0.0), tat)
+        return len(rows)
+
+    def _run(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.save()
+            except sqlite3.Error as e:
+                logger.error(f"Error saving rate limit state: {str(e)}")
+
+    def start(self, persist_interval: float):
+        """Restore saved state and save it every persist_interval seconds."""
+        if not self.db_path or persist_interval <= 0:
+            return
+        if self._thread and self._thread.is_alive():
+            return
+        try:
+            restored = self.restore()
+            logger.info(f"Restored rate limit state for {restored} keys from {self.db_path}")
+        except sqlite3.Error as e:
+            logger.error(f"Error restoring rate limit state: {str(e)}")
+
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(persist_interval,), name="rate-limit-persist", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop periodic persistence, saving the state one last time."""
+        if not self._thread:
+            return
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+        try:
+            self.save()
+        except sqlite3.Error as e:
+            logger.error(f"Error saving rate limit state: {str(e)}")
+
+
+rate_limiter = GCRARateLimiter(
+    shards=Config.RATE_LIMIT_SHARDS,
+    db_path=Config.RATE_LIMIT_DB if Config.RATE_LIMIT_PERSIST_INTERVAL > 0 else None,
+)
+
+
+def endpoint_limit(path: str) -> Tuple[str, int]:
+    """
+    Find the rate limit rule for a request path.
+
+    Rules in Config.RATE_LIMITS match a path exactly, or by prefix when they
+    end in "*"; the longest matching prefix wins.
+
+    Returns:
+        Tuple of (rule name, requests per window)
+    """
+    limits = Config.RATE_LIMITS
+    if path in limits:
+        return path, limits[path]
+
+    best = None
+    for rule in limits:
+        if rule.endswith("*") and path.startswith(rule[:-1]):
+            if best is None or len(rule) > len(best):
+                best = rule
+    if best is not None:
+        return best, limits[best]
+    return "default", Config.RATE_LIMIT_DEFAULT
+
+
 async def rate_limit_middleware(request: Request, call_next):
-    """Apply rate limiting to requests"""
-    
-    # Get identifier
-    client_ip = request.client.host
+    """Apply per-client, per-endpoint rate limits to requests."""
+    rule, limit = endpoint_limit(request.url.path)
+    window = Config.RATE_LIMIT_WINDOW
+
+    # Limit by API key once it is verified, otherwise by IP: unverified keys are
+    # attacker-chosen, and raw keys must not end up in the persisted state
+    client = f"ip:{request.client.host if request.client else 'unknown'}"
+    result = None
     api_key = request.headers.get("X-API-Key", "")
-    
-    # Use API key if available, otherwise IP
-    rate_key = f"api:{api_key}" if api_key else f"ip:{client_ip}"
-    
-    # Define limits per endpoint
-    endpoint_limits = {
-        "/jobs": 100,        # 100 jobs per hour
-        "/health": 1000,     # 1000 health checks per hour
-        "/token": 50,        # 50 token requests per hour
-        "/execute": 200,     # 200 executions per hour
-    }
-    
-    # Get limit for this endpoint
-    path = request.url.path
-    limit = endpoint_limits.get(path, 200)  # Default 200/hour
-    
-    # Check rate limit
-    if not rate_limiter.is_allowed(rate_key, limit):
-        remaining = rate_limiter.get_remaining(rate_key, limit)
+    if api_key:
+        record = auth.cached_api_key(api_key)
+        if record is None:
+            # Verifying an uncached key reads the database: count it against the IP
+            # first, so made-up keys cannot buy unthrottled lookups
+            result = rate_limiter.check(f"{client}|{rule}", limit, window)
+            if result.allowed:
+                record = await run_in_threadpool(auth.verify_api_key, api_key)
+        if record:
+            client = f"api:{record['id']}"
+            result = None
+
+    if result is None:
+        result = rate_limiter.check(f"{client}|{rule}", limit, window)
+    reset = str(int(result.reset_after + 0.999))
+
+    if not result.allowed:
+        retry_after = str(max(int(result.retry_after + 0.999), 1))
         return JSONResponse(
             status_code=429,
             content={
                 "detail": "Rate limit exceeded",
                 "limit": limit,
-                "remaining": remaining,
-                "reset_in_seconds": 3600
+                "remaining": result.remaining,
+                "reset_in_seconds": int(reset)
             },
             headers={
                 "X-RateLimit-Limit": str(limit),
-                "X-RateLimit-Remaining": str(remaining),
-                "X-RateLimit-Reset": str(3600),
-                "Retry-After": "3600"
+                "X-RateLimit-Remaining": str(result.remaining),
+                "X-RateLimit-Reset": reset,
+                "Retry-After": retry_after
             }
         )
-    
-    # Add rate limit headers to response
+
     response = await call_next(request)
-    remaining = rate_limiter.get_remaining(rate_key, limit)
-    
     response.headers["X-RateLimit-Limit"] = str(limit)
-    response.headers["X-RateLimit-Remaining"] = str(remaining)
-    
-    return response
\ No newline at end of file
+    response.headers["X-RateLimit-Remaining"] = str(result.remaining)
+    response.headers["X-RateLimit-Reset"] = reset
+    return response
@@ -0,0 +1,138 @@
+"""
+RPA Orchestration System - Result Diff
+--------------------------------------
+Structural diff and patch for JSON documents, used by the per-circuit
+validation timeline to store repeat validations as changes against the
+previous result.
+
+A patch is a list of operations in the style of RFC 6902:
+    {"op": "add" | "remove" | "replace", "path": [key_or_index, ...], "value": ...}
+Paths are lists rather than JSON Pointer strings so dictionary keys need no
+escaping. Dictionaries are diffed key by key and lists index by index, with
+elements appended or removed at the tail.
+"""
+import copy
+from typing import Any, Dict, List, Sequence
+
+# Keys whose values differ on every run without the service having changed.
+# Changes under them are stored so results reconstruct exactly, but they are
+# not reported as a change of the circuit.
+VOLATILE_KEYS = frozenset({
+    "timestamp",
+    "execution_time",
+    "execution_time_seconds",
+    "job_id",
+    "external_job_id",
+    "screenshot_data",
+    "screenshots",
+    "evidence",
+    "evidence_dir",
+    "log_file",
+})
+
+
+class PatchError(ValueError):
+    """Raised when a patch does not apply to a document."""
+    pass
+
+
+def diff(old: Any, new: Any, include_old: bool = False) -> List[Dict[str, Any]]:
+    """
+    Compute the operations that turn old into new.
+
+    Args:
+        old: Previous document
+        new: Current document
+        include_old: Also record the previous value of replaced and removed
+            entries (for display; not needed to apply the patch)
+
+    Returns:
+        List of patch operations, empty if the documents are equal
+    """
+    ops: List[Dict[str, Any]] = []
+    _diff(old, new, [], ops, include_old)
+    return ops
+
+
+def _diff(old: Any, new: Any, path: List, ops: List[Dict[str, Any]], include_old: bool):
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key, old_value in old.items():
+            if key not in new:
+                ops.append(_op("remove", path + [key], old_value=old_value, include_old=include_old))
+            else:
+                _diff(old_value, new[key], path + [key], ops, include_old)
+        for key, new_value in new.items():
+            if key not in old:
+                ops.append(_op("add", path + [key], value=new_value))
+        return
+
+    if isinstance(old, list) and isinstance(new, list):
+        common = min(len(old), len(new))
+        for index in range(common):
+            _diff(old[index], new[index], path + [index], ops, include_old)
+        for index in range(common, len(new)):
+            ops.append(_op("add", path + [index], value=new[index]))
+        # Remove from the end so earlier indexes stay valid while applying
+        for index in range(len(old) - 1, common - 1, -1):
+            ops.append(_op("remove", path + [index], old_value=old[index], include_old=include_old))
+        return
+
+    if type(old) is not type(new) or old != new:
+        ops.append(_op("replace", path, value=new, old_value=old, include_old=include_old))
+
+
+def _op(op: str, path: List, value: Any = None, old_value: Any = None, include_old: bool = False) -> Dict[str, Any]:
+    entry: Dict[str, Any] = {"op": op, "path": path}
+    if op != "remove":
+        entry["value"] = value
+    if include_old and op != "add":
+        entry["old"] = old_value
+    return entry
+
+
+def apply(document: Any, patch: Sequence[Dict[str, Any]]) -> Any:
+    """
+    Apply a patch produced by diff() and return the new document.
+
+    The input document is not modified.
+
+    Raises:
+        PatchError: If an operation's path does not exist in the document
+    """
+    result = copy.deepcopy(document)
+    for operation in patch:
+        path = operation["path"]
+        if not path:
+            # Whole-document replacement
+            result = copy.deepcopy(operation.get("value"))
+            continue
+
+        try:
+            parent = result
+            for key in path[:-1]:
+                parent = parent[key]
+            key = path[-1]
+
+            if operation["op"] == "remove":
+                del parent[key]
+            elif operation["op"] == "add" and isinstance(parent, list):
+                parent.insert(key, copy.deepcopy(operation["value"]))
+            else:
+                parent[key] = copy.deepcopy(operation["value"])
+        except (KeyError, IndexError, TypeError) as e:
+            raise PatchError(f"Cannot apply {operation['op']} at {path}: {str(e)}") from e
+
+    return result
+
+
+def is_volatile(operation: Dict[str, Any]) -> bool:
+    """Check whether an operation only touches run-specific data such as timestamps."""
+    return any(
+        isinstance(key, str) and (key in VOLATILE_KEYS or key.endswith("_timestamp"))
+        for key in operation["path"]
+    )
+
+
+def significant_changes(patch: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Filter a patch down to the operations that reflect a change of the service."""
+    return [operation for operation in patch if not is_volatile(operation)]
@@ -0,0 +1,119 @@
+"""
+RPA Orchestration System - Screenshot Store
+-------------------------------------------
+Content-addressed on-disk storage for job screenshots.
+
+Images are stored as raw binary files named by the SHA-256 of their bytes,
+sharded into sub-directories by the first two hex characters. Identical
+frames captured by different jobs (e.g. the post-login page) are written
+once and shared; the database only keeps metadata and the content hash.
+"""
+import base64
+import binascii
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Optional, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class ScreenshotStoreError(Exception):
+    """Raised when a screenshot cannot be written to or read from the store."""
+    pass
+
+
+def _object_path(content_hash: str) -> Path:
+    """Get the on-disk path for a content hash."""
+    if not _HASH_PATTERN.match(content_hash or ""):
+        raise ScreenshotStoreError(f"Invalid screenshot content hash: {content_hash!r}")
+    return Path(Config.SCREENSHOT_STORE_DIR) / content_hash[:2] / content_hash
+
+
+def decode_base64_image(base64_data: str) -> bytes:
+    """
+    Decode base64 image data as produced by the automations.
+
+    Accepts both bare base64 and ``data:<mime>;base64,`` URIs.
+    """
+    if base64_data.startswith("data:") and "," in base64_data:
+        base64_data = base64_data.split(",", 1)[1]
+    try:
+        return base64.b64decode(base64_data, validate=False)
+    except (binascii.Error, ValueError) as e:
+        raise ScreenshotStoreError(f"Invalid base64 screenshot data: {str(e)}") from e
+
+
+def put_bytes(image_bytes: bytes) -> Tuple[str, int]:
+    """
+    Store image bytes, deduplicating on content.
+
+    Args:
+        image_bytes: Raw image bytes
+
+    Returns:
+        Tuple[str, int]: SHA-256 content hash and size in bytes
+    """
+    content_hash = hashlib.sha256(image_bytes).hexdigest()
+    path = _object_path(content_hash)
+
+    if path.exists():
+        logger.debug(f"Screenshot {content_hash} already stored, reusing")
+        return content_hash, len(image_bytes)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Write to a temporary file in the same directory and rename so readers
+    # never observe a partially written object.
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp_")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(image_bytes)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise ScreenshotStoreError(f"Failed to write screenshot {content_hash}: {str(e)}") from e
+
+    return content_hash, len(image_bytes)
+
+
+def put_base64(base64_data: str) -> Tuple[str, int]:
+    """Decode base64 image data and store it. See put_bytes."""
+    return put_bytes(decode_base64_image(base64_data))
+
+
+def get_path(content_hash: str) -> Optional[Path]:
+    """
+    Get the path of a stored screenshot.
+
+    Returns:
+        Path: Path to the image file, or None if it is not in the store
+    """
+    path = _object_path(content_hash)
+    return path if path.exists() else None
+
+
+def read_bytes(content_hash: str) -> Optional[bytes]:
+    """Read a stored screenshot, or None if it is not in the store."""
+    path = get_path(content_hash)
+    if path is None:
+        return None
+    return path.read_bytes()
+
+
+def read_base64(content_hash: str) -> Optional[str]:
+    """Read a stored screenshot as a base64 string, or None if missing."""
+    image_bytes = read_bytes(content_hash)
+    if image_bytes is None:
+        return None
+    return base64.b64encode(image_bytes).decode("ascii")
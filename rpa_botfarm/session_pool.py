@@ -0,0 +1,353 @@
+"""
+RPA Orchestration System - Session Pool
+---------------------------------------
+Logged-in portal sessions kept between jobs on the worker.
+
+Logging in to a provider portal (Octotel with TOTP, OSN, Evotel, MetroFiber)
+is often a third of a job's run time. For providers listed in
+SESSION_POOL_PROVIDERS the browser of a job that logged in is not reset
+afterwards but kept, per automation and portal account, for the next job.
+
+Before a session is reused its liveness check runs: the portal's landing
+page is loaded and whichever of a logged-in or logged-out marker shows up
+first decides. Sessions that fail the check, or sat idle longer than
+SESSION_POOL_MAX_IDLE seconds, are handed back to the driver pool (which
+resets or replaces the browser) and the job logs in as usual.
+
+With SESSION_STATE_KEY set, each kept session's cookies and localStorage are
+also saved encrypted (see session_state) and loaded into new browsers when
+the worker starts, so a restart does not log every account in again.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import session_state
+from config import Config
+from driver_pool import driver_pool
+from process_governor import driver_pid, process_governor
+
+logger = logging.getLogger(__name__)
+
+# Default logged-out marker: any password field on the page
+PASSWORD_FIELD = ("css selector", "input[type='password']")
+# Seconds between marker lookups during a liveness check
+CHECK_POLL_INTERVAL = 0.25
+
+
+@dataclass
+class _Session:
+    driver: Any
+    logged_in_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    uses: int = 1
+
+
+@dataclass
+class _KeyStats:
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    restored: int = 0
+    reused_age_total: float = 0.0
+
+
+def page_check(
+    url: str,
+    logged_in: Tuple[str, str],
+    logged_out: Optional[Tuple[str, str]] = PASSWORD_FIELD,
+    timeout: Optional[float] = None
+) -> Callable[[Any], bool]:
+    """
+    Build a liveness check that loads a portal page and looks for markers.
+
+    Args:
+        url: Page to load; should redirect to the login page when logged out
+        logged_in: (By strategy, selector) present only when logged in
+        logged_out: (By strategy, selector) present only when logged out
+        timeout: Seconds to wait for either marker; defaults to SESSION_POOL_CHECK_TIMEOUT
+
+    Returns:
+        Callable taking a driver and returning True if its session is still logged in
+    """
+    def check(driver) -> bool:
+        # Markers are polled here; the job's implicit wait is set again by its create_driver
+        driver.implicitly_wait(0)
+        driver.get(url)
+        deadline = time.monotonic() + (timeout or Config.SESSION_POOL_CHECK_TIMEOUT)
+        while time.monotonic() < deadline:
+            if driver.find_elements(*logged_in):
+                return True
+            if logged_out and driver.find_elements(*logged_out):
+                return False
+            time.sleep(CHECK_POLL_INTERVAL)
+        return False
+
+    return check
+
+
+class SessionPool:
+    """
+    Logged-in browsers per automation and portal account.
+
+    Args:
+        providers: Providers whose sessions are kept
+        size: Idle sessions kept per automation and account
+        max_idle_seconds: Sessions idle longer are not checked but dropped
+    """
+
+    def __init__(self, providers: List[str], size: int = 2, max_idle_seconds: float = 600):
+        self.providers = {provider.strip().lower() for provider in providers if provider.strip()}
+        self.size = max(size, 0)
+        self.max_idle_seconds = max_idle_seconds
+
+        self._lock = threading.Lock()
+        self._checks: Dict[str, Callable[[Any], bool]] = {}
+        self._idle: Dict[Tuple[str, str], List[_Session]] = {}
+        self._leased: Dict[int, _Session] = {}
+        self._stats: Dict[str, _KeyStats] = {}
+        self._closed = False
+
+    def enabled_for(self, key: str) -> bool:
+        """Whether sessions of an automation key ("<provider>.<action>") are kept."""
+        return self.size > 0 and key.split(".", 1)[0].lower() in self.providers
+
+    def register_check(self, key: str, check: Callable[[Any], bool]):
+        """
+        Register the liveness check for an automation's sessions.
+
+        Args:
+            key: Automation key, as registered with the driver pool
+            check: Takes a driver, returns True if it is still logged in (see page_check)
+        """
+        with self._lock:
+            self._checks[key] = check
+            self._stats.setdefault(key, _KeyStats())
+
+    def checkout(self, key: str, account: str):
+        """
+        Get a live logged-in session for a job, if one is kept.
+
+        Args:
+            key: Automation key
+            account: Portal account the job logs in as
+
+        Returns:
+            A logged-in driver, or None if the job has to get a driver and log in
+        """
+        if not self.enabled_for(key) or key not in self._checks:
+            return None
+
+        while True:
+            with self._lock:
+                sessions = self._idle.get((key, account))
+                # Most recently used first: the least likely to have expired
+                session = sessions.pop() if sessions else None
+                if session is None:
+                    self._stats[key].misses += 1
+                    return None
+
+            idle_for = time.monotonic() - session.last_used
+            # Whether the portal session itself is gone, rather than the browser
+            stale = True
+            if idle_for > self.max_idle_seconds:
+                alive = False
+                reason = f"idle for {idle_for:.0f}s"
+            else:
+                try:
+                    alive = self._checks[key](session.driver)
+                    reason = "logged out"
+                except Exception as e:
+                    alive = stale = False
+                    reason = f"check failed: {str(e)}"
+
+            if alive:
+                now = time.monotonic()
+                session.uses += 1
+                session.last_used = now
+                with self._lock:
+                    self._leased[id(session.driver)] = session
+                    stats = self._stats[key]
+                    stats.hits += 1
+                    stats.reused_age_total += now - session.logged_in_at
+                driver_pool.record_use(session.driver)
+                process_governor.attach(session.driver)
+                return session.driver
+
+            logger.info(f"Dropping {key} session: {reason}")
+            with self._lock:
+                self._stats[key].expired += 1
+            if stale:
+                session_state.forget(key, account)
+            self._drop(key, session.driver)
+
+    def release(self, key: str, account: str, driver, logged_in: bool) -> None:
+        """
+        Give back a job's driver: keep it logged in for the next job, or hand it to the driver pool.
+
+        Args:
+            key: Automation key
+            account: Portal account the driver is logged in as
+            driver: The job's driver
+            logged_in: Whether the job logged in (or reused a session) on this driver
+
+        Raises:
+            Exception: From driver.quit() for automations the driver pool does not pool
+        """
+        if driver is None:
+            return
+        with self._lock:
+            session = self._leased.pop(id(driver), None)
+
+        if not logged_in or not self.enabled_for(key) or key not in self._checks:
+            driver_pool.release(key, driver)
+            return
+
+        if session is None:
+            # Logged in during this job
+            session = _Session(driver)
+        session.last_used = time.monotonic()
+
+        worn_out = session.uses >= driver_pool.max_uses or driver_pool.worn_out(driver)
+        if not worn_out:
+            self._save_state(key, account, driver)
+        with self._lock:
+            sessions = self._idle.setdefault((key, account), [])
+            if any(kept.driver is driver for kept in sessions):
+                # Released twice
+                return
+            if not worn_out and not self._closed and len(sessions) < self.size:
+                sessions.append(session)
+                return
+        self._drop(key, driver)
+
+    @staticmethod
+    def _save_state(key: str, account: str, driver):
+        """Save a session's cookies and localStorage for the next worker start."""
+        if not session_state.enabled():
+            return
+        try:
+            state = session_state.capture(driver)
+            if state:
+                session_state.save(key, account, state)
+        except Exception as e:
+            logger.warning(f"Error saving {key} session state: {str(e)}")
+
+    def restore_saved(self) -> int:
+        """
+        Start sessions from the state saved by earlier workers.
+
+        For every saved session of a pooled automation a driver is started,
+        the cookies and localStorage are loaded into it and the liveness check
+        runs; sessions that are still logged in are kept for the next job.
+
+        Returns:
+            int: Number of sessions restored
+        """
+        restored = 0
+        for key, account, saved_at, state in session_state.saved_sessions():
+            if not self.enabled_for(key) or key not in self._checks:
+                continue
+            with self._lock:
+                if self._closed or len(self._idle.get((key, account), [])) >= self.size:
+                    continue
+
+            try:
+                driver = driver_pool.acquire(key)
+            except Exception as e:
+                logger.error(f"Error starting driver to restore {key} session: {str(e)}")
+                continue
+            try:
+                session_state.apply(driver, state)
+                alive = self._checks[key](driver)
+            except Exception as e:
+                logger.warning(f"Error restoring {key} session: {str(e)}")
+                alive = False
+
+            if not alive:
+                session_state.forget(key, account)
+                self._drop(key, driver)
+                continue
+
+            age = max(time.time() - saved_at, 0)
+            session = _Session(driver, logged_in_at=time.monotonic() - age)
+            with self._lock:
+                sessions = self._idle.setdefault((key, account), [])
+                if not self._closed and len(sessions) < self.size:
+                    sessions.append(session)
+                    self._stats[key].restored += 1
+                    restored += 1
+                    continue
+            self._drop(key, driver)
+
+        if restored:
+            logger.info(f"Restored {restored} logged-in portal sessions from saved state")
+        return restored
+
+    def kept_pids(self, include_leased: bool = False) -> Set[int]:
+        """Chromedriver pids of idle sessions, for the process governor; leased ones are the driver pool's."""
+        with self._lock:
+            drivers = [session.driver for sessions in self._idle.values() for session in sessions]
+        return {pid for pid in map(driver_pid, drivers) if pid is not None}
+
+    def discard(self, key: str, driver) -> None:
+        """Quit a job's driver that is in an unknown state, whether or not it came from a kept session."""
+        if driver is None:
+            return
+        with self._lock:
+            self._leased.pop(id(driver), None)
+        driver_pool.discard(key, driver)
+
+    @staticmethod
+    def _drop(key: str, driver):
+        try:
+            driver_pool.release(key, driver)
+        except Exception as e:
+            logger.warning(f"Error releasing {key} session driver: {str(e)}")
+
+    def shutdown(self):
+        """Hand every idle session back to the driver pool."""
+        with self._lock:
+            self._closed = True
+            idle = [(key, session) for (key, _), sessions in self._idle.items() for session in sessions]
+            self._idle.clear()
+        for key, session in idle:
+            self._drop(key, session.driver)
+
+    def stats(self) -> Dict[str, Any]:
+        """Idle sessions, hit rate and session ages per automation key, for /status."""
+        now = time.monotonic()
+        with self._lock:
+            pools = {}
+            for key, stats in self._stats.items():
+                if not self.enabled_for(key):
+                    continue
+                sessions = [s for (k, _), idle in self._idle.items() if k == key for s in idle]
+                ages = [now - s.logged_in_at for s in sessions]
+                lookups = stats.hits + stats.misses
+                pools[key] = {
+                    "idle": len(sessions),
+                    "hits": stats.hits,
+                    "misses": stats.misses,
+                    "expired": stats.expired,
+                    "restored": stats.restored,
+                    "hit_rate": round(stats.hits / lookups, 3) if lookups else None,
+                    "oldest_session_seconds": round(max(ages), 1) if ages else None,
+                    "avg_reused_age_seconds": round(stats.reused_age_total / stats.hits, 1) if stats.hits else None,
+                }
+            return {
+                "providers": sorted(self.providers),
+                "size": self.size,
+                "max_idle_seconds": self.max_idle_seconds,
+                "pools": pools,
+            }
+
+
+session_pool = SessionPool(
+    providers=Config.SESSION_POOL_PROVIDERS,
+    size=Config.SESSION_POOL_SIZE,
+    max_idle_seconds=Config.SESSION_POOL_MAX_IDLE,
+)
+process_governor.register_keeper(session_pool.kept_pids)
@@ -0,0 +1,189 @@
+"""
+RPA Orchestration System - Session State
+----------------------------------------
+Encrypted snapshots of portal session state (cookies and localStorage) per
+automation and portal account, so kept sessions survive worker restarts.
+
+Each snapshot is one file in SESSION_STATE_DIR, named by the automation key
+and a hash of the account, holding Fernet-encrypted (AES-128-CBC with
+HMAC-SHA256) JSON. Snapshots older than SESSION_STATE_MAX_AGE are ignored.
+Saving needs the cryptography package and SESSION_STATE_KEY; without either
+nothing is written, so session state never reaches disk unencrypted.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from config import Config
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+except ImportError:  # pragma: no cover - optional dependency
+    Fernet = None
+    InvalidToken = Exception
+
+logger = logging.getLogger(__name__)
+
+SUFFIX = ".state"
+# Fields of CDP Network.Cookie passed back to Network.setCookies
+_COOKIE_FIELDS = ("name", "value", "domain", "path", "secure", "httpOnly", "sameSite")
+
+_CAPTURE_SCRIPT = """
+var items = {};
+try {
+    for (var i = 0; i < window.localStorage.length; i++) {
+        var name = window.localStorage.key(i);
+        items[name] = window.localStorage.getItem(name);
+    }
+} catch (e) {}
+return {origin: window.location.origin, url: window.location.href, local_storage: items};
+"""
+
+_RESTORE_SCRIPT = """
+var items = arguments[0];
+for (var name in items) { window.localStorage.setItem(name, items[name]); }
+"""
+
+_fernet = None
+_invalid_key = False
+
+
+def _cipher():
+    global _fernet, _invalid_key
+    if _fernet is None and not _invalid_key and enabled():
+        try:
+            _fernet = Fernet(Config.SESSION_STATE_KEY.encode())
+        except (ValueError, TypeError) as e:
+            _invalid_key = True
+            logger.error(f"Invalid SESSION_STATE_KEY, session state is not saved: {str(e)}")
+    return _fernet
+
+
+def enabled() -> bool:
+    """Whether session state can be saved and restored."""
+    return Fernet is not None and bool(Config.SESSION_STATE_KEY)
+
+
+def state_path(key: str, account: str) -> Path:
+    """File holding the saved state of an automation and account."""
+    account_hash = hashlib.sha256(account.encode("utf-8")).hexdigest()[:16]
+    return Path(Config.SESSION_STATE_DIR) / f"{key}.{account_hash}{SUFFIX}"
+
+
+def capture(driver) -> Optional[Dict[str, Any]]:
+    """
+    Read a driver's cookies (all domains) and the localStorage of its current page.
+
+    Returns:
+        dict: Session state, or None if the driver is not on a web page
+    """
+    page = driver.execute_script(_CAPTURE_SCRIPT)
+    if not page or page.get("origin") in (None, "", "null"):
+        return None
+    cookies = driver.execute_cdp_cmd("Network.getAllCookies", {}).get("cookies", [])
+    return {
+        "url": page["url"],
+        "origin": page["origin"],
+        "local_storage": page.get("local_storage") or {},
+        "cookies": cookies,
+    }
+
+
+def apply(driver, state: Dict[str, Any]) -> None:
+    """
+    Load saved cookies and localStorage into a driver.
+
+    Cookies are set through CDP, so no page has to be open; localStorage is
+    written on the saved origin, which the driver is left on.
+    """
+    cookies = []
+    for cookie in state.get("cookies", []):
+        param = {name: cookie[name] for name in _COOKIE_FIELDS if name in cookie}
+        # Session cookies carry expires -1, which setCookies rejects
+        if not cookie.get("session") and cookie.get("expires", -1) > 0:
+            param["expires"] = cookie["expires"]
+        cookies.append(param)
+    if cookies:
+        driver.execute_cdp_cmd("Network.setCookies", {"cookies": cookies})
+    local_storage = state.get("local_storage") or {}
+    if local_storage:
+        driver.get(state["origin"])
+        driver.execute_script(_RESTORE_SCRIPT, local_storage)
+
+
+def save(key: str, account: str, state: Dict[str, Any]) -> bool:
+    """
+    Write the session state of an automation and account, replacing the previous one.
+
+    Returns:
+        bool: True if written
+    """
+    cipher = _cipher()
+    if cipher is None:
+        return False
+    payload = json.dumps({"key": key, "account": account, "saved_at": time.time(), "state": state})
+    token = cipher.encrypt(payload.encode("utf-8"))
+
+    path = state_path(key, account)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write and rename so a crash never leaves a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".", suffix=SUFFIX)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(token)
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return True
+
+
+def _read(path: Path) -> Optional[Dict[str, Any]]:
+    cipher = _cipher()
+    if cipher is None:
+        return None
+    try:
+        return json.loads(cipher.decrypt(path.read_bytes(), ttl=Config.SESSION_STATE_MAX_AGE))
+    except InvalidToken:
+        # Expired, or written with another key
+        logger.info(f"Ignoring saved session state {path.name}: expired or not readable with SESSION_STATE_KEY")
+    except (OSError, ValueError) as e:
+        logger.warning(f"Error reading saved session state {path.name}: {str(e)}")
+    return None
+
+
+def saved_sessions() -> Iterator[Tuple[str, str, float, Dict[str, Any]]]:
+    """
+    Yield every current saved session.
+
+    Yields:
+        Tuple of (automation key, account, saved_at epoch seconds, state)
+    """
+    directory = Path(Config.SESSION_STATE_DIR)
+    if not enabled() or not directory.is_dir():
+        return
+    for path in sorted(directory.glob(f"*{SUFFIX}")):
+        if path.name.startswith("."):
+            continue
+        record = _read(path)
+        if record:
+            yield record["key"], record["account"], record["saved_at"], record["state"]
+
+
+def forget(key: str, account: str) -> None:
+    """Delete the saved state of an automation and account."""
+    try:
+        state_path(key, account).unlink()
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Error deleting saved session state for {key}: {str(e)}")
@@ -0,0 +1,110 @@
+"""
+RPA Orchestration System - Status Snapshot
+------------------------------------------
+Background-refreshed, in-memory copy of an expensive status document.
+
+Status endpoints read the last snapshot instead of querying the database
+and probing workers on the request path, so their latency does not depend
+on database load or on how quickly an unhealthy worker times out.
+"""
+import datetime
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StatusSnapshot:
+    """
+    Periodically calls a collector function in a daemon thread and keeps
+    its latest result.
+
+    Args:
+        collect: Function returning the status document; may block
+        max_age: Seconds after which a snapshot is reported as stale.
+            The collector runs every max_age / 3 seconds.
+        name: Name used for the thread and log messages
+    """
+
+    def __init__(self, collect: Callable[[], Any], max_age: float, name: str = "status"):
+        self._collect = collect
+        self.max_age = max_age
+        self.name = name
+        self._lock = threading.Lock()
+        self._value = None
+        self._collected_monotonic: Optional[float] = None
+        self._collected_at: Optional[datetime.datetime] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def refresh_interval(self) -> float:
+        """Seconds between refreshes."""
+        return max(self.max_age / 3, 1)
+
+    def refresh(self) -> bool:
+        """
+        Collect a new snapshot now.
+
+        Returns:
+            bool: True if the collector succeeded; the previous snapshot is kept otherwise
+        """
+        try:
+            value = self._collect()
+        except Exception as e:
+            logger.error(f"Error refreshing {self.name} snapshot: {str(e)}")
+            return False
+
+        with self._lock:
+            self._value = value
+            self._collected_monotonic = time.monotonic()
+            self._collected_at = datetime.datetime.now(datetime.UTC)
+        return True
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self.refresh()
+            self._stop.wait(max(self.refresh_interval - (time.monotonic() - started), 0))
+
+    def start(self):
+        """Start the background refresh thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-snapshot", daemon=True)
+        self._thread.start()
+        logger.info(f"Started {self.name} snapshot refresh every {self.refresh_interval:.0f}s")
+
+    def stop(self):
+        """Stop the background refresh thread."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def get(self) -> Dict[str, Any]:
+        """
+        Get the latest snapshot without blocking on the collector.
+
+        Returns:
+            Dict with "value" (None before the first refresh completes),
+            "as_of", "age_seconds" and "stale"
+        """
+        with self._lock:
+            value = self._value
+            collected_monotonic = self._collected_monotonic
+            collected_at = self._collected_at
+
+        if collected_monotonic is None:
+            return {"value": None, "as_of": None, "age_seconds": None, "stale": True}
+
+        age = time.monotonic() - collected_monotonic
+        return {
+            "value": value,
+            "as_of": collected_at.isoformat(),
+            "age_seconds": round(age, 1),
+            "stale": age > self.max_age,
+        }
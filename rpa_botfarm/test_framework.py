@@ -391,13 +391,23 @@ class RpaTestFramework:
     
     def _monitor_job(self, job_id, timeout=300):
         start_time = time.time()
+        since_seq = None
         
         while (time.time() - start_time) < timeout:
             try:
-                response = requests.get(f"{self.orchestrator_url}/jobs/{job_id}", timeout=self.timeout)
+                # Long-poll: the orchestrator answers as soon as the job changes
+                params = {"wait": 30}
+                if since_seq is not None:
+                    params["since_seq"] = since_seq
+                response = requests.get(
+                    f"{self.orchestrator_url}/jobs/{job_id}",
+                    params=params,
+                    timeout=self.timeout + 30
+                )
                 if response.status_code == 200:
                     job = response.json()
                     status = job.get("status")
+                    since_seq = job.get("change_seq")
                     
                     logger.info(f"Job {job_id} status: {status}")
                     
@@ -412,7 +422,9 @@ class RpaTestFramework:
                                 logger.error(f"Error details: {result.get('error', 'No details')}")
                             return False
                     
-                    time.sleep(5)
+                    if since_seq is None:
+                        # Orchestrator without long-poll support
+                        time.sleep(5)
                 else:
                     logger.error(f"Failed to get job status: {response.status_code}")
                     return False
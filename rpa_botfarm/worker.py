@@ -12,6 +12,7 @@ import json
 import importlib
 import os
 import platform
+import threading
 import traceback
 import time
 from pathlib import Path
@@ -27,16 +28,23 @@ from tenacity import (
     stop_after_attempt,
     wait_exponential,
     retry_if_exception_type,
+    retry_if_not_exception_type,
     before_log,
     after_log,
     RetryError
 )
-from contextlib import contextmanager, asynccontextmanager
+from contextlib import asynccontextmanager
 
 # Import shared configuration
 from config import Config
 from apscheduler.schedulers.background import BackgroundScheduler
 from health_reporter import HealthReporter
+from driver_pool import driver_pool
+from session_pool import session_pool
+from job_executor import job_executor, JobRejected
+from process_pool import process_pool, ChildError
+from process_governor import JobTimeout, process_governor
+import session_state
 
 worker_scheduler = BackgroundScheduler()
 
@@ -164,11 +172,6 @@ class SQLiteJobStatusStore:
 
 job_status_store = SQLiteJobStatusStore()
 
-# Global job counter and statistics
-ACTIVE_JOBS = 0
-TOTAL_JOBS = 0
-SUCCESSFUL_JOBS = 0
-FAILED_JOBS = 0
 START_TIME = datetime.now(UTC)
 
 # Define models with validation
@@ -273,10 +276,47 @@ async def lifespan(app: FastAPI):
     for provider, actions in automation_info['actions'].items():
         logger.info(f"Provider {provider} actions: {', '.join(actions)}")
     
+    if Config.CONJUR_PREFETCH:
+        # Warm the secret cache without holding up startup if Conjur is slow
+        import conjur_client
+        threading.Thread(target=conjur_client.prefetch_secrets, name="conjur-prefetch", daemon=True).start()
+    
+    pooled_providers = driver_pool.providers | session_pool.providers
+    # Per-job browser limits and cleanup, and reaping of orphaned Chrome processes
+    process_governor.start()
+    
+    if process_pool is not None:
+        # Jobs run in child processes, each with its own driver and session pools
+        process_pool.start([
+            f"automations.{provider}.{action}"
+            for provider, actions in automation_info['actions'].items()
+            for action in actions
+        ])
+    elif pooled_providers:
+        # Importing an automation registers its Chrome launcher and session check with the pools
+        for provider, actions in automation_info['actions'].items():
+            if provider not in pooled_providers:
+                continue
+            for action in actions:
+                try:
+                    importlib.import_module(f"automations.{provider}.{action}")
+                except Exception as e:
+                    logger.warning(f"Not warming drivers for {provider}/{action}: {str(e)}")
+        driver_pool.prewarm()
+    
+    if process_pool is None and session_pool.providers and session_state.enabled():
+        # Log saved portal sessions back in without holding up startup
+        threading.Thread(target=session_pool.restore_saved, name="session-restore", daemon=True).start()
+    
     yield
     
     # Shutdown events
     logger.info("Worker service shutting down")
+    if process_pool is not None:
+        process_pool.shutdown()
+    session_pool.shutdown()
+    driver_pool.shutdown()
+    process_governor.stop()
 
 # Initialize FastAPI app with lifespan context
 app = FastAPI(
@@ -331,22 +371,6 @@ async def validate_ip_addresses(request: Request, call_next):
         
     return await call_next(request)
 
-# Context manager for job stats tracking
-@contextmanager
-def job_stats_tracking():
-    """Track job execution statistics."""
-    global ACTIVE_JOBS, TOTAL_JOBS
-    
-    # Start tracking
-    ACTIVE_JOBS += 1
-    TOTAL_JOBS += 1
-    
-    try:
-        yield
-    finally:
-        # End tracking
-        ACTIVE_JOBS = max(0, ACTIVE_JOBS - 1)
-
 # Helper functions
 def is_selenium_available():
     """Check if Selenium is available."""
@@ -415,15 +439,25 @@ def load_automation_module(provider: str, action: str):
 @retry(
     stop=stop_after_attempt(Config.MAX_RETRY_ATTEMPTS),
     wait=wait_exponential(multiplier=1, min=Config.RETRY_DELAY//3, max=Config.RETRY_DELAY),
-    retry=retry_if_exception_type(Exception),
+    # A job killed at its time limit is not run again
+    retry=retry_if_not_exception_type(JobTimeout),
     before=before_log(logger, logging.INFO),
     after=before_log(logger, logging.INFO)
 )
 def execute_with_retry(module, parameters):
-    """Execute module with retry capability"""
+    """Execute module with retry capability, in a child process if WORKER_PROCESS_ISOLATION is set"""
     try:
-        # Execute the module
-        return module.execute(parameters)
+        if process_pool is not None:
+            return process_pool.run(module.__name__, parameters)
+        # Execute the module, cleaning up the Chrome processes it leaves behind
+        with process_governor.job(parameters.get("job_id")):
+            return module.execute(parameters)
+    except JobTimeout:
+        raise
+    except ChildError as e:
+        logger.error(f"Module execution failed: {str(e)}")
+        logger.error(e.child_traceback)
+        raise ExecutionError(f"Module execution failed: {str(e)}") from e
     except Exception as e:
         logger.error(f"Module execution failed: {str(e)}")
         logger.error(traceback.format_exc())
@@ -506,27 +540,36 @@ async def get_status():
         "selenium_available": is_selenium_available(),
         "providers": automation_info["providers"],
         "actions": automation_info["actions"],
-        "job_stats": {
-            "active": ACTIVE_JOBS,
-            "total": TOTAL_JOBS,
-            "successful": SUCCESSFUL_JOBS,
-            "failed": FAILED_JOBS
-        },
-        "capacity": {
-            "max_concurrent": Config.MAX_WORKERS,
-            "current_load": ACTIVE_JOBS
-        }
+        "job_stats": job_executor.job_stats(),
+        "capacity": job_executor.stats(),
+        "driver_pool": driver_pool.stats(),
+        "session_pool": session_pool.stats(),
+        "process_pool": process_pool.stats() if process_pool is not None else None,
+        "process_governor": process_governor.stats()
     }
 
 
 @app.post("/execute", response_model=JobResult)
 def execute_job(job: JobRequest):
     """Main endpoint to execute automation jobs for FNO providers with improved error handling"""
-    global SUCCESSFUL_JOBS, FAILED_JOBS
+    job_id = job.job_id
+    logger.info(f"Received job request: {job_id} - {job.provider}/{job.action}")
     
+    try:
+        with job_executor.slot(job_id):
+            return run_job(job)
+    except JobRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.reason,
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+
+def run_job(job: JobRequest) -> Dict[str, Any]:
+    """Run a job admitted by the job executor and record its status."""
     job_id = job.job_id
     start_time = datetime.now(timezone.utc).isoformat()
-    logger.info(f"Received job request: {job_id} - {job.provider}/{job.action}")
     
     # Store initial job status
     job_status_store.store_job_status(
@@ -535,200 +578,200 @@ def execute_job(job: JobRequest):
         start_time=start_time
     )
     
-    with job_stats_tracking():
+    try:
+        # Validate job parameters
         try:
-            # Validate job parameters
-            try:
-                validate_job_parameters(job.provider, job.action, job.parameters)
-            except ValidationError as e:
-                logger.error(f"Validation error for job {job_id}: {str(e)}")
-                
-                end_time = datetime.now(timezone.utc).isoformat()
-                job_status_store.store_job_status(
-                    job_id, 
-                    "error", 
-                    result={"error": str(e), "error_type": "ValidationError"},
-                    start_time=start_time,
-                    end_time=end_time
-                )
-                
-                FAILED_JOBS += 1
-                
-                return {
-                    "status": "error",
-                    "job_id": job_id,
-                    "result": {
-                        "error": str(e),
-                        "error_type": "ValidationError",
-                        "start_time": start_time,
-                        "end_time": end_time
-                    }
-                }
-                                    
-            # Load automation module
-            try:
-                module = load_automation_module(job.provider, job.action)
-            except ModuleLoadError as e:
-                logger.error(f"Module load error for job {job_id}: {str(e)}")
-                
-                end_time = datetime.now(timezone.utc).isoformat()
-                job_status_store.store_job_status(
-                    job_id, 
-                    "error", 
-                    result={"error": str(e), "error_type": "ModuleLoadError"},
-                    start_time=start_time,
-                    end_time=end_time
-                )
-                
-                FAILED_JOBS += 1
-                
-                return {
-                    "status": "error",
-                    "job_id": job_id,
-                    "result": {
-                        "error": str(e),
-                        "error_type": "ModuleLoadError",
-                        "start_time": start_time,
-                        "end_time": end_time
-                    }
-                }
-
-            job_params = job.parameters.copy()
-            # Execute the module with retry
-            try:
-                result = execute_with_retry(module, job_params)
-                
-                # CRITICAL: Ensure result is always a dictionary
-                if result is None:
-                    logger.warning(f"Job {job_id}: Module returned None, creating default result")
-                    result = {
-                        "status": "completed",
-                        "message": "Job completed but returned no result data",
-                        "details": {}
-                    }
-                elif not isinstance(result, dict):
-                    logger.warning(f"Job {job_id}: Module returned non-dict result: {type(result)}")
-                    result = {
-                        "status": "completed", 
-                        "message": "Job completed with non-standard result format",
-                        "details": {"original_result": str(result)}
-                    }
-                    
-            except ExecutionError as e:
-                logger.error(f"Execution error for job {job_id}: {str(e)}")
-                
-                end_time = datetime.now(timezone.utc).isoformat()
-                job_status_store.store_job_status(
-                    job_id, 
-                    "error", 
-                    result={"error": str(e), "error_type": "ExecutionError"},
-                    start_time=start_time,
-                    end_time=end_time
-                )
-                
-                FAILED_JOBS += 1
-                
-                return {
-                    "status": "error",
-                    "job_id": job_id,
-                    "result": {
-                        "error": str(e),
-                        "error_type": "ExecutionError",
-                        "start_time": start_time,
-                        "end_time": end_time
-                    }
-                }
-
-            # Add job_id to the result if not present
-            if isinstance(result, dict) and 'job_id' not in result:
-                result['job_id'] = job.job_id
-
-            # Ensure screenshot_data always exists in results
-            if isinstance(result, dict) and 'screenshot_data' not in result:
-                result['screenshot_data'] = []
-                
-            # Add timestamps to the result
-            if isinstance(result, dict):
-                result['start_time'] = start_time
-                result['end_time'] = datetime.now(timezone.utc).isoformat()
-                
-            # Check for failure status
-            if isinstance(result, dict) and result.get("status") == "failure":
-                logger.error(f"Job {job_id} failed with internal status 'failure'")
-                FAILED_JOBS += 1
-                
-                # Update job status
-                job_status_store.store_job_status(
-                    job_id, 
-                    "error", 
-                    result=result, 
-                    start_time=start_time,
-                    end_time=result.get('end_time')
-                )
-                
-                return {
-                    "status": "error",  # Propagate error status to orchestrator
-                    "job_id": job_id,
-                    "result": result
-                }
-            
-            # Job was successful
-            logger.info(f"Job {job_id} completed successfully")
-            SUCCESSFUL_JOBS += 1
+            validate_job_parameters(job.provider, job.action, job.parameters)
+        except ValidationError as e:
+            logger.error(f"Validation error for job {job_id}: {str(e)}")
             
             end_time = datetime.now(timezone.utc).isoformat()
             job_status_store.store_job_status(
                 job_id, 
-                "success", 
-                result=result, 
+                "error", 
+                result={"error": str(e), "error_type": "ValidationError"},
                 start_time=start_time,
                 end_time=end_time
             )
             
-            # FINAL VALIDATION: Ensure result is always a dict for response
-            if not isinstance(result, dict):
-                logger.warning(f"Job {job_id}: Converting non-dict result to dict for response")
-                result = {
-                    "status": "completed",
-                    "message": "Job completed successfully",
-                    "details": {"data": result} if result is not None else {}
+            job_executor.record(False)
+            
+            return {
+                "status": "error",
+                "job_id": job_id,
+                "result": {
+                    "error": str(e),
+                    "error_type": "ValidationError",
+                    "start_time": start_time,
+                    "end_time": end_time
                 }
+            }
+                                
+        # Load automation module
+        try:
+            module = load_automation_module(job.provider, job.action)
+        except ModuleLoadError as e:
+            logger.error(f"Module load error for job {job_id}: {str(e)}")
+            
+            end_time = datetime.now(timezone.utc).isoformat()
+            job_status_store.store_job_status(
+                job_id, 
+                "error", 
+                result={"error": str(e), "error_type": "ModuleLoadError"},
+                start_time=start_time,
+                end_time=end_time
+            )
+            
+            job_executor.record(False)
             
             return {
-                "status": "success",
+                "status": "error",
                 "job_id": job_id,
-                "result": result
+                "result": {
+                    "error": str(e),
+                    "error_type": "ModuleLoadError",
+                    "start_time": start_time,
+                    "end_time": end_time
+                }
             }
-        
-        except Exception as e:
+
+        job_params = job.parameters.copy()
+        # Execute the module with retry
+        try:
+            result = execute_with_retry(module, job_params)
+            
+            # CRITICAL: Ensure result is always a dictionary
+            if result is None:
+                logger.warning(f"Job {job_id}: Module returned None, creating default result")
+                result = {
+                    "status": "completed",
+                    "message": "Job completed but returned no result data",
+                    "details": {}
+                }
+            elif not isinstance(result, dict):
+                logger.warning(f"Job {job_id}: Module returned non-dict result: {type(result)}")
+                result = {
+                    "status": "completed", 
+                    "message": "Job completed with non-standard result format",
+                    "details": {"original_result": str(result)}
+                }
+                
+        except (ExecutionError, JobTimeout) as e:
             error_type = type(e).__name__
-            error_msg = str(e)
-            logger.error(f"Unexpected error executing job {job_id}: {error_type} - {error_msg}")
-            logger.error(traceback.format_exc())
+            logger.error(f"Execution error for job {job_id}: {str(e)}")
             
             end_time = datetime.now(timezone.utc).isoformat()
-            # Store error status
             job_status_store.store_job_status(
                 job_id, 
                 "error", 
-                result={"error": error_msg, "error_type": error_type, "traceback": traceback.format_exc()},
+                result={"error": str(e), "error_type": error_type},
                 start_time=start_time,
                 end_time=end_time
             )
             
-            FAILED_JOBS += 1
+            job_executor.record(False)
             
             return {
                 "status": "error",
                 "job_id": job_id,
                 "result": {
-                    "error": error_msg,
+                    "error": str(e),
                     "error_type": error_type,
                     "start_time": start_time,
                     "end_time": end_time
                 }
             }
 
+        # Add job_id to the result if not present
+        if isinstance(result, dict) and 'job_id' not in result:
+            result['job_id'] = job.job_id
+
+        # Ensure screenshot_data always exists in results
+        if isinstance(result, dict) and 'screenshot_data' not in result:
+            result['screenshot_data'] = []
+            
+        # Add timestamps to the result
+        if isinstance(result, dict):
+            result['start_time'] = start_time
+            result['end_time'] = datetime.now(timezone.utc).isoformat()
+            
+        # Check for failure status
+        if isinstance(result, dict) and result.get("status") == "failure":
+            logger.error(f"Job {job_id} failed with internal status 'failure'")
+            job_executor.record(False)
+            
+            # Update job status
+            job_status_store.store_job_status(
+                job_id, 
+                "error", 
+                result=result, 
+                start_time=start_time,
+                end_time=result.get('end_time')
+            )
+            
+            return {
+                "status": "error",  # Propagate error status to orchestrator
+                "job_id": job_id,
+                "result": result
+            }
+        
+        # Job was successful
+        logger.info(f"Job {job_id} completed successfully")
+        job_executor.record(True)
+        
+        end_time = datetime.now(timezone.utc).isoformat()
+        job_status_store.store_job_status(
+            job_id, 
+            "success", 
+            result=result, 
+            start_time=start_time,
+            end_time=end_time
+        )
+        
+        # FINAL VALIDATION: Ensure result is always a dict for response
+        if not isinstance(result, dict):
+            logger.warning(f"Job {job_id}: Converting non-dict result to dict for response")
+            result = {
+                "status": "completed",
+                "message": "Job completed successfully",
+                "details": {"data": result} if result is not None else {}
+            }
+        
+        return {
+            "status": "success",
+            "job_id": job_id,
+            "result": result
+        }
+    
+    except Exception as e:
+        error_type = type(e).__name__
+        error_msg = str(e)
+        logger.error(f"Unexpected error executing job {job_id}: {error_type} - {error_msg}")
+        logger.error(traceback.format_exc())
+        
+        end_time = datetime.now(timezone.utc).isoformat()
+        # Store error status
+        job_status_store.store_job_status(
+            job_id, 
+            "error", 
+            result={"error": error_msg, "error_type": error_type, "traceback": traceback.format_exc()},
+            start_time=start_time,
+            end_time=end_time
+        )
+        
+        job_executor.record(False)
+        
+        return {
+            "status": "error",
+            "job_id": job_id,
+            "result": {
+                "error": error_msg,
+                "error_type": error_type,
+                "start_time": start_time,
+                "end_time": end_time
+            }
+        }
+
 
 @app.get("/health")
 async def health_check():
@@ -736,7 +779,8 @@ async def health_check():
     return {
         "status": "healthy",
         "timestamp": datetime.now(timezone.utc).isoformat(),
-        "active_jobs": ACTIVE_JOBS
+        "active_jobs": job_executor.active,
+        "queued_jobs": job_executor.queued
     }
 
 @app.get("/status/{job_id}")